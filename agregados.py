@@ -0,0 +1,228 @@
+# agregados.py
+
+import os
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+# --- Resoluções dos agregados (segundos). A resolução 0 representa os dados brutos (log). ---
+RESOLUCOES_S = (60, 900, 3600)
+RESOLUCAO_BRUTA = 0
+
+# Número máximo de pontos que uma consulta deve devolver; define a resolução escolhida
+MAX_PONTOS_CONSULTA = 1500
+# Sem log, cada resolução guarda só os últimos períodos (como o histórico em memória);
+# uma consulta nunca usa mais que MAX_PONTOS_CONSULTA períodos da resolução escolhida.
+MAX_PERIODOS_MEMORIA = MAX_PONTOS_CONSULTA
+
+# Um registro por período: início (época), contagem e agregados de PV, SP e saída
+ROLLUP_DTYPE = np.dtype([
+    ('t', '<f8'), ('count', '<u4'),
+    ('min', '<f4'), ('max', '<f4'), ('sum', '<f8'), ('sum_sq', '<f8'), ('last', '<f4'),
+    ('sp_sum', '<f8'), ('on', '<u4'), ('above', '<u4'), ('below', '<u4'),
+])
+
+
+def rollup_path(log_path, resolution_s):
+    """Arquivo do agregado, ao lado do log: log_estufa_1.csv -> log_estufa_1.csv.r60"""
+    return f"{log_path}.r{resolution_s}"
+
+
+def mean(records):
+    return records['sum'] / np.maximum(records['count'], 1)
+
+
+def sp_mean(records):
+    return records['sp_sum'] / np.maximum(records['count'], 1)
+
+
+class _Tier:
+    """
+    Agregados de uma resolução: períodos fechados (disco + memória) e o período aberto.
+
+    Um período fechado (por close() ou gravado por uma sessão anterior) que
+    volte a receber amostras é reaberto: se o log for parado e retomado
+    dentro do mesmo período, as amostras novas se juntam a ele e o registro
+    é regravado no lugar, sem duplicar o período.
+    """
+    def __init__(self, resolution_s, path, read_only=False):
+        self.resolution_s = resolution_s
+        self.path = path
+        self.read_only = read_only
+        self._stored = np.empty(0, dtype=ROLLUP_DTYPE)
+        self._file_records = 0  # registros inteiros no arquivo
+        self._last_persisted_t = None
+        # Períodos fechados fora do memmap: sem arquivo, os últimos MAX_PERIODOS_MEMORIA; com
+        # arquivo, só o último gravado, que fica fora do memmap para poder ser reaberto
+        self._closed = [] if path else deque(maxlen=MAX_PERIODOS_MEMORIA)
+        self._open = None   # [t, count, min, max, sum, sum_sq, last, sp_sum, on, above, below]
+        if path and os.path.isfile(path):
+            self._file_records = os.path.getsize(path) // ROLLUP_DTYPE.itemsize
+            if self._file_records:
+                stored = np.memmap(path, dtype=ROLLUP_DTYPE, mode='r', shape=(self._file_records,))
+                self._last_persisted_t = float(stored['t'][-1])
+                if read_only:
+                    self._stored = stored
+                else:
+                    self._closed.append(stored[-1].tolist())
+                    self._remap()
+
+    def _remap(self):
+        """Mapeia os registros gravados, menos o último (que está em `_closed`)."""
+        count = self._file_records - 1
+        self._stored = (np.memmap(self.path, dtype=ROLLUP_DTYPE, mode='r', shape=(count,)) if count > 0
+                        else np.empty(0, dtype=ROLLUP_DTYPE))
+
+    def add(self, t, pv, sp, output_state):
+        start = t - t % self.resolution_s
+        acc = self._open
+        if acc is not None and acc[0] != start:
+            self._close()
+            acc = None
+        if acc is None:
+            if self._closed and self._closed[-1][0] == start:
+                acc = list(self._closed.pop())  # período já fechado que volta a receber amostras
+            else:
+                acc = [start, 0, pv, pv, 0.0, 0.0, pv, 0.0, 0, 0, 0]
+            self._open = acc
+        acc[1] += 1
+        if pv < acc[2]:
+            acc[2] = pv
+        if pv > acc[3]:
+            acc[3] = pv
+        acc[4] += pv
+        acc[5] += pv * pv
+        acc[6] = pv
+        acc[7] += sp
+        acc[8] += 1 if output_state else 0
+        acc[9] += 1 if pv > sp else 0
+        acc[10] += 1 if pv < sp else 0
+
+    def _close(self):
+        record = tuple(self._open)
+        self._open = None
+        if self.path and not self.read_only:
+            self._persist(record)
+            # O período anterior já está no arquivo: passa a ser lido pelo memmap
+            self._closed = [record]
+            self._remap()
+        else:
+            self._closed.append(record)
+
+    def _persist(self, record):
+        """Grava o período no fim do arquivo, ou sobre o último registro se for o mesmo período."""
+        index = self._file_records
+        if index and self._last_persisted_t == record[0]:
+            index -= 1
+        with open(self.path, 'r+b' if os.path.isfile(self.path) else 'wb') as f:
+            f.seek(index * ROLLUP_DTYPE.itemsize)
+            # Um registro parcial deixado por uma gravação interrompida é sobrescrito aqui
+            f.write(np.array([record], dtype=ROLLUP_DTYPE).tobytes())
+        self._file_records = index + 1
+        self._last_persisted_t = record[0]
+
+    def close(self):
+        """Fecha o período em aberto (persistindo-o)."""
+        if self._open is not None:
+            self._close()
+
+    def query(self, start_s, end_s):
+        """Períodos que começam em [start_s, end_s], incluindo o período em aberto."""
+        stored = self._stored
+        lo = np.searchsorted(stored['t'], start_s - start_s % self.resolution_s, side='left')
+        hi = np.searchsorted(stored['t'], end_s, side='right')
+        parts = [np.asarray(stored[lo:hi])]
+        recent = [r for r in self._closed if start_s - self.resolution_s < r[0] <= end_s]
+        if self._open is not None and start_s - self.resolution_s < self._open[0] <= end_s:
+            recent.append(tuple(self._open))
+        if recent:
+            parts.append(np.array(recent, dtype=ROLLUP_DTYPE))
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    @property
+    def first_t(self):
+        if len(self._stored):
+            return float(self._stored['t'][0])
+        if self._closed:
+            return self._closed[0][0]
+        return self._open[0] if self._open is not None else None
+
+
+class RollupStore:
+    """
+    Agregados min/máx/média/último por zona em várias resoluções (1 min,
+    15 min, 1 h), atualizados incrementalmente a cada amostra. Com
+    `log_path`, os períodos fechados são gravados ao lado do log; sem ele,
+    ficam só em memória. Consultas escolhem a resolução pelo intervalo pedido.
+    """
+    def __init__(self, log_path=None, resolutions=RESOLUCOES_S, read_only=False):
+        self.log_path = log_path
+        self.tiers = {
+            res: _Tier(res, rollup_path(log_path, res) if log_path else None, read_only)
+            for res in sorted(resolutions)
+        }
+
+    @staticmethod
+    def exists(log_path, resolutions=RESOLUCOES_S):
+        return all(os.path.isfile(rollup_path(log_path, res)) for res in resolutions)
+
+    def add(self, timestamp, pv, sp, output_state):
+        t = timestamp.timestamp()
+        for tier in self.tiers.values():
+            tier.add(t, pv, sp, output_state)
+
+    def close(self):
+        for tier in self.tiers.values():
+            tier.close()
+
+    @property
+    def first_t(self):
+        return min((tier.first_t for tier in self.tiers.values() if tier.first_t is not None), default=None)
+
+    def choose_resolution(self, span_s, max_points=MAX_PONTOS_CONSULTA, allow_raw=True):
+        """Menor resolução que responde ao intervalo com até `max_points` pontos."""
+        # Os dados brutos chegam a cada poucos segundos; abaixo de um período da menor resolução,
+        # ou com poucos pontos, eles ainda são a melhor resposta.
+        if allow_raw and span_s <= min(self.tiers) * max_points / 12:
+            return RESOLUCAO_BRUTA
+        for res in self.tiers:
+            if span_s / res <= max_points:
+                return res
+        return max(self.tiers)
+
+    def query(self, start_time, end_time, max_points=MAX_PONTOS_CONSULTA, allow_raw=True):
+        """
+        Devolve (resolução, registros) para a janela pedida. Com resolução
+        RESOLUCAO_BRUTA os registros são None e quem chama deve usar o log.
+        """
+        start_s, end_s = start_time.timestamp(), end_time.timestamp()
+        res = self.choose_resolution(end_s - start_s, max_points, allow_raw)
+        if res == RESOLUCAO_BRUTA:
+            return res, None
+        return res, self.tiers[res].query(start_s, end_s)
+
+    @staticmethod
+    def times(records):
+        return [datetime.fromtimestamp(t) for t in records['t'].tolist()]
+
+
+def stats_from_rollup(records, resolution_s):
+    """ReportStats aproximado a partir de agregados (períodos inteiros)."""
+    from relatorio import ReportStats
+    stats = ReportStats()
+    if not len(records):
+        return stats
+    counts = records['count'].astype(np.float64)
+    stats.count = int(counts.sum())
+    stats.sum = float(records['sum'].sum())
+    stats.sum_sq = float(records['sum_sq'].sum())
+    stats.min = float(records['min'].min())
+    stats.max = float(records['max'].max())
+    # Tempos estimados pela fração de amostras de cada período
+    stats.time_total = float(len(records) * resolution_s)
+    stats.time_on = float((records['on'] / counts).sum() * resolution_s)
+    stats.time_above = float((records['above'] / counts).sum() * resolution_s)
+    stats.time_below = float((records['below'] / counts).sum() * resolution_s)
+    stats.first_t = float(records['t'][0])
+    return stats
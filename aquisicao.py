@@ -0,0 +1,207 @@
+# aquisicao.py
+
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+from plano_escrita import WritePlan
+
+# --- Eventos enviados pela aquisição para a interface ---
+# Amostra lida de uma faixa de registros (key é o consumidor do PollPlan)
+Sample = namedtuple("Sample", ["timestamp", "key", "regs"])
+# Resultado de um ciclo de leitura completo (device identifica a thread/conexão de origem)
+PollStatus = namedtuple("PollStatus", ["timestamp", "connected", "ok", "duration_s", "jitter_s", "device"])
+# Resultado de uma escrita; on_done é chamado na thread da interface. `superseded`
+# indica que o valor foi substituído por um pedido mais novo ao mesmo registro
+# antes de ser enviado (ok, então, é o resultado da escrita que o substituiu).
+WriteResult = namedtuple("WriteResult", ["address", "value", "ok", "on_done", "superseded"], defaults=(False,))
+
+# --- Comandos internos enviados para a thread de aquisição ---
+_WriteCmd = namedtuple("_WriteCmd", ["address", "value", "on_done"])
+_IntervalCmd = namedtuple("_IntervalCmd", ["interval_s"])
+_PlanCmd = namedtuple("_PlanCmd", ["plan"])
+_STOP = object()
+
+# Reconexão com espera exponencial (s)
+BACKOFF_INICIAL_S = 1.0
+BACKOFF_MAX_S = 30.0
+
+
+class WindowStats:
+    """Estatísticas (média, máximo) sobre as últimas N medições."""
+    def __init__(self, size=100):
+        self.values = deque(maxlen=size)
+
+    def add(self, value):
+        self.values.append(value)
+
+    @property
+    def mean(self):
+        return sum(self.values) / len(self.values) if self.values else 0.0
+
+    @property
+    def max(self):
+        return max(self.values) if self.values else 0.0
+
+
+class AcquisitionWorker(threading.Thread):
+    """
+    Thread dona da conexão Modbus. Executa o plano de leitura num
+    agendamento próprio (taxa fixa, sem acumular atraso) e envia amostras
+    com horário para a interface através de `events`. Escritas passam pelo
+    mesmo canal, de modo que o ModbusClient nunca é usado por duas threads.
+
+    Escritas pendentes são tratadas em lote (plano_escrita.WritePlan): só o
+    valor mais recente de cada registro é enviado, registros contíguos vão
+    numa única escrita múltipla e, com `verify_writes`, os valores são
+    relidos para confirmação.
+
+    Vários workers (um por equipamento) podem compartilhar a mesma fila
+    `events`; veja dispositivos.ConnectionPool.
+    """
+    def __init__(self, client, interval_s, plan=None, events=None, name=None, verify_writes=True):
+        super().__init__(daemon=True, name=name)
+        self.client = client
+        self.interval_s = interval_s
+        self.plan = plan
+        self.events = events if events is not None else queue.Queue()
+        self.verify_writes = verify_writes
+        self._commands = queue.Queue()
+        self._deferred = None
+        self.jitter = WindowStats()
+
+        # Saúde da conexão
+        self.poll_latency = WindowStats()
+        self.polls = 0
+        self.failures = 0
+        self.connected = False
+        self._backoff_s = BACKOFF_INICIAL_S
+        self._next_retry = 0.0
+
+    # --- API usada pela interface (thread principal) ---
+    def submit_write(self, address, value, on_done=None):
+        """Enfileira uma escrita em registro; o resultado chega como WriteResult."""
+        self._commands.put(_WriteCmd(address, value, on_done))
+
+    def set_interval(self, interval_s):
+        self._commands.put(_IntervalCmd(interval_s))
+
+    def set_plan(self, plan):
+        self._commands.put(_PlanCmd(plan))
+
+    def request_stop(self):
+        """Pede o encerramento sem esperar (para encerrar vários workers em paralelo)."""
+        self._commands.put(_STOP)
+
+    def stop(self, timeout=None):
+        self.request_stop()
+        if self.is_alive():
+            self.join(timeout)
+
+    # --- Thread de aquisição ---
+    def run(self):
+        next_poll = time.monotonic()
+        try:
+            while True:
+                timeout = max(0.0, next_poll - time.monotonic())
+                if self._deferred is not None:
+                    cmd, self._deferred = self._deferred, None
+                else:
+                    try:
+                        cmd = self._commands.get(timeout=timeout)
+                    except queue.Empty:
+                        cmd = None
+
+                if cmd is _STOP:
+                    break
+                if cmd is not None:
+                    self._handle_command(cmd)
+                    if isinstance(cmd, _IntervalCmd):
+                        next_poll = time.monotonic()
+                    continue
+
+                now = time.monotonic()
+                jitter_s = now - next_poll
+                self.jitter.add(jitter_s)
+                self._poll(jitter_s)
+
+                # Agenda o próximo ciclo a partir do horário previsto, não do fim da leitura
+                next_poll += self.interval_s
+                if next_poll < time.monotonic():
+                    next_poll = time.monotonic() + self.interval_s
+        finally:
+            self.client.close()
+
+    def _ensure_open(self):
+        """Garante a conexão, reconectando com espera exponencial entre tentativas."""
+        if self.client.is_open:
+            return True
+        now = time.monotonic()
+        if now < self._next_retry:
+            return False
+        if self.client.open():
+            self._backoff_s = BACKOFF_INICIAL_S
+            return True
+        self._next_retry = now + self._backoff_s
+        self._backoff_s = min(self._backoff_s * 2, BACKOFF_MAX_S)
+        return False
+
+    def _take_pending_writes(self, first):
+        """Junta à escrita `first` as escritas que já estão na fila, preservando a ordem dos demais comandos."""
+        writes = [first]
+        while True:
+            try:
+                cmd = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            if not isinstance(cmd, _WriteCmd):
+                self._deferred = cmd
+                break
+            writes.append(cmd)
+        return writes
+
+    def _write_batch(self, writes):
+        plan = WritePlan(writes)
+        if self._ensure_open():
+            read_func = self.client.read_holding_registers if self.verify_writes else None
+            outcomes = plan.execute(self.client.write_single_register, self.client.write_multiple_registers,
+                                    read_func)
+        else:
+            outcomes = [(cmd, False, False) for cmd in writes]
+        for cmd, ok, superseded in outcomes:
+            self.events.put(WriteResult(cmd.address, cmd.value, ok, cmd.on_done, superseded))
+
+    def _handle_command(self, cmd):
+        if isinstance(cmd, _WriteCmd):
+            self._write_batch(self._take_pending_writes(cmd))
+        elif isinstance(cmd, _IntervalCmd):
+            self.interval_s = cmd.interval_s
+        elif isinstance(cmd, _PlanCmd):
+            self.plan = cmd.plan
+
+    def _poll(self, jitter_s):
+        if self.plan is None:
+            return
+        start = time.monotonic()
+        self.polls += 1
+        if not self._ensure_open():
+            self.connected = False
+            self.failures += 1
+            self.events.put(PollStatus(datetime.now(), False, False, time.monotonic() - start, jitter_s, self.name))
+            return
+
+        results = self.plan.execute(self.client.read_holding_registers)
+        timestamp = datetime.now()
+        duration_s = time.monotonic() - start
+        ok = all(results.values())
+        for key, regs in results.items():
+            if regs:
+                self.events.put(Sample(timestamp, key, regs))
+        self.poll_latency.add(duration_s)
+        if not ok:
+            self.failures += 1
+        # Uma falha de leitura costuma fechar o socket; a próxima volta reconecta
+        self.connected = self.client.is_open
+        self.events.put(PollStatus(timestamp, self.connected, ok, duration_s, jitter_s, self.name))
@@ -0,0 +1,95 @@
+# bench_cache_log.py
+#
+# Mede o cache de logs interpretados (cache_log.py) num log CSV sintético
+# com N linhas (uma a cada 5 s), comparando com a passada linha a linha
+# (relatorio.scan_stats) que cada relatório fazia antes:
+#   - primeira abertura sem índice (lê tudo uma vez e cria o .idx);
+#   - novo relatório, outra janela, arquivo inalterado (cache);
+#   - relatório depois de o log ganhar linhas (só a cauda é lida);
+#   - primeira abertura com o índice já gravado (vai direto à janela).
+# Todas as estatísticas são conferidas contra a passada linha a linha.
+#
+# Uso: python bench_cache_log.py [--linhas 1000000]
+
+import argparse
+import csv
+import math
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from cache_log import ParsedLogCache, index_path
+from registro_log import LOG_HEADER, format_row
+from relatorio import scan_stats
+
+PASSO_S = 5
+
+
+def write_log(path, rows, t0, first=0):
+    mode = "a" if first else "w"
+    with open(path, mode, newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if not first:
+            writer.writerow(LOG_HEADER)
+        for i in range(first, first + rows):
+            t = t0 + timedelta(seconds=PASSO_S * i)
+            pv = 25.0 + 2.0 * math.sin(i / 50.0)
+            writer.writerow(format_row(t, pv, 25.0, int(pv < 25.0)))
+
+
+def same(a, b):
+    return (a.count == b.count and math.isclose(a.sum, b.sum, rel_tol=1e-6)
+            and math.isclose(a.time_on, b.time_on) and math.isclose(a.time_total, b.time_total)
+            and math.isclose(a.min, b.min, abs_tol=1e-4) and math.isclose(a.max, b.max, abs_tol=1e-4))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do cache de logs interpretados.")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    t0 = datetime(2024, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.csv")
+        write_log(path, args.linhas, t0)
+        end_all = t0 + timedelta(seconds=PASSO_S * args.linhas)
+        day = (end_all - timedelta(days=2), end_all - timedelta(days=1))
+        other = (end_all - timedelta(days=8), end_all - timedelta(days=7))
+        print(f"Log: {args.linhas} linhas, {os.path.getsize(path) / 2**20:.1f} MiB; janelas de 1 dia\n")
+
+        ref, t_scan = timed(scan_stats, path, *day)
+        cache = ParsedLogCache()
+        results = []
+        stats, t = timed(cache.stats, path, *day)
+        results.append(("1ª abertura, sem índice", t, same(stats, ref)))
+        stats, t = timed(cache.stats, path, *other)
+        results.append(("outra janela, em cache", t, same(stats, scan_stats(path, *other))))
+
+        write_log(path, 1000, t0, first=args.linhas)
+        tail = (end_all - timedelta(hours=1), end_all + timedelta(hours=2))
+        stats, t = timed(cache.stats, path, *tail)
+        results.append(("log cresceu 1000 linhas", t, same(stats, scan_stats(path, *tail))))
+
+        cold = ParsedLogCache()
+        stats, t = timed(cold.stats, path, *day)
+        results.append(("1ª abertura, com índice", t, same(stats, ref)))
+        index_kib = os.path.getsize(index_path(path)) / 1024
+
+        print(f"  {'passada linha a linha (antes)':32s} {t_scan * 1000:9.1f} ms")
+        for label, elapsed, ok in results:
+            print(f"  {label:32s} {elapsed * 1000:9.1f} ms  {t_scan / elapsed:7.1f}x  {'ok' if ok else 'DIVERGENTE'}")
+        print(f"\n  índice: {index_kib:.1f} KiB; leituras: completas={cache.full_reads + cold.full_reads}"
+              f" cauda={cache.tail_reads} janela={cold.window_reads} cache={cache.hits}")
+        if not all(ok for _, _, ok in results):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# bench_excecao.py
+#
+# Mede o efeito do relatório por exceção (excecao.py) sobre um dia de
+# amostras a cada 5 s geradas pelo motor do simulador: uma zona estável
+# (setpoint abaixo da temperatura ambiente, aquecedor desligado) e uma
+# zona em controle (aquecedor ciclando na histerese). Para cada
+# configuração, conta quantas amostras chegariam à interface/log e
+# confere que nenhuma mudança de SP ou de saída foi perdida e que o
+# histórico reconstruído fica dentro do desvio prometido. Numa zona
+# estável, a banda morta padrão corta cerca de 12x as linhas.
+#
+# Uso: python bench_excecao.py [--horas 24] [--passo 5]
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from excecao import BANDA_MORTA_PADRAO_C, HEARTBEAT_PADRAO_S, DeadbandFilter, SwingingDoorCompressor
+from simulador_contemp import GreenhouseBatchEngine
+
+# Setpoint por zona: abaixo do ambiente (28 °C) a zona fica parada; 29,5 °C com
+# histerese de 0,5 °C faz o aquecedor ciclar entre 29 e 30 °C.
+ZONAS = {"estável": 25.0, "em controle": 29.5}
+HISTERESE_C = 0.5
+DESVIO_COMPRESSAO_C = 0.2
+
+
+def simulate(horas, passo_s, seed=1):
+    """Amostras (t, pv, sp, saída) por zona, com PV e SP na resolução dos registros (0,1 °C)."""
+    names = list(ZONAS)
+    engine = GreenhouseBatchEngine(None, [10 * i for i in range(len(names))], [20.0] * len(names),
+                                   [0.1] * len(names), [0.2] * len(names), names=names, seed=seed)
+    engine.setpoint = np.array([ZONAS[name] for name in names])
+    engine.histerese = np.full(len(names), HISTERESE_C)
+    steps = int(horas * 3600 / passo_s)
+    t0 = datetime(2024, 1, 1)
+    series = {name: [] for name in names}
+    for k in range(steps):
+        engine.step()
+        t = t0 + timedelta(seconds=k * passo_s)
+        for i, name in enumerate(names):
+            series[name].append((t, int(engine.temperatura[i] * 10) / 10, engine.setpoint[i], int(engine.saida[i])))
+    return series
+
+
+def transitions(rows):
+    return [(r[0], r[2], r[3]) for prev, r in zip(rows, rows[1:]) if (r[2], r[3]) != (prev[2], prev[3])]
+
+
+def max_error(rows, kept, hold):
+    """
+    Maior distância entre cada amostra e o histórico gravado, lido como
+    degraus (`hold`, o significado da banda morta) ou interpolado linearmente
+    (o significado da compressão).
+    """
+    t = np.array([r[0].timestamp() for r in rows])
+    pv = np.array([r[1] for r in rows])
+    kt = np.array([r[0].timestamp() for r in kept])
+    kpv = np.array([r[1] for r in kept])
+    if hold:
+        rebuilt = kpv[np.searchsorted(kt, t, side="right") - 1]
+    else:
+        rebuilt = np.interp(t, kt, kpv)
+    return float(np.max(np.abs(rebuilt - pv)))
+
+
+def run_stages(rows, deadband, compression):
+    f = DeadbandFilter(deadband, HEARTBEAT_PADRAO_S) if deadband is not None else None
+    c = SwingingDoorCompressor(compression, HEARTBEAT_PADRAO_S) if compression is not None else None
+    kept = []
+    start = time.perf_counter()
+    for row in rows:
+        if f is not None and not f.accept(*row):
+            continue
+        kept.extend(c.add(*row) if c is not None else [row])
+    if c is not None:
+        kept.extend(c.flush())
+    return kept, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do relatório por exceção.")
+    parser.add_argument("--horas", type=float, default=24.0)
+    parser.add_argument("--passo", type=float, default=5.0)
+    args = parser.parse_args()
+
+    configs = [
+        (f"banda morta {BANDA_MORTA_PADRAO_C} °C", BANDA_MORTA_PADRAO_C, None),
+        (f"swinging door {DESVIO_COMPRESSAO_C} °C", None, DESVIO_COMPRESSAO_C),
+        ("banda morta + swinging door", BANDA_MORTA_PADRAO_C, DESVIO_COMPRESSAO_C),
+    ]
+    for name, rows in simulate(args.horas, args.passo).items():
+        expected = transitions(rows)
+        print(f"\nZona {name}: {len(rows)} amostras, {len(expected)} mudanças de SP/saída")
+        for label, deadband, compression in configs:
+            kept, elapsed = run_stages(rows, deadband, compression)
+            kept_transitions = set((r[0], r[2], r[3]) for r in kept)
+            lost = sum(1 for tr in expected if tr not in kept_transitions)
+            limit = (deadband or 0.0) + (compression or 0.0)
+            print(f"  {label:30s} {len(kept):6d} linhas ({len(rows) / max(len(kept), 1):5.1f}x menos)"
+                  f"  erro máx {max_error(rows, kept, compression is None):.3f} °C (limite {limit:.1f})"
+                  f"  transições perdidas: {lost}  {elapsed / len(rows) * 1e6:.2f} µs/amostra")
+
+
+if __name__ == "__main__":
+    main()
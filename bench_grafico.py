@@ -0,0 +1,77 @@
+# bench_grafico.py
+#
+# Compara redesenhos por segundo do gráfico de tendência: a abordagem antiga
+# (ax.clear() + recriar tudo + canvas.draw() a cada amostra) contra o
+# TrendPlotRenderer incremental com blitting. Usa o backend Agg (sem janela).
+#
+# Uso: python bench_grafico.py
+
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import matplotlib.dates as mdates
+
+from grafico import TrendPlotRenderer
+
+MAX_POINTS = 50
+AMOSTRAS = 300
+
+
+def _amostras():
+    inicio = datetime(2024, 1, 1, 12, 0, 0)
+    for i in range(AMOSTRAS):
+        yield inicio + timedelta(seconds=5 * i), 24.0 + (i % 20) * 0.1, 25.0
+
+
+def _novo_canvas():
+    fig = Figure(figsize=(5, 4), dpi=100)
+    ax = fig.add_subplot(111)
+    canvas = FigureCanvasAgg(fig)
+    fig.tight_layout()
+    return fig, ax, canvas
+
+
+def bench_antigo():
+    fig, ax, canvas = _novo_canvas()
+    t, pv, sp = deque(maxlen=MAX_POINTS), deque(maxlen=MAX_POINTS), deque(maxlen=MAX_POINTS)
+    inicio = time.perf_counter()
+    for ts, p, s in _amostras():
+        t.append(ts); pv.append(p); sp.append(s)
+        ax.clear()
+        ax.plot(t, pv, marker='o', linestyle='-', markersize=4, label='Temperatura (PV)')
+        ax.plot(t, sp, linestyle='--', color='r', label='Setpoint (SP)')
+        ax.set_title("Histórico de Temperatura")
+        ax.set_xlabel("Horário")
+        ax.set_ylabel("Temperatura (°C)")
+        ax.grid(True)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
+        fig.autofmt_xdate()
+        ax.legend()
+        canvas.draw()
+    return AMOSTRAS / (time.perf_counter() - inicio)
+
+
+def bench_incremental():
+    fig, ax, canvas = _novo_canvas()
+    renderer = TrendPlotRenderer(fig, ax, canvas)
+    t, pv, sp = deque(maxlen=MAX_POINTS), deque(maxlen=MAX_POINTS), deque(maxlen=MAX_POINTS)
+    inicio = time.perf_counter()
+    for ts, p, s in _amostras():
+        t.append(ts); pv.append(p); sp.append(s)
+        renderer.update(t, pv, sp)
+    return AMOSTRAS / (time.perf_counter() - inicio)
+
+
+def main():
+    antigo = bench_antigo()
+    incremental = bench_incremental()
+    print(f"Antigo (clear + draw):       {antigo:8.1f} redesenhos/s")
+    print(f"Incremental (blit):          {incremental:8.1f} redesenhos/s")
+    print(f"Ganho:                       {incremental / antigo:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# bench_gravador.py
+#
+# Benchmark do gravador sem interface (gravador.Recorder): sobe o simulador
+# com N zonas numa porta local e grava todas elas pelo período pedido,
+# medindo amostras gravadas x esperadas, atraso do agendamento e a CPU
+# consumida pelo gravador (todas as suas threads somadas, em fração de um
+# núcleo). O gravador passa se gravar ao menos 99% das amostras usando
+# menos de um núcleo.
+#
+# Uso: python bench_gravador.py --zonas 100 --intervalo 1 --duracao 30
+
+import argparse
+import os
+import tempfile
+import time
+
+from bench_servidor_modbus import server_command, start_server, stop_server
+from dispositivos import DeviceConfig
+from gravador import FORMATOS_LOG, Recorder
+
+MIN_FRACAO_AMOSTRAS = 0.99
+
+
+def simulator_devices(zonas, host, port):
+    """Zonas do simulador com --zonas N (offset 10 entre elas)."""
+    return [DeviceConfig(f"Zona {i + 1}", host, port, 1, 10 * i) for i in range(zonas)]
+
+
+def count_rows(log_dir):
+    rows = 0
+    for name in os.listdir(log_dir):
+        if name.endswith(".csv"):
+            with open(os.path.join(log_dir, name), "rb") as f:
+                rows += sum(1 for _ in f) - 1  # sem o cabeçalho
+    return rows
+
+
+def run(zonas, intervalo, duracao, formato, host, port):
+    proc = start_server(server_command(host, port, zonas), host, port)
+    try:
+        with tempfile.TemporaryDirectory() as log_dir:
+            recorder = Recorder(simulator_devices(zonas, host, port), log_dir, intervalo, formato)
+            cpu0, wall0 = time.process_time(), time.monotonic()
+            recorder.run(duracao)
+            cpu = time.process_time() - cpu0
+            wall = time.monotonic() - wall0
+            rows = count_rows(log_dir) if formato == "csv" else None
+    finally:
+        stop_server(proc)
+
+    polls = sum(w.polls for w in recorder.pool.workers.values())
+    expected = zonas * (int(duracao / intervalo) + 1)
+    return {
+        "zonas": zonas, "intervalo_s": intervalo, "duracao_s": wall, "formato": formato,
+        "amostras": recorder.samples, "amostras_esperadas": expected, "linhas_no_disco": rows,
+        "leituras_com_falha": recorder.failed_polls, "ciclos": polls,
+        "jitter_max_ms": recorder.jitter_max_s * 1000,
+        "latencia_leitura_media_ms": max(w.poll_latency.mean for w in recorder.pool.workers.values()) * 1000,
+        "cpu_s": cpu, "cpu_fracao_nucleo": cpu / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do gravador sem interface.")
+    parser.add_argument("--zonas", type=int, default=100)
+    parser.add_argument("--intervalo", type=float, default=1.0)
+    parser.add_argument("--duracao", type=float, default=30.0)
+    parser.add_argument("--formato", choices=sorted(FORMATOS_LOG), default="csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=15021)
+    args = parser.parse_args()
+
+    r = run(args.zonas, args.intervalo, args.duracao, args.formato, args.host, args.port)
+    for key, value in r.items():
+        print(f"{key:28s} {value:.3f}" if isinstance(value, float) else f"{key:28s} {value}")
+
+    ok = r["amostras"] >= MIN_FRACAO_AMOSTRAS * r["amostras_esperadas"] and r["cpu_fracao_nucleo"] < 1.0
+    print(f"\n{args.zonas} zonas a {1 / args.intervalo:g} Hz: {'OK' if ok else 'FALHOU'} "
+          f"({r['cpu_fracao_nucleo'] * 100:.1f}% de um núcleo)")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# bench_historico.py
+#
+# Compara o histórico por zona antigo (três deques com datetime e floats)
+# com historico.ZoneHistory (arrays NumPy) para Z zonas x N pontos:
+# memória ocupada (tracemalloc) e tempo de preparar os dados de um quadro
+# do gráfico (conversão dos horários para o matplotlib, arrays de PV/SP e
+# extremos para a escala), como faz grafico.TrendPlotRenderer.
+#
+# Uso: python bench_historico.py [--zonas 100] [--pontos 100000]
+
+import argparse
+import gc
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta
+
+import matplotlib.dates as mdates
+import numpy as np
+
+from grafico import SEGUNDOS_POR_DIA, _EPOCH_NUM
+from historico import ZoneHistory
+
+
+def fill_deques(zonas, pontos, t0):
+    zones = []
+    for z in range(zonas):
+        times, pv, sp = deque(maxlen=pontos), deque(maxlen=pontos), deque(maxlen=pontos)
+        for i in range(pontos):
+            times.append(t0 + timedelta(seconds=5 * i))
+            pv.append(20.0 + (i % 100) * 0.1 + z * 1e-3)
+            sp.append(25.0)
+        zones.append((times, pv, sp))
+    return zones
+
+
+def fill_arrays(zonas, pontos, t0_s):
+    zones = []
+    t = t0_s + 5.0 * np.arange(pontos)
+    for z in range(zonas):
+        h = ZoneHistory(pontos)
+        h.extend(t, 20.0 + (np.arange(pontos) % 100) * 0.1 + z * 1e-3, np.full(pontos, 25.0))
+        zones.append(h)
+    return zones
+
+
+def measure_memory(fill, *args):
+    gc.collect()
+    tracemalloc.start()
+    zones = fill(*args)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return zones, size
+
+
+def prep_deques(zones):
+    """Preparo antigo: date2num sobre a lista de datetimes e min/max em Python."""
+    for times, pv, sp in zones:
+        x = mdates.date2num(list(times))
+        y_pv, y_sp = np.asarray(pv, dtype=float), np.asarray(sp, dtype=float)
+        min(x), max(x), min(min(pv), min(sp)), max(max(pv), max(sp))
+    return x, y_pv, y_sp
+
+
+def prep_arrays(zones):
+    """Preparo novo: uma operação vetorizada sobre a visão dos horários; PV/SP sem cópia."""
+    for h in zones:
+        x = h.times / SEGUNDOS_POR_DIA + _EPOCH_NUM
+        y_pv, y_sp = h.pv, h.sp
+        np.min(x), np.max(x), min(np.min(y_pv), np.min(y_sp)), max(np.max(y_pv), np.max(y_sp))
+    return x, y_pv, y_sp
+
+
+def timed(func, zones, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(zones)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do histórico por zona: deques x arrays NumPy.")
+    parser.add_argument("--zonas", type=int, default=100)
+    parser.add_argument("--pontos", type=int, default=100_000)
+    args = parser.parse_args()
+    t0 = datetime(2024, 1, 1)
+    t0_s = (t0 - datetime(1970, 1, 1)).total_seconds()
+
+    array_zones, array_bytes = measure_memory(fill_arrays, args.zonas, args.pontos, t0_s)
+    array_time = timed(prep_arrays, array_zones)
+    x_new, pv_new, _ = prep_arrays(array_zones[-1:])
+    del array_zones
+
+    deque_zones, deque_bytes = measure_memory(fill_deques, args.zonas, args.pontos, t0)
+    deque_time = timed(prep_deques, deque_zones, repeat=1)
+    x_old, pv_old, _ = prep_deques(deque_zones[-1:])
+    del deque_zones
+
+    # Os dois caminhos precisam levar ao mesmo gráfico
+    assert np.allclose(x_old, x_new, rtol=0, atol=1e-9), "horários divergentes"
+    assert np.allclose(pv_old, pv_new, atol=1e-5), "PV divergente"
+
+    print(f"{args.zonas} zonas x {args.pontos} pontos")
+    print(f"  {'':24s} {'memória':>12s} {'preparo de um quadro (todas as zonas)':>40s}")
+    print(f"  {'deques (datetime/float)':24s} {deque_bytes / 2**20:9.1f} MiB {deque_time * 1000:37.1f} ms")
+    print(f"  {'ZoneHistory (NumPy)':24s} {array_bytes / 2**20:9.1f} MiB {array_time * 1000:37.1f} ms")
+    print(f"  {'ganho':24s} {deque_bytes / array_bytes:9.1f}x    {deque_time / array_time:37.1f}x")
+
+
+if __name__ == "__main__":
+    main()
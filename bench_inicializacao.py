@@ -0,0 +1,86 @@
+# bench_inicializacao.py
+#
+# Mede a partida do painel (cliente_gui.py) com 2, 50 e 500 zonas num
+# registro de equipamentos gerado: tempo até a primeira janela desenhada
+# (desde o início do processo, incluindo os imports) e memória residente
+# máxima. Cada medição roda num processo novo, para que os imports
+# contem. O modo "imediato" cria o gráfico de todas as abas na partida,
+# como o painel fazia antes; "sob demanda" é o comportamento atual.
+#
+# Precisa de um display (em servidores: xvfb-run python bench_inicializacao.py).
+#
+# Uso: python bench_inicializacao.py [--zonas 2 50 500] [--repeticoes 3]
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Porta sem servidor: as conexões falham logo e a partida não depende do simulador
+PORTA_BENCH = 15022
+
+
+def write_registry(path, zonas, port):
+    zones = [{"nome": f"Zona {i + 1}", "host": "127.0.0.1", "porta": port, "unit_id": 1, "offset": 10 * i}
+             for i in range(zonas)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"zonas": zones}, f)
+
+
+def child(config, eager, t0):
+    """Processo medido: sobe o painel, espera a primeira janela e informa tempo e RSS."""
+    import tkinter as tk
+    from cliente_gui import GreenhouseControlApp
+
+    root = tk.Tk()
+    app = GreenhouseControlApp(root, config)
+    if eager:
+        for tab in app.tabs:
+            tab.ensure_plot()
+    root.update()
+    elapsed = time.time() - t0
+    rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    app.pool.stop(timeout=2)
+    root.destroy()
+    print(json.dumps({"janela_s": elapsed, "rss_mib": rss_kib / 1024}))
+
+
+def measure(config, eager):
+    cmd = [sys.executable, os.path.abspath(__file__), "--filho", config, "--t0", repr(time.time())]
+    if eager:
+        cmd.append("--imediato")
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da partida do painel.")
+    parser.add_argument("--zonas", type=int, nargs="+", default=[2, 50, 500])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--filho", metavar="CONFIG", help=argparse.SUPPRESS)
+    parser.add_argument("--imediato", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--t0", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        child(args.filho, args.imediato, args.t0)
+        return
+
+    print(f"{'zonas':>6s} {'gráficos':>12s} {'1ª janela':>12s} {'RSS máx.':>12s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for zonas in args.zonas:
+            config = os.path.join(tmp, f"dispositivos_{zonas}.json")
+            write_registry(config, zonas, PORTA_BENCH)
+            for eager in (True, False):
+                runs = [measure(config, eager) for _ in range(args.repeticoes)]
+                best = min(runs, key=lambda r: r["janela_s"])
+                print(f"{zonas:6d} {'imediato' if eager else 'sob demanda':>12s} "
+                      f"{best['janela_s'] * 1000:9.0f} ms {best['rss_mib']:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# bench_log_binario.py
+#
+# Compara a latência de uma consulta por janela de tempo num log CSV
+# (varredura completa com strptime, como o ReportWindow fazia) contra o
+# log binário mapeado em memória (busca binária na coluna de horários).
+#
+# Uso: python bench_log_binario.py [num_linhas]
+
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from registro_log import LOG_HEADER, LOG_TIME_FORMAT, format_row
+from log_binario import BINARY_EXT, BinaryLog, convert_csv
+
+LINHAS_PADRAO = 500_000
+
+
+def gerar_csv(path, n):
+    inicio = datetime(2024, 1, 1)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_HEADER)
+        for i in range(n):
+            writer.writerow(format_row(inicio + timedelta(seconds=5 * i), 24.0 + (i % 50) / 10, 25.0, i % 2))
+    return inicio
+
+
+def consulta_csv(path, start, end):
+    count = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            row_time = datetime.strptime(row[0], LOG_TIME_FORMAT)
+            if start <= row_time <= end:
+                count += 1
+    return count
+
+
+def consulta_binaria(path, start, end):
+    return len(BinaryLog(path).range(start, end))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else LINHAS_PADRAO
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "log.csv")
+        bin_path = os.path.join(tmp, "log" + BINARY_EXT)
+        inicio = gerar_csv(csv_path, n)
+
+        t0 = time.perf_counter()
+        convert_csv(csv_path, bin_path)
+        t_conv = time.perf_counter() - t0
+
+        # Janela de 1 hora no meio do período
+        start = inicio + timedelta(seconds=5 * n // 2)
+        end = start + timedelta(hours=1)
+
+        t0 = time.perf_counter()
+        n_csv = consulta_csv(csv_path, start, end)
+        t_csv = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        n_bin = consulta_binaria(bin_path, start, end)
+        t_bin = time.perf_counter() - t0
+
+        assert n_csv == n_bin, (n_csv, n_bin)
+        print(f"Linhas no log:          {n}")
+        print(f"Tamanho CSV / binário:  {os.path.getsize(csv_path) / 1e6:.1f} MB / {os.path.getsize(bin_path) / 1e6:.1f} MB")
+        print(f"Conversão CSV->binário: {t_conv:.2f} s")
+        print(f"Consulta CSV (scan):    {t_csv * 1e3:10.2f} ms ({n_csv} linhas)")
+        print(f"Consulta binária:       {t_bin * 1e3:10.2f} ms ({n_bin} linhas)")
+        print(f"Ganho:                  {t_csv / t_bin:10.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# bench_reducao.py
+#
+# Tempo de desenho do gráfico de tendência (grafico.TrendPlotRenderer, em
+# canvas Agg, sem janela) com um histórico de N amostras, sem redução e com
+# as reduções de reducao.py (envelope mín./máx. incremental e LTTB):
+#   - primeiro quadro (redesenho completo);
+#   - quadro típico: uma amostra nova e atualização das linhas.
+# Também compara as imagens: fração de pixels diferentes do desenho com
+# todas as amostras (a maior parte vem dos marcadores, que deixam de ser
+# desenhados um por amostra) e se o pico isolado e o degrau do SP
+# continuam visíveis.
+#
+# Uso: python bench_reducao.py [--amostras 1000000] [--largura 800] [--quadros 50]
+
+import argparse
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from grafico import SEGUNDOS_POR_DIA, TrendPlotRenderer, _EPOCH_NUM
+from historico import ZoneHistory
+
+DPI = 100
+
+
+def make_history(n, t0_s):
+    """Histórico sintético: oscilação lenta com ruído, um pico isolado e um degrau do SP no meio."""
+    rng = np.random.default_rng(1)
+    i = np.arange(n + 1000)
+    pv = 25.0 + np.sin(i / 3000.0) + rng.normal(0.0, 0.05, len(i))
+    pv[n // 3] = 32.0
+    sp = np.where(i < n // 2, 25.0, 26.5)
+    h = ZoneHistory(n)
+    h.extend(t0_s + 5.0 * i[:n], pv[:n], sp[:n])
+    return h, t0_s + 5.0 * i[n:], pv[n:], sp[n:]
+
+
+def new_renderer(width_px, method):
+    fig = Figure(figsize=(width_px / DPI, 4), dpi=DPI)
+    ax = fig.add_subplot(111)
+    canvas = FigureCanvasAgg(fig)
+    return TrendPlotRenderer(fig, ax, canvas, method or "minmax")
+
+
+def draw(renderer, history, method):
+    if method is None:
+        # Sem redução: todas as amostras vão para as linhas
+        renderer._update(history.times / SEGUNDOS_POR_DIA + _EPOCH_NUM, history.pv, history.sp)
+    else:
+        renderer.update_seconds(history.times, history.pv, history.sp)
+
+
+def image(renderer):
+    renderer.needs_full_draw = True
+    renderer.redraw()
+    return np.asarray(renderer.canvas.buffer_rgba())[..., :3].copy()
+
+
+def run(method, args, t0_s):
+    history, t_new, pv_new, sp_new = make_history(args.amostras, t0_s)
+    renderer = new_renderer(args.largura, method)
+    start = time.perf_counter()
+    draw(renderer, history, method)
+    first = time.perf_counter() - start
+
+    frames = []
+    for k in range(args.quadros):
+        history.append(t_new[k], pv_new[k], sp_new[k])
+        start = time.perf_counter()
+        draw(renderer, history, method)
+        frames.append(time.perf_counter() - start)
+    points = len(renderer.pv_line.get_data()[0])
+    return first, float(np.median(frames)), points, image(renderer), renderer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da redução de pontos do gráfico.")
+    parser.add_argument("--amostras", type=int, default=1_000_000)
+    parser.add_argument("--largura", type=int, default=800, help="largura do gráfico em pixels")
+    parser.add_argument("--quadros", type=int, default=50)
+    args = parser.parse_args()
+    t0_s = 1.7e9
+
+    print(f"{args.amostras} amostras, gráfico de {args.largura} px\n")
+    print(f"  {'redução':12s} {'pontos':>9s} {'1º quadro':>12s} {'quadro típico':>15s} {'pixels diferentes':>19s}"
+          f" {'pico':>6s} {'degrau SP':>10s}")
+    reference = None
+    for method in (None, "minmax", "lttb"):
+        first, frame, points, img, renderer = run(method, args, t0_s)
+        if reference is None:
+            reference = img
+        diff = np.any(img != reference, axis=-1).mean()
+        _, pv = renderer.pv_line.get_data()
+        _, sp = renderer.sp_line.get_data()
+        peak = np.max(pv) >= 32.0
+        step = np.any(np.asarray(sp) == 25.0) and np.any(np.asarray(sp) == 26.5)
+        print(f"  {method or 'nenhuma':12s} {points:9d} {first * 1000:9.1f} ms {frame * 1000:12.2f} ms"
+              f" {diff * 100:17.2f}% {'ok' if peak else 'perdido':>6s} {'ok' if step else 'perdido':>10s}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# bench_relatorio_frota.py
+#
+# Gera um acervo sintético de logs CSV (Z zonas, cada uma com o log atual
+# e vários rotacionados, uma amostra a cada 5 s) e mede o relatório da
+# frota (relatorio_frota.py) com 1, 2, 4... processos até o número de
+# núcleos: tempo, vazão em MiB/s e ganho sobre 1 processo. Em acervos
+# pequenos o resultado é conferido contra relatorio.scan_stats.
+#
+# Uso: python bench_relatorio_frota.py [--mib 256] [--zonas 8] [--arquivo-mib 32] [--pasta DIR]
+#      (--mib 10240 para o acervo de 10 GB; --pasta reaproveita um acervo já gerado)
+
+import argparse
+import math
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from registro_log import LOG_HEADER, rotated_name
+from relatorio import ReportStats, scan_stats
+from relatorio_frota import discover, run_fleet_report
+
+PASSO_S = 5
+LINHAS_POR_DIA = 86400 // PASSO_S
+# Acima deste tamanho a conferência linha a linha demora demais
+CONFERENCIA_MAX_MIB = 64
+
+
+def day_lines(day, zone, index):
+    """Linhas de um dia de log (bytes), já formatadas como registro_log.format_row."""
+    date = day.strftime('%d/%m/%Y')
+    lines = []
+    for i in range(LINHAS_POR_DIA):
+        s = i * PASSO_S
+        pv = 25.0 + 2.0 * math.sin((index + i) / 50.0) + zone * 0.1
+        lines.append(f"{date} {s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d},{pv:.2f},25.0,{int(pv < 25.0)}\n")
+    return "".join(lines).encode("ascii")
+
+
+def write_corpus(folder, total_mib, zonas, file_mib, t0):
+    """Grava o acervo; devolve o período coberto (início, fim)."""
+    zone_bytes = total_mib * 2**20 // zonas
+    header = (",".join(LOG_HEADER) + "\n").encode("utf-8")
+    end = t0
+    for z in range(1, zonas + 1):
+        current = os.path.join(folder, f"log_estufa_{z}.csv")
+        written, day, index = 0, t0, 0
+        while written < zone_bytes:
+            f = open(current, "wb")
+            f.write(header)
+            size = 0
+            while size < file_mib * 2**20 and written + size < zone_bytes:
+                size += f.write(day_lines(day, z, index))
+                day += timedelta(days=1)
+                index += LINHAS_POR_DIA
+            f.close()
+            written += size
+            if written < zone_bytes:
+                os.replace(current, rotated_name(current, day))
+        end = max(end, day)
+    return t0, end
+
+
+def reference(zones, start, end):
+    result = {}
+    for zone, files in zones.items():
+        stats = ReportStats()
+        for path in files:
+            stats.merge(scan_stats(path, start, end))
+        result[zone] = stats
+    return result
+
+
+def same(a, b):
+    return (a.count == b.count and math.isclose(a.sum, b.sum, rel_tol=1e-6)
+            and math.isclose(a.time_on, b.time_on) and math.isclose(a.time_total, b.time_total)
+            and math.isclose(a.min, b.min, abs_tol=1e-4) and math.isclose(a.max, b.max, abs_tol=1e-4))
+
+
+def run(folder, args):
+    t0 = datetime(2024, 1, 1)
+    if not os.listdir(folder):
+        print(f"Gerando {args.mib} MiB em {args.zonas} zonas...")
+        first, last = write_corpus(folder, args.mib, args.zonas, args.arquivo_mib, t0)
+    else:
+        first, last = t0, t0 + timedelta(days=3650)
+    zones = discover([folder])
+    # Janela: o acervo inteiro menos o primeiro e o último dia (acervo reaproveitado: do 2º dia em diante)
+    start, end = first + timedelta(days=1), last - timedelta(days=1)
+    size = sum(os.path.getsize(p) for files in zones.values() for p in files)
+    print(f"Acervo: {len(zones)} zonas, {sum(map(len, zones.values()))} arquivos, {size / 2**20:.0f} MiB; "
+          f"{os.cpu_count()} núcleo(s)\n")
+
+    counts = []
+    workers = 1
+    while workers <= max(args.max_workers, 1):
+        counts.append(workers)
+        workers *= 2
+    base = None
+    for workers in counts:
+        report = run_fleet_report(zones, start, end, workers)
+        base = base or report.elapsed_s
+        print(f"  {workers:3d} processo(s) {report.elapsed_s:8.2f} s {report.bytes_scanned / 2**20 / report.elapsed_s:8.0f} MiB/s"
+              f" {base / report.elapsed_s:6.2f}x")
+
+    print(f"\n  frota: {report.fleet.count} amostras, média {report.fleet.mean:.2f} °C, "
+          f"ciclo {report.fleet.duty_cycle * 100:.1f}%")
+    if size <= CONFERENCIA_MAX_MIB * 2**20:
+        ref = reference(zones, start, end)
+        ok = all(same(report.zones[z], ref[z]) for z in zones)
+        print(f"  conferência com scan_stats: {'ok' if ok else 'DIVERGENTE'}")
+        if not ok:
+            raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do relatório da frota em paralelo.")
+    parser.add_argument("--mib", type=int, default=256, help="tamanho total do acervo")
+    parser.add_argument("--zonas", type=int, default=8)
+    parser.add_argument("--arquivo-mib", type=int, default=32, help="tamanho de cada arquivo antes da rotação")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--pasta", help="pasta do acervo (mantida entre execuções)")
+    args = parser.parse_args()
+
+    if args.pasta:
+        os.makedirs(args.pasta, exist_ok=True)
+        run(args.pasta, args)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            run(tmp, args)
+
+
+if __name__ == "__main__":
+    main()
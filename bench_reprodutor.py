@@ -0,0 +1,78 @@
+# bench_reprodutor.py
+#
+# Mede o reprodutor de logs (reprodutor_log.LogReplayer) publicando num
+# DataBank local (sem TCP), para isolar o ritmo da reprodução: gera logs de
+# Z zonas (uma amostra a cada 5 s, com os arquivos rotacionados) e reproduz
+# cada velocidade pelo tempo pedido, informando amostras publicadas x
+# esperadas, atraso de publicação (médio e máximo), desvio do relógio do log
+# em relação ao ideal (em tempo real; até um passo do log dividido pela
+# velocidade é esperado, pois a última amostra publicada antecede o
+# relógio) e o crescimento da memória residente (que deve depender do
+# número de zonas, não do tamanho dos logs).
+#
+# Uso: python bench_reprodutor.py [--zonas 50] [--mib 200] [--velocidades 1 10 100 1000] [--duracao 5]
+
+import argparse
+import resource
+import tempfile
+import time
+from datetime import datetime
+
+from pyModbusTCP.server import DataBank
+
+from bench_relatorio_frota import PASSO_S, write_corpus
+from reprodutor_log import LogReplayer, replay_zones
+
+
+def rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(zones, speed, duracao):
+    bank = DataBank()
+    rss_before = rss_mib()
+    replayer = LogReplayer(bank, zones, speed)
+    t0_log = min(s.next_time for s in replayer.streams)
+    start = time.monotonic()
+    replayer.run(duracao)
+    elapsed = time.monotonic() - start
+
+    # Relógio do log alcançado (última amostra publicada) x o ideal para o tempo decorrido
+    reached = max(s.last_time for s in replayer.streams if s.last_time is not None)
+    drift_s = ((reached - t0_log) - elapsed * speed) / speed
+    expected = len(zones) * elapsed * speed / PASSO_S
+    return {
+        "velocidade": speed,
+        "consumidas": sum(s.consumed for s in replayer.streams),
+        "esperadas": expected,
+        "publicadas": replayer.published,
+        "atraso_medio_ms": replayer.lag_mean_s * 1000,
+        "atraso_max_ms": replayer.lag_max_s * 1000,
+        "desvio_ms": drift_s * 1000,
+        "rss_mib": rss_mib() - rss_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do reprodutor de logs.")
+    parser.add_argument("--zonas", type=int, default=50)
+    parser.add_argument("--mib", type=int, default=200, help="tamanho total dos logs gerados")
+    parser.add_argument("--velocidades", type=float, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--duracao", type=float, default=5.0, help="segundos de reprodução por velocidade")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_corpus(tmp, args.mib, args.zonas, 32, datetime(2024, 1, 1))
+        zones = replay_zones([tmp])
+        print(f"{len(zones)} zonas, {args.mib} MiB de logs; {args.duracao:g} s por velocidade\n")
+        print(f"  {'vel.':>6s} {'consumidas':>11s} {'esperadas':>10s} {'publicadas':>11s} {'atraso méd.':>12s}"
+              f" {'atraso máx.':>12s} {'desvio relógio':>15s} {'RSS +':>9s}")
+        for speed in args.velocidades:
+            r = run(zones, speed, args.duracao)
+            print(f"  {speed:5g}x {r['consumidas']:11d} {r['esperadas']:10.0f} {r['publicadas']:11d}"
+                  f" {r['atraso_medio_ms']:9.2f} ms {r['atraso_max_ms']:9.2f} ms {r['desvio_ms']:12.1f} ms"
+                  f" {r['rss_mib']:5.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# bench_servidor_async.py
+#
+# Compara os dois servidores Modbus do simulador (simulador_contemp.py
+# --servidor thread|async) com um número crescente de conexões: M clientes
+# ativos no padrão do painel (bench_servidor_modbus.LoadClient) mais
+# conexões ociosas até o total pedido. Para cada total, informa vazão,
+# latência p50/p99, erros, CPU, threads e memória do servidor e o tempo
+# para abrir as conexões ociosas.
+#
+# Uso: python bench_servidor_async.py [--conexoes 10 100 1000] [--clientes 8] [--duracao 5]
+
+import argparse
+
+from bench_servidor_modbus import run_benchmark
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor Modbus com threads x asyncio.")
+    parser.add_argument("--conexoes", type=int, nargs="+", default=[10, 100, 1000],
+                        help="total de conexões abertas (ativas + ociosas)")
+    parser.add_argument("--clientes", type=int, default=8, help="clientes ativos")
+    parser.add_argument("--duracao", type=float, default=5.0)
+    parser.add_argument("--zonas", type=int, default=20)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=15024)
+    args = parser.parse_args()
+
+    print(f"{args.clientes} clientes ativos, {args.zonas} zonas, {args.duracao:g} s por medição\n")
+    print(f"  {'conexões':>8s} {'servidor':>8s} {'ops/s':>9s} {'p50':>9s} {'p99':>9s} {'erros':>6s}"
+          f" {'CPU':>6s} {'threads':>8s} {'RSS':>9s} {'conectar':>9s}")
+    for total in args.conexoes:
+        for servidor in ("thread", "async"):
+            r = run_benchmark(args.clientes, args.duracao, args.zonas, args.host, args.port,
+                              servidor=servidor, ociosas=max(0, total - args.clientes))
+            t = r["total"]
+            print(f"  {total:8d} {servidor:>8s} {t['vazao_ops_s']:9.0f} {t['p50_ms']:6.2f} ms {t['p99_ms']:6.2f} ms"
+                  f" {t['erros']:6d} {r['cpu_servidor_pct']:5.0f}% {r['threads_servidor']:8d}"
+                  f" {r['rss_servidor_mib']:5.1f} MiB {r['tempo_conexao_ociosas_s']:7.1f} s")
+
+
+if __name__ == "__main__":
+    main()
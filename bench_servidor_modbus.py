@@ -0,0 +1,285 @@
+# bench_servidor_modbus.py
+#
+# Gerador de carga e benchmark de latência contra o servidor Modbus do
+# simulador. Sobe o simulador numa porta local, roda M clientes
+# concorrentes reproduzindo o padrão do painel (leituras em bloco de 6
+# registros, escritas de setpoint e de intervalo) e mede vazão, latência
+# (p50/p95/p99), taxa de erros, CPU, threads e memória do servidor. Com
+# --ociosas, N conexões extras ficam abertas sem tráfego durante a medição;
+# --servidor escolhe o servidor do simulador (thread ou async). O resultado
+# é salvo em JSON; com --comparar, aponta regressões em relação a uma
+# execução anterior.
+#
+# Uso: python bench_servidor_modbus.py --clientes 16 --duracao 10 --servidor async --saida bench.json
+
+import argparse
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+from pyModbusTCP.client import ModbusClient
+
+NUM_REGS_ZONA = 6
+REG_SETPOINT_REL = 0
+REG_INTERVALO_REL = 5
+
+# Mistura padrão de operações (frações)
+FRACAO_ESCRITA_SP = 0.08
+FRACAO_ESCRITA_INTERVALO = 0.02
+
+# Limites para acusar regressão no --comparar
+REGRESSAO_VAZAO = 0.15   # queda relativa de vazão
+REGRESSAO_P99 = 0.25     # aumento relativo do p99
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _proc_cpu_seconds(pid):
+    """CPU (usuário + sistema) consumida por um processo, via /proc (Linux)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _proc_status(pid):
+    """Threads e memória residente (MiB) de um processo, via /proc (Linux)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["Threads"]), int(fields["VmRSS"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def open_idle_connections(host, port, count, timeout=10.0):
+    """Abre `count` conexões TCP que ficam ociosas (painéis/gravadores parados, só conectados)."""
+    socks = []
+    for _ in range(count):
+        sock = socket.create_connection((host, port), timeout=timeout)
+        socks.append(sock)
+    return socks
+
+
+def server_command(host, port, zonas, servidor="thread"):
+    """Linha de comando do servidor a testar (o simulador)."""
+    return [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulador_contemp.py"),
+            "--host", host, "--port", str(port), "--zonas", str(zonas), "--quiet", "--servidor", servidor]
+
+
+def start_server(cmd, host, port, timeout=10.0):
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    probe = ModbusClient(host=host, port=port, timeout=0.5)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Servidor terminou ao iniciar: {proc.stderr.read().decode(errors='replace')}")
+        if probe.open():
+            probe.close()
+            return proc
+        time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("Servidor não respondeu a tempo.")
+
+
+def stop_server(proc):
+    proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+class LoadClient(threading.Thread):
+    """Um cliente do painel: conexão própria, operações em sequência o mais rápido possível."""
+    def __init__(self, host, port, zonas, stop_event, seed, rate_hz=None):
+        super().__init__(daemon=True)
+        self.client = ModbusClient(host=host, port=port, auto_open=True, timeout=2.0)
+        self.zonas = zonas
+        self.stop_event = stop_event
+        self.rng = random.Random(seed)
+        self.period = 1.0 / rate_hz if rate_hz else 0.0
+        self.latencies = {"leitura": [], "escrita_sp": [], "escrita_intervalo": []}
+        self.errors = {"leitura": 0, "escrita_sp": 0, "escrita_intervalo": 0}
+
+    def run(self):
+        next_t = time.perf_counter()
+        while not self.stop_event.is_set():
+            offset = 10 * self.rng.randrange(self.zonas)
+            op = self.rng.random()
+            start = time.perf_counter()
+            if op < FRACAO_ESCRITA_INTERVALO:
+                kind = "escrita_intervalo"
+                ok = self.client.write_single_register(offset + REG_INTERVALO_REL, 5)
+            elif op < FRACAO_ESCRITA_INTERVALO + FRACAO_ESCRITA_SP:
+                kind = "escrita_sp"
+                ok = self.client.write_single_register(offset + REG_SETPOINT_REL, self.rng.randint(200, 300))
+            else:
+                kind = "leitura"
+                regs = self.client.read_holding_registers(offset, NUM_REGS_ZONA)
+                ok = regs is not None and len(regs) == NUM_REGS_ZONA
+            elapsed = time.perf_counter() - start
+            if ok:
+                self.latencies[kind].append(elapsed)
+            else:
+                self.errors[kind] += 1
+            if self.period:
+                next_t += self.period
+                delay = next_t - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        self.client.close()
+
+
+def summarize(latencies, errors, duration_s):
+    lat = sorted(latencies)
+    total = len(lat) + errors
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        "operacoes": total,
+        "vazao_ops_s": round(len(lat) / duration_s, 1),
+        "erros": errors,
+        "taxa_erros": round(errors / total, 5) if total else 0.0,
+        "p50_ms": ms(percentile(lat, 50)),
+        "p95_ms": ms(percentile(lat, 95)),
+        "p99_ms": ms(percentile(lat, 99)),
+        "max_ms": ms(lat[-1] if lat else None),
+    }
+
+
+def run_benchmark(clientes, duracao, zonas, host, port, rate_hz=None, seed=0, servidor="thread", ociosas=0):
+    cmd = server_command(host, port, zonas, servidor)
+    proc = start_server(cmd, host, port)
+    idle = []
+    try:
+        connect_start = time.perf_counter()
+        idle = open_idle_connections(host, port, ociosas)
+        connect_s = time.perf_counter() - connect_start
+        stop_event = threading.Event()
+        clients = [LoadClient(host, port, zonas, stop_event, seed + i, rate_hz) for i in range(clientes)]
+        cpu_start = _proc_cpu_seconds(proc.pid)
+        wall_start = time.perf_counter()
+        for c in clients:
+            c.start()
+        time.sleep(duracao)
+        threads, rss_mib = _proc_status(proc.pid)
+        stop_event.set()
+        for c in clients:
+            c.join(timeout=5)
+        wall = time.perf_counter() - wall_start
+        cpu_end = _proc_cpu_seconds(proc.pid)
+    finally:
+        for sock in idle:
+            sock.close()
+        stop_server(proc)
+
+    result = {"por_operacao": {}}
+    all_lat, all_err = [], 0
+    for kind in ("leitura", "escrita_sp", "escrita_intervalo"):
+        lat = [v for c in clients for v in c.latencies[kind]]
+        err = sum(c.errors[kind] for c in clients)
+        result["por_operacao"][kind] = summarize(lat, err, wall)
+        all_lat.extend(lat)
+        all_err += err
+    result["total"] = summarize(all_lat, all_err, wall)
+    if cpu_start is not None and cpu_end is not None:
+        result["cpu_servidor_pct"] = round((cpu_end - cpu_start) / wall * 100, 1)
+    else:
+        result["cpu_servidor_pct"] = None
+    result["threads_servidor"] = threads
+    result["tempo_conexao_ociosas_s"] = round(connect_s, 2)
+    result["rss_servidor_mib"] = round(rss_mib, 1) if rss_mib is not None else None
+    result["parametros"] = {"clientes": clientes, "duracao_s": duracao, "zonas": zonas,
+                            "taxa_por_cliente_hz": rate_hz, "servidor": servidor, "conexoes_ociosas": ociosas}
+    return result
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current, previous_path):
+    """Compara com um JSON anterior; devolve a lista de regressões encontradas."""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    regressions = []
+    cur, prev = current["total"], previous["total"]
+    if prev["vazao_ops_s"] and cur["vazao_ops_s"] < prev["vazao_ops_s"] * (1 - REGRESSAO_VAZAO):
+        regressions.append(f"vazão caiu de {prev['vazao_ops_s']} para {cur['vazao_ops_s']} ops/s")
+    if prev["p99_ms"] and cur["p99_ms"] and cur["p99_ms"] > prev["p99_ms"] * (1 + REGRESSAO_P99):
+        regressions.append(f"p99 subiu de {prev['p99_ms']} para {cur['p99_ms']} ms")
+    if cur["taxa_erros"] > prev["taxa_erros"]:
+        regressions.append(f"taxa de erros subiu de {prev['taxa_erros']} para {cur['taxa_erros']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga do servidor Modbus do simulador.")
+    parser.add_argument("--clientes", type=int, default=8, help="clientes concorrentes (M)")
+    parser.add_argument("--duracao", type=float, default=10.0, help="duração da medição (s)")
+    parser.add_argument("--zonas", type=int, default=20)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=15020)
+    parser.add_argument("--taxa", type=float, default=None, help="operações/s por cliente (padrão: sem limite)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--servidor", choices=("thread", "async"), default="thread",
+                        help="servidor do simulador a testar (simulador_contemp.py --servidor)")
+    parser.add_argument("--ociosas", type=int, default=0, help="conexões extras abertas e ociosas durante a medição")
+    parser.add_argument("--saida", default=None, help="arquivo JSON de resultado")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.clientes, args.duracao, args.zonas, args.host, args.port, args.taxa, args.seed,
+                           args.servidor, args.ociosas)
+    result["quando"] = datetime.now().isoformat(timespec="seconds")
+    result["revisao"] = _git_revision()
+    result["plataforma"] = {"python": platform.python_version(), "sistema": platform.platform(),
+                            "cpus": os.cpu_count()}
+
+    total = result["total"]
+    print(f"Servidor: {args.servidor} | clientes: {args.clientes} (+{args.ociosas} ociosas) | zonas: {args.zonas}"
+          f" | {args.duracao:g} s")
+    print(f"Vazão: {total['vazao_ops_s']} ops/s | erros: {total['erros']} ({total['taxa_erros'] * 100:.2f}%)"
+          f" | CPU do servidor: {result['cpu_servidor_pct']}% | threads: {result['threads_servidor']}"
+          f" | RSS: {result['rss_servidor_mib']} MiB")
+    for kind, s in result["por_operacao"].items():
+        print(f"  {kind:<18} p50 {s['p50_ms']} ms | p95 {s['p95_ms']} ms | p99 {s['p99_ms']} ms"
+              f" | {s['vazao_ops_s']} ops/s")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"Resultado salvo em {args.saida}")
+
+    if args.comparar:
+        regressions = compare(result, args.comparar)
+        for r in regressions:
+            print(f"REGRESSÃO: {r}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
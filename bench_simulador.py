@@ -0,0 +1,74 @@
+# bench_simulador.py
+#
+# Mede o tempo de um passo (tick) do simulador para diferentes números de zonas,
+# comparando o motor vetorizado (GreenhouseBatchEngine) com a abordagem antiga
+# de um objeto por zona com leituras/escritas individuais no DataBank.
+#
+# Uso: python bench_simulador.py
+
+import time
+import random
+from pyModbusTCP.server import DataBank
+
+from simulador_contemp import GreenhouseBatchEngine, NUM_REGS_ZONA, SimulatorDataBank, TEMP_AMBIENTE
+
+TAMANHOS = [10, 1_000, 10_000]
+REPETICOES = 20
+
+
+class _ZonaEscalar:
+    """Reprodução do antigo GreenhouseSimulator.update (sem o print), para comparação."""
+    def __init__(self, datobank, offset, temp, taxa_perda, taxa_aquecimento):
+        self.datobank = datobank
+        self.offset = offset
+        self.temperatura_atual = temp
+        self.taxa_perda_calor = taxa_perda
+        self.taxa_aquecimento = taxa_aquecimento
+        self.datobank.set_holding_registers(offset, [250, int(temp * 10), 0, 10, 1, 5])
+
+    def update(self):
+        setpoint = self.datobank.get_holding_registers(self.offset + 0, 1)[0] / 10.0
+        histerese = self.datobank.get_holding_registers(self.offset + 3, 1)[0] / 10.0
+        output_state = self.datobank.get_holding_registers(self.offset + 2, 1)[0]
+        if self.temperatura_atual < (setpoint - histerese):
+            new_output_state = 1
+        elif self.temperatura_atual > (setpoint + histerese):
+            new_output_state = 0
+        else:
+            new_output_state = output_state
+        self.temperatura_atual -= (self.temperatura_atual - TEMP_AMBIENTE) * self.taxa_perda_calor
+        if new_output_state == 1:
+            self.temperatura_atual += self.taxa_aquecimento
+        self.temperatura_atual += random.uniform(-0.05, 0.05)
+        self.datobank.set_holding_registers(self.offset + 1, [int(self.temperatura_atual * 10)])
+        self.datobank.set_holding_registers(self.offset + 2, [new_output_state])
+
+
+def _medir(func):
+    func()  # aquecimento
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        func()
+    return (time.perf_counter() - inicio) / REPETICOES
+
+
+def main():
+    print(f"{'Zonas':>8} | {'Escalar (ms/tick)':>18} | {'Vetorizado (ms/tick)':>21} | {'Ganho':>7}")
+    print("-" * 64)
+    for n in TAMANHOS:
+        # Layout compacto (6 registros por zona) para caber 10k zonas nos 65536 registros
+        offsets = [i * NUM_REGS_ZONA for i in range(n)]
+
+        bank_escalar = DataBank()
+        zonas = [_ZonaEscalar(bank_escalar, off, 20.0, 0.1, 0.2) for off in offsets]
+        t_escalar = _medir(lambda: [z.update() for z in zonas])
+
+        bank_vetor = SimulatorDataBank()
+        engine = GreenhouseBatchEngine(bank_vetor, offsets, 20.0, 0.1, 0.2, seed=0)
+        t_vetor = _medir(engine.step)
+
+        print(f"{n:>8} | {t_escalar * 1e3:>18.3f} | {t_vetor * 1e3:>21.3f} | {t_escalar / t_vetor:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+# cache_log.py
+
+import os
+import struct
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from relatorio import MAX_INTERVALO_S, ReportStats, TimestampParser, to_seconds
+
+# Memória máxima ocupada pelos logs interpretados em cache (bytes)
+ORCAMENTO_CACHE_BYTES = 256 * 1024 * 1024
+
+# Granularidade do índice gravado ao lado do log: um deslocamento por hora
+BALDE_INDICE_S = 3600
+
+# Tamanho dos blocos lidos ao interpretar o arquivo (bytes)
+TAMANHO_BLOCO = 8 << 20
+
+INDEX_EXT = ".idx"
+INDEX_MAGIC = b"CTIDX\x00\x01\x00"
+# Cabeçalho do índice: balde (s) e bytes do log já indexados (sempre linhas completas)
+_INDEX_HEADER = struct.Struct("<8sdq")
+INDEX_DTYPE = np.dtype([("t", "<f8"), ("offset", "<i8")])
+
+_EPOCH = datetime(1970, 1, 1)
+_DIGITOS = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15, 17, 18]
+_SEPARADORES = {2: ord("/"), 5: ord("/"), 10: ord(" "), 13: ord(":"), 16: ord(":")}
+
+
+def index_path(log_path):
+    return log_path + INDEX_EXT
+
+
+def _parse_times(stamps):
+    """Horários 'DD/MM/AAAA HH:MM:SS' (bytes) -> segundos, vetorizado; ValueError se algum for inválido."""
+    n = len(stamps)
+    if any(len(s) != 19 for s in stamps):
+        raise ValueError("Horário fora do formato DD/MM/AAAA HH:MM:SS no log.")
+    m = np.frombuffer(b"".join(stamps), dtype=np.uint8).reshape(n, 19)
+    for col, char in _SEPARADORES.items():
+        if (m[:, col] != char).any():
+            raise ValueError("Horário fora do formato DD/MM/AAAA HH:MM:SS no log.")
+    d = m.astype(np.int64) - ord("0")
+    if ((d[:, _DIGITOS] < 0) | (d[:, _DIGITOS] > 9)).any():
+        raise ValueError("Horário fora do formato DD/MM/AAAA HH:MM:SS no log.")
+    day = d[:, 0] * 10 + d[:, 1]
+    month = d[:, 3] * 10 + d[:, 4]
+    year = d[:, 6] * 1000 + d[:, 7] * 100 + d[:, 8] * 10 + d[:, 9]
+    hour = d[:, 11] * 10 + d[:, 12]
+    minute = d[:, 14] * 10 + d[:, 15]
+    second = d[:, 17] * 10 + d[:, 18]
+    if (hour > 23).any() or (minute > 59).any() or (second > 59).any():
+        raise ValueError("Horário inválido no log.")
+    # Poucos dias distintos por bloco: a data é convertida uma vez por dia
+    days, inverse = np.unique(year * 10000 + month * 100 + day, return_inverse=True)
+    base = np.array([(datetime(k // 10000, k // 100 % 100, k % 100) - _EPOCH).total_seconds()
+                     for k in days.tolist()])
+    return base[inverse] + hour * 3600 + minute * 60 + second
+
+
+def parse_block(data, base_offset=0):
+    """
+    Interpreta as linhas completas de um trecho do CSV (bytes). Devolve
+    (inícios das linhas no arquivo, t, pv, sp, saída, bytes consumidos); a
+    última linha, se incompleta, fica para a próxima leitura.
+    """
+    end = data.rfind(b"\n") + 1
+    empty = (np.empty(0, np.int64), np.empty(0), np.empty(0, np.float32),
+             np.empty(0, np.float32), np.empty(0, np.uint8), end)
+    if not end:
+        return empty
+    buf = np.frombuffer(data, dtype=np.uint8, count=end)
+    newlines = np.flatnonzero(buf == ord("\n"))
+    starts = np.concatenate(([0], newlines[:-1] + 1))
+    lengths = newlines - starts
+    lengths -= (lengths > 0) & (buf[np.maximum(newlines - 1, 0)] == ord("\r"))
+    starts = starts[lengths > 0]
+    lines = [line for line in data[:end].replace(b"\r", b"").split(b"\n") if line]
+    if not lines:
+        return empty
+
+    fields = b",".join(lines).split(b",")
+    if len(fields) != 4 * len(lines):
+        raise ValueError("Linha do log com número de colunas diferente de 4.")
+    t = _parse_times(fields[0::4])
+    pv = np.array(fields[1::4], dtype=np.float64)
+    sp = np.array(fields[2::4], dtype=np.float64)
+    out = np.array(fields[3::4], dtype=np.float64).astype(np.uint8)
+    return starts + base_offset, t, pv.astype(np.float32), sp.astype(np.float32), out, end
+
+
+class LogIndex:
+    """
+    Índice gravado ao lado do log (`<log>.idx`): para cada balde de tempo, o
+    deslocamento da primeira linha do balde. Permite abrir uma janela de um
+    log grande sem percorrê-lo desde o início. Só vale para logs em ordem
+    cronológica, como os gravados pelo painel.
+    """
+    def __init__(self, log_path, bucket_s=BALDE_INDICE_S):
+        self.log_path = log_path
+        self.bucket_s = bucket_s
+        self.entries = np.empty(0, dtype=INDEX_DTYPE)
+        self.covered = 0
+        self.dirty = False
+
+    @classmethod
+    def load(cls, log_path):
+        """Índice do arquivo, se existir e ainda corresponder ao log; senão None."""
+        path = index_path(log_path)
+        try:
+            with open(path, "rb") as f:
+                magic, bucket_s, covered = _INDEX_HEADER.unpack(f.read(_INDEX_HEADER.size))
+                entries = np.frombuffer(f.read(), dtype=INDEX_DTYPE).copy()
+        except (OSError, struct.error, ValueError):
+            return None
+        index = cls(log_path, bucket_s)
+        index.entries, index.covered = entries, covered
+        if magic != INDEX_MAGIC or not index._matches_log():
+            return None
+        return index
+
+    def _matches_log(self):
+        """Confere que o log não foi trocado ou reescrito desde a indexação."""
+        try:
+            if os.path.getsize(self.log_path) < self.covered:
+                return False
+            if not len(self.entries):
+                return True
+            with open(self.log_path, "rb") as f:
+                for entry in (self.entries[0], self.entries[-1]):
+                    f.seek(max(0, int(entry["offset"]) - 1))
+                    head = f.read(20 if entry["offset"] else 19)
+                    if entry["offset"] and head[:1] != b"\n":
+                        return False
+                    t = TimestampParser().seconds(head[-19:].decode("ascii"))
+                    if t - t % self.bucket_s != entry["t"]:
+                        return False
+        except (OSError, ValueError, UnicodeDecodeError):
+            return False
+        return True
+
+    def extend(self, starts, t, covered):
+        """Acrescenta as linhas interpretadas até o byte `covered`."""
+        if len(t):
+            buckets = t - t % self.bucket_s
+            last = self.entries["t"][-1] if len(self.entries) else -np.inf
+            new = np.flatnonzero(np.diff(buckets, prepend=last) > 0)
+            if len(new):
+                added = np.empty(len(new), dtype=INDEX_DTYPE)
+                added["t"], added["offset"] = buckets[new], starts[new]
+                self.entries = np.concatenate((self.entries, added))
+        if covered != self.covered:
+            self.covered = covered
+            self.dirty = True
+
+    def byte_range(self, start_s, end_s):
+        """
+        Trecho do arquivo que contém [start_s, end_s]: (início, fim ou None
+        para o fim do arquivo, horário inicial coberto, horário final coberto).
+        """
+        times = self.entries["t"]
+        i = max(0, int(np.searchsorted(times, start_s, side="right")) - 1)
+        j = int(np.searchsorted(times, end_s, side="right"))
+        t_lo = -np.inf if i == 0 else float(times[i])
+        if j >= len(times):
+            return int(self.entries["offset"][i]), None, t_lo, np.inf
+        return int(self.entries["offset"][i]), int(self.entries["offset"][j]), t_lo, float(times[j])
+
+    def save(self):
+        if not self.dirty:
+            return
+        path = index_path(self.log_path)
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_INDEX_HEADER.pack(INDEX_MAGIC, self.bucket_s, self.covered))
+                f.write(self.entries.tobytes())
+            os.replace(tmp, path)
+            self.dirty = False
+        except OSError:
+            # O índice é só uma otimização; sem permissão de escrita, segue sem ele
+            pass
+
+
+class ParsedLog:
+    """
+    Colunas interpretadas de um trecho do log CSV (bytes [lo, hi)), cobrindo
+    os horários [t_lo, t_hi). Um trecho que vai até o fim do arquivo cresce
+    com o log: `refresh` interpreta só as linhas acrescentadas.
+    """
+    def __init__(self, path, lo, t_lo=-np.inf, t_hi=np.inf):
+        self.path = path
+        self.lo = lo
+        self.hi = lo
+        self.t_lo = t_lo
+        self.t_hi = t_hi
+        self.to_eof = t_hi == np.inf
+        self.size = self.mtime = None
+        self._tail_check = b""
+        self.t = np.empty(0)
+        self.pv = self.sp = np.empty(0, np.float32)
+        self.out = np.empty(0, np.uint8)
+        self.monotonic = True
+
+    @property
+    def nbytes(self):
+        return self.t.nbytes + self.pv.nbytes + self.sp.nbytes + self.out.nbytes
+
+    def covers(self, start_s, end_s):
+        return self.t_lo <= start_s and end_s < self.t_hi
+
+    def _unchanged_prefix(self, f):
+        """O trecho já interpretado continua igual no disco (o arquivo só cresceu)?"""
+        f.seek(self.hi - len(self._tail_check))
+        return f.read(len(self._tail_check)) == self._tail_check
+
+    def load(self, f, hi=None, index=None):
+        """Interpreta o arquivo de `self.hi` até `hi` (ou o fim), em blocos."""
+        f.seek(self.hi)
+        parts = []
+        remaining = None if hi is None else hi - self.hi
+        pos = self.hi
+        pending = b""
+        while remaining is None or remaining > 0:
+            chunk = f.read(TAMANHO_BLOCO if remaining is None else min(TAMANHO_BLOCO, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            data = pending + chunk
+            starts, t, pv, sp, out, used = parse_block(data, pos)
+            pending = data[used:]
+            pos += used
+            if len(t):
+                parts.append((t, pv, sp, out))
+                if index is not None:
+                    index.extend(starts, t, pos)
+        if parts:
+            prev_last = self.t[-1:] if len(self.t) else np.empty(0)
+            self.t = np.concatenate([self.t] + [p[0] for p in parts])
+            self.pv = np.concatenate([self.pv] + [p[1] for p in parts])
+            self.sp = np.concatenate([self.sp] + [p[2] for p in parts])
+            self.out = np.concatenate([self.out] + [p[3] for p in parts])
+            new_t = np.concatenate([prev_last] + [p[0] for p in parts])
+            self.monotonic = self.monotonic and not (np.diff(new_t) < 0).any()
+        self.hi = pos
+        check = max(self.lo, self.hi - 64)
+        f.seek(check)
+        self._tail_check = f.read(self.hi - check)
+
+    def window(self, start_s, end_s):
+        """Fatia (ou máscara, se o log não estiver em ordem) das amostras em [start_s, end_s]."""
+        if self.monotonic:
+            return slice(int(np.searchsorted(self.t, start_s, side="left")),
+                         int(np.searchsorted(self.t, end_s, side="right")))
+        return (self.t >= start_s) & (self.t <= end_s)
+
+
+class ParsedLogCache:
+    """
+    Cache dos logs CSV interpretados, por caminho, validado por tamanho e
+    data de modificação, com descarte do menos usado acima de
+    `budget_bytes`. Se o arquivo só cresceu, apenas as linhas novas são
+    interpretadas. Na primeira abertura, o índice gravado ao lado do log
+    (LogIndex) leva direto ao trecho da janela pedida; sem índice, o
+    arquivo é lido uma vez e o índice é criado.
+    """
+    def __init__(self, budget_bytes=ORCAMENTO_CACHE_BYTES):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self.hits = self.tail_reads = self.window_reads = self.full_reads = 0
+
+    def _index_for(self, path):
+        index = self._indexes.get(path)
+        if index is None or not index._matches_log():
+            index = LogIndex.load(path)
+            if index is not None:
+                self._indexes[path] = index
+            else:
+                self._indexes.pop(path, None)
+        return index
+
+    def get(self, path, start_s, end_s):
+        """ParsedLog que cobre [start_s, end_s] (segundos, escala de relatorio.to_seconds)."""
+        with self._lock:
+            st = os.stat(path)
+            entry = self._entries.get(path)
+            with open(path, "rb") as f:
+                if entry is not None and (st.st_size, st.st_mtime_ns) == (entry.size, entry.mtime):
+                    self.hits += 1
+                elif entry is not None and st.st_size >= entry.hi and entry._unchanged_prefix(f):
+                    # O arquivo só cresceu: um trecho que vai até o fim lê apenas as linhas novas
+                    if entry.to_eof:
+                        index = self._indexes.get(path)
+                        entry.load(f, index=index if index is not None and index.covered == entry.hi else None)
+                        self.tail_reads += 1
+                    else:
+                        self.hits += 1
+                else:
+                    entry = None  # arquivo trocado ou reescrito (ex.: rotação)
+
+                if entry is None or not entry.covers(start_s, end_s):
+                    entry = self._load(f, path, st, start_s, end_s)
+                entry.size, entry.mtime = st.st_size, st.st_mtime_ns
+
+            index = self._indexes.get(path)
+            if index is not None:
+                if entry.monotonic:
+                    index.save()
+                else:
+                    # Horários fora de ordem (ex.: relógio ajustado): o índice não serve
+                    del self._indexes[path]
+                    try:
+                        os.remove(index_path(path))
+                    except OSError:
+                        pass
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            self._evict(keep=path)
+            return entry
+
+    def _load(self, f, path, st, start_s, end_s):
+        index = self._index_for(path)
+        if index is not None and len(index.entries):
+            # Estende o índice com o que o log ganhou desde a última indexação
+            if st.st_size > index.covered:
+                tail = ParsedLog(path, index.covered)
+                tail.load(f, index=index)
+            lo, hi, t_lo, t_hi = index.byte_range(start_s, end_s)
+            entry = ParsedLog(path, lo, t_lo, t_hi)
+            entry.load(f, hi)
+            self.window_reads += 1
+            return entry
+
+        # Sem índice: lê o arquivo inteiro uma vez e cria o índice
+        f.seek(0)
+        header = f.readline()
+        index = LogIndex(path)
+        entry = ParsedLog(path, len(header))
+        index.covered = len(header)
+        entry.load(f, index=index)
+        self._indexes[path] = index
+        self.full_reads += 1
+        return entry
+
+    def _evict(self, keep):
+        total = sum(e.nbytes for e in self._entries.values())
+        for path in list(self._entries):
+            if total <= self.budget_bytes:
+                break
+            if path == keep:
+                continue
+            total -= self._entries.pop(path).nbytes
+
+    def stats(self, path, start_time, end_time, max_gap_s=MAX_INTERVALO_S):
+        """Estatísticas do período (datetimes), como relatorio.compute_stats."""
+        start_s, end_s = to_seconds(start_time), to_seconds(end_time)
+        entry = self.get(path, start_s, end_s)
+        window = entry.window(start_s, end_s)
+        stats = ReportStats(max_gap_s)
+        stats.add_arrays(entry.t[window], entry.pv[window], entry.sp[window], entry.out[window])
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+
+
+# Cache compartilhado pelas janelas de relatório
+LOG_CACHE = ParsedLogCache()
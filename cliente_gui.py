@@ -3,24 +3,30 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkinter import filedialog
-from pyModbusTCP.client import ModbusClient
+import argparse
+import os
+import queue
 import threading
-from collections import deque
+import time
 import csv
-import os
 import webbrowser
-import tempfile
-from datetime import datetime
- 
-# --- Imports para o Gráfico ---
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.dates as mdates
-
-# --- Configurações do Cliente Modbus ---
-SERVER_HOST = "localhost"
-SERVER_PORT = 502
-CLIENT_ID = 1
+from datetime import datetime, timedelta
+
+from aquisicao import PollStatus, Sample, WindowStats, WriteResult
+from dispositivos import ConnectionPool, load_registry
+from excecao import SwingingDoorCompressor, add_filter_arguments, filter_config_from_args, make_stages
+from metricas import METRICS, MetricsServer, profile_event_loop
+from registro_log import LogManager
+# Histórico, agregados, log binário e redução (NumPy) são usados por todas as abas
+# desde a partida, então são importados aqui.
+from log_binario import BINARY_EXT
+from agregados import RollupStore, mean as rollup_mean, sp_mean as rollup_sp_mean, stats_from_rollup
+from historico import CAPACIDADE_PADRAO, ZoneHistory
+from reducao import METODO_PADRAO, METODOS_REDUCAO
+# matplotlib (gráficos) e os módulos de relatório/exportação são importados só
+# quando usados: o gráfico na primeira vez que uma aba aparece, os relatórios
+# ao abrir as janelas correspondentes. Com centenas de zonas, a maioria das
+# abas nunca chega a ser aberta.
 
 # --- Definições de Registros (relativos ao offset) ---
 REG_SETPOINT_REL = 0
@@ -28,15 +34,33 @@ REG_PV_REL = 1
 REG_OUTPUT_REL = 2
 REG_INTERVALO_REL = 5
 
+# Período com que a interface esvazia a fila de eventos da aquisição
+INTERVALO_QUADRO_MS = 100
+
+# Janelas do gráfico; além do "ao vivo", são respondidas pelos agregados (agregados.py)
+JANELAS_GRAFICO = {"Ao vivo": None, "1 hora": 3600, "24 horas": 86400, "7 dias": 7 * 86400, "30 dias": 30 * 86400}
+
+# Período de atualização das janelas de equipamentos e de métricas
+INTERVALO_EQUIPAMENTOS_MS = 1000
+
+# Relatórios com intervalo a partir deste tamanho usam os agregados, se existirem
+MIN_INTERVALO_RELATORIO_AGREGADO_S = 2 * 86400
+
+# Opções de exportação da janela de relatório (exportacao.MODOS_EXPORTACAO, sem importar o módulo)
+MODO_EXPORTACAO_PADRAO = "Detalhado"
+
 class ControllerTab(ttk.Frame):
     """
     Representa uma única aba na interface, controlando um simulador de estufa.
     """
-    def __init__(self, parent, client, name, register_offset):
+    def __init__(self, parent, pool, log_manager, device, filter_config=None, history_points=CAPACIDADE_PADRAO,
+                 plot_reduction=METODO_PADRAO):
         super().__init__(parent)
-        self.client = client
-        self.name = name
-        self.register_offset = register_offset
+        self.pool = pool
+        self.log_manager = log_manager
+        self.device = device
+        self.name = device.name
+        self.register_offset = device.offset
 
         # --- Variáveis de Controle do Tkinter ---
         self.pv_var = tk.StringVar(value="-- °C")
@@ -48,12 +72,21 @@ class ControllerTab(ttk.Frame):
         # --- Controle de Log ---
         self.is_logging = False
         self.log_filepath = None
+        self.log = None
+
+        # --- Relatório por exceção (excecao.py): filtro na entrada e compressão opcional do log ---
+        self.filter_config = filter_config
+        self.deadband, self.compressor = make_stages(filter_config)
 
         # --- Armazenamento de dados para o gráfico ---
-        self.MAX_POINTS = 50
-        self.pv_history = deque(maxlen=self.MAX_POINTS)
-        self.sp_history = deque(maxlen=self.MAX_POINTS)
-        self.time_steps = deque(maxlen=self.MAX_POINTS)
+        self.history = ZoneHistory(history_points)
+        self.plot_reduction = plot_reduction
+        # Figura e canvas só são criados quando a aba aparece pela primeira vez (ensure_plot)
+        self.fig = self.ax = self.canvas = self.renderer = None
+
+        # Agregados por resolução para janelas longas (em memória até o log ser iniciado)
+        self.rollup = RollupStore()
+        self.plot_window_var = tk.StringVar(value="Ao vivo")
 
         self.create_widgets()
 
@@ -63,7 +96,7 @@ class ControllerTab(ttk.Frame):
         control_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10), pady=5)
 
         # Frame do gráfico (à direita)
-        graph_frame = ttk.LabelFrame(self, text=f"Histórico - {self.name}", padding="10")
+        self.graph_frame = graph_frame = ttk.LabelFrame(self, text=f"Histórico - {self.name}", padding="10")
         graph_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, pady=5)
 
         # --- Display de Dados ---
@@ -89,11 +122,32 @@ class ControllerTab(ttk.Frame):
         report_button.grid(row=11, column=0, pady=(10, 0), sticky="ew")
 
         # --- Gráfico ---
-        self.fig = Figure(figsize=(5, 4), dpi=100)
-        self.ax = self.fig.add_subplot(111)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=graph_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        self.fig.tight_layout()
+        window_frame = ttk.Frame(graph_frame)
+        window_frame.pack(fill=tk.X)
+        ttk.Label(window_frame, text="Janela:").pack(side=tk.LEFT)
+        window_combo = ttk.Combobox(window_frame, textvariable=self.plot_window_var,
+                                    values=list(JANELAS_GRAFICO.keys()), state="readonly", width=12)
+        window_combo.pack(side=tk.LEFT, padx=5)
+        window_combo.bind("<<ComboboxSelected>>", self._on_plot_window_changed)
+
+        # Abas ocultas não são redesenhadas; ao aparecer, o gráfico é criado (se preciso) e redesenhado
+        self.bind("<Map>", self._on_shown)
+
+    def ensure_plot(self):
+        """Cria a figura, o canvas e o renderizador do gráfico, se ainda não existirem."""
+        if self.renderer is not None:
+            return
+        with METRICS.timer("plot_build_seconds", "Tempo de criação do gráfico de uma aba"):
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            from grafico import TrendPlotRenderer
+
+            self.fig = Figure(figsize=(5, 4), dpi=100)
+            self.ax = self.fig.add_subplot(111)
+            self.canvas = FigureCanvasTkAgg(self.fig, master=self.graph_frame)
+            self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            self.fig.tight_layout()
+            self.renderer = TrendPlotRenderer(self.fig, self.ax, self.canvas, self.plot_reduction)
 
     def update_display(self, regs, current_time):
         """Atualiza a interface da aba com novos dados."""
@@ -104,13 +158,16 @@ class ControllerTab(ttk.Frame):
         pv = regs[REG_PV_REL] / 10.0
         output_state = regs[REG_OUTPUT_REL]
 
+        # Os agregados recebem todas as amostras; exibição, gráfico e log só as que passam no filtro
+        self.rollup.add(current_time, pv, sp, output_state)
+        if self.deadband is not None and not self.deadband.accept(current_time, pv, sp, output_state):
+            return
+
         self.sp_var.set(f"{sp:.1f} °C")
         self.pv_var.set(f"{pv:.1f} °C")
         self.output_var.set("LIGADA" if output_state == 1 else "DESLIGADA")
 
-        self.pv_history.append(pv)
-        self.sp_history.append(sp)
-        self.time_steps.append(current_time)
+        self.history.append_datetime(current_time, pv, sp, output_state)
 
         self.update_plot()
 
@@ -118,30 +175,47 @@ class ControllerTab(ttk.Frame):
             self.append_to_log(current_time, pv, sp, output_state)
 
     def update_plot(self):
-        self.ax.clear()
-        self.ax.plot(self.time_steps, self.pv_history, marker='o', linestyle='-', markersize=4, label='Temperatura (PV)')
-        self.ax.plot(self.time_steps, self.sp_history, linestyle='--', color='r', label='Setpoint (SP)')
-        self.ax.set_title("Histórico de Temperatura")
-        self.ax.set_xlabel("Horário")
-        self.ax.set_ylabel("Temperatura (°C)")
-        self.ax.grid(True)
-        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
-        self.fig.autofmt_xdate()
-        self.ax.legend()
-        self.canvas.draw()
+        if self.renderer is None:
+            return  # a aba nunca foi exibida; o histórico segue acumulando
+        if not self.winfo_ismapped():
+            self.renderer.needs_full_draw = True
+            return
+        with METRICS.timer("render_seconds", "Tempo de atualização do gráfico de uma aba"):
+            self._render_plot()
+
+    def _render_plot(self):
+        window_s = JANELAS_GRAFICO[self.plot_window_var.get()]
+        if window_s is None or not len(self.history):
+            self.renderer.update_seconds(self.history.times, self.history.pv, self.history.sp)
+            return
+        # Janelas longas: médias da resolução adequada, sem tocar nos dados brutos
+        end = self.history.last_datetime()
+        _, records = self.rollup.query(end - timedelta(seconds=window_s), end, allow_raw=False)
+        self.renderer.update(RollupStore.times(records), rollup_mean(records), rollup_sp_mean(records))
+
+    def _on_plot_window_changed(self, event=None):
+        if self.renderer is not None:
+            self.renderer.needs_full_draw = True
+        self.update_plot()
+
+    def _on_shown(self, event):
+        if event.widget is not self:
+            return
+        self.ensure_plot()
+        if self.renderer.needs_full_draw and len(self.history):
+            self.update_plot()
 
     def write_new_setpoint(self):
         try:
             sp_value = float(self.new_sp_var.get().replace(',', '.'))
             sp_register_value = int(sp_value * 10)
-            reg_addr = self.register_offset + REG_SETPOINT_REL
-            threading.Thread(target=self._write_task, args=(reg_addr, sp_register_value)).start()
+            self.pool.write(self.device, REG_SETPOINT_REL, sp_register_value, on_done=self._on_setpoint_written)
         except ValueError:
             messagebox.showerror("Erro de Entrada", "Por favor, insira um valor numérico válido.")
             self.new_sp_var.set("")
 
-    def _write_task(self, address, value):
-        if self.client.write_single_register(address, value):
+    def _on_setpoint_written(self, ok):
+        if ok:
             self.new_sp_var.set("")
         else:
             messagebox.showerror("Erro de Escrita", f"Falha ao atualizar Setpoint para {self.name}")
@@ -149,54 +223,75 @@ class ControllerTab(ttk.Frame):
     def toggle_logging(self):
         if self.is_logging:
             self.is_logging = False
+            self._flush_compressor()
+            self.log.close()
+            self.log = None
+            self.rollup.close()
+            self.rollup = RollupStore()
             self.log_button.config(text="Iniciar Log")
             self.logging_status_var.set("Log: Inativo")
         else:
             filepath = filedialog.asksaveasfilename(
                 defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv")],
+                filetypes=[("CSV files", "*.csv"), ("Log binário", f"*{BINARY_EXT}")],
                 title=f"Salvar log para {self.name}",
                 initialfile=f"log_{self.name.replace(' ', '_').lower()}.csv"
             )
             if not filepath: return
-            
+
+            try:
+                # Mantém o arquivo aberto; as linhas são gravadas em lote pela thread do LogManager
+                self.log = self.log_manager.open(filepath)
+            except IOError as e:
+                messagebox.showerror("Erro de Arquivo", f"Não foi possível criar o arquivo de log:\n{e}")
+                return
+
+            # Os agregados passam a ser gravados ao lado do log
+            self.rollup.close()
+            self.rollup = RollupStore(filepath)
+
+            if self.compressor is not None:
+                self.compressor = SwingingDoorCompressor(self.filter_config.compression, self.filter_config.heartbeat_s)
             self.log_filepath = filepath
             self.is_logging = True
             self.log_button.config(text="Parar Log")
             self.logging_status_var.set(f"Log: {self.log_filepath.split('/')[-1]}")
-            try:
-                # Verifica se o arquivo já existe e não está vazio
-                file_exists = os.path.isfile(self.log_filepath) and os.path.getsize(self.log_filepath) > 0
-                
-                # Abre o arquivo em modo de 'append' (adicionar ao final)
-                with open(self.log_filepath, 'a', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.writer(csvfile)
-                    if not file_exists: # Só escreve o cabeçalho se o arquivo for novo
-                        writer.writerow(['Horário', 'Temperatura (°C)', 'Setpoint (°C)', 'Saida (0=OFF, 1=ON)'])
-            except IOError as e:
-                messagebox.showerror("Erro de Arquivo", f"Não foi possível criar o arquivo de log:\n{e}")
-                self.is_logging = False
 
     def append_to_log(self, time, pv, sp, output_state):
-        try:
-            with open(self.log_filepath, 'a', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow([time.strftime('%d/%m/%Y %H:%M:%S'), f"{pv:.2f}", f"{sp:.1f}", output_state])
-        except IOError as e:
-            print(f"Erro de log para {self.name}: {e}")
+        with METRICS.timer("log_append_seconds", "Tempo de enfileiramento de uma linha de log"):
+            if self.compressor is None:
+                self.log.append(time, pv, sp, output_state)
+            else:
+                for row in self.compressor.add(time, pv, sp, output_state):
+                    self.log.append(*row)
+
+    def _flush_compressor(self):
+        if self.compressor is not None:
+            for row in self.compressor.flush():
+                self.log.append(*row)
+
+    def close(self):
+        """Persiste o período em aberto dos agregados e do log comprimido (chamado ao fechar a aplicação)."""
+        if self.is_logging:
+            self._flush_compressor()
+        self.rollup.close()
 
     def open_report_window(self):
         log_file = filedialog.askopenfilename(
             title=f"Selecione o arquivo de log para {self.name}",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            filetypes=[("CSV files", "*.csv"), ("Log binário", f"*{BINARY_EXT}"), ("All files", "*.*")]
         )
         if log_file:
             ReportWindow(self.winfo_toplevel(), log_file, self.name)
 
 
 class GreenhouseControlApp:
-    def __init__(self, root):
+    def __init__(self, root, config_path=None, filter_config=None, history_points=CAPACIDADE_PADRAO,
+                 plot_reduction=METODO_PADRAO):
         self.root = root
+        self.filter_config = filter_config
+        self.history_points = history_points
+        self.plot_reduction = plot_reduction
         self.root.title("Painel de Controle de Estufas")
         self.root.geometry("850x600")
 
@@ -204,9 +299,24 @@ class GreenhouseControlApp:
         self.intervalo_leitura_ms = 5000
         self.interval_options = {"5 segundos": 5, "10 segundos": 10, "15 segundos": 15, "20 segundos": 20, "30 segundos": 30}
 
-        self.client = ModbusClient(host=SERVER_HOST, port=SERVER_PORT, unit_id=CLIENT_ID, auto_open=True)
-        
+        # Cada equipamento tem sua conexão e thread de aquisição; a interface só consome a fila de eventos
+        self.devices = load_registry(config_path)
+        self.pool = ConnectionPool(self.devices, self.intervalo_leitura_ms / 1000)
+        self.frame_latency = WindowStats()
+        self.log_manager = LogManager()
+        self.poll_status = {}
+        self.devices_window = None
+        self.metrics_window = None
+        self.fleet_window = None
+        self.frame_hist = METRICS.histogram("frame_seconds", "Tempo de processamento de um quadro da interface")
+        self.poll_hist = METRICS.histogram("modbus_poll_seconds", "Duração de um ciclo de leitura Modbus")
+        self.samples_counter = METRICS.counter("samples_total", "Amostras recebidas da aquisição")
+        self.poll_failures = METRICS.counter("modbus_poll_failures_total", "Ciclos de leitura com falha")
+        self.write_failures = METRICS.counter("modbus_write_failures_total", "Escritas sem confirmação")
+
         self.create_widgets()
+        self.pool.start()
+        self._next_frame = time.monotonic()
         self.update_data()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
@@ -221,77 +331,319 @@ class GreenhouseControlApp:
         self.interval_combo.pack(side=tk.LEFT)
         self.interval_combo.set("5 segundos")
         ttk.Button(interval_frame, text="Aplicar", command=self.apply_new_interval, width=8).pack(side=tk.LEFT, padx=(5,0))
+        ttk.Button(top_frame, text="Equipamentos", command=self.open_devices_window).pack(side=tk.RIGHT)
+        ttk.Button(top_frame, text="Métricas", command=self.open_metrics_window).pack(side=tk.RIGHT, padx=(0, 5))
+        ttk.Button(top_frame, text="Relatório da Frota", command=self.open_fleet_report_window).pack(side=tk.RIGHT, padx=(0, 5))
 
         # --- Notebook para as Abas ---
         notebook = ttk.Notebook(self.root, padding=(10, 5, 10, 5))
         notebook.pack(fill=tk.BOTH, expand=True)
 
-        self.tab1 = ControllerTab(notebook, self.client, "Estufa 1", register_offset=0)
-        self.tab2 = ControllerTab(notebook, self.client, "Estufa 2", register_offset=10)
-        
-        notebook.add(self.tab1, text="Estufa 1")
-        notebook.add(self.tab2, text="Estufa 2")
+        # Uma aba por zona do registro de equipamentos (dispositivos.json)
+        self.tabs = []
+        self.tab_of = {}
+        for device in self.devices:
+            tab = ControllerTab(notebook, self.pool, self.log_manager, device, self.filter_config,
+                                self.history_points, self.plot_reduction)
+            notebook.add(tab, text=device.name)
+            self.tabs.append(tab)
+            self.tab_of[device] = tab
 
         # --- Barra de Status ---
         status_label = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor="w", padding=2)
         status_label.pack(fill=tk.X)
 
     def update_data(self):
-        if not self.client.is_open:
-            self.status_var.set("Reconectando...")
-            self.client.open()
-        
-        if self.client.is_open:
-            # Lê dados para ambas as estufas
-            regs1 = self.client.read_holding_registers(self.tab1.register_offset, 6)
-            regs2 = self.client.read_holding_registers(self.tab2.register_offset, 6)
-            
-            if regs1 and regs2:
-                self.status_var.set("Conectado")
-                current_time = datetime.now()
-                self.tab1.update_display(regs1, current_time)
-                self.tab2.update_display(regs2, current_time)
-            else:
-                self.status_var.set("Erro de leitura Modbus")
+        """Esvazia a fila de eventos da aquisição; nunca bloqueia em I/O Modbus."""
+        # Atraso do quadro: quanto este callback rodou depois do horário previsto
+        now = time.monotonic()
+        self.frame_latency.add(max(0.0, now - self._next_frame))
+
+        while True:
+            try:
+                event = self.pool.events.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(event, Sample):
+                self.samples_counter.inc()
+                self.tab_of[event.key].update_display(event.regs, event.timestamp)
+            elif isinstance(event, PollStatus):
+                self.poll_hist.observe(event.duration_s)
+                if not event.ok:
+                    self.poll_failures.inc()
+                self.poll_status[event.device] = event
+                self._update_status()
+            elif isinstance(event, WriteResult):
+                if not event.ok:
+                    self.write_failures.inc()
+                self._handle_write_result(event)
+
+        self.frame_hist.observe(time.monotonic() - now)
+        self._next_frame = time.monotonic() + INTERVALO_QUADRO_MS / 1000
+        self.root.after(INTERVALO_QUADRO_MS, self.update_data)
+
+    def _update_status(self):
+        statuses = self.poll_status.values()
+        total = len(self.pool.workers)
+        connected = sum(1 for status in statuses if status.connected)
+        if not connected:
+            text = "Falha na conexão"
+        elif any(status.connected and not status.ok for status in statuses):
+            text = "Erro de leitura Modbus"
         else:
-            self.status_var.set("Falha na conexão")
+            text = "Conectado"
+        if total > 1:
+            text += f" ({connected}/{total} equipamentos)"
+        self.status_var.set(
+            f"{text} | Quadro: {self.frame_latency.mean * 1000:.0f} ms (máx {self.frame_latency.max * 1000:.0f} ms)"
+            f" | Jitter aquisição máx: {self.pool.jitter_max_s * 1000:.0f} ms"
+        )
 
-        self.root.after(self.intervalo_leitura_ms, self.update_data)
+    def _handle_write_result(self, result):
+        if result.on_done is not None:
+            result.on_done(result.ok)
+        elif not result.ok:
+            self.status_var.set(f"Falha ao escrever no endereço {result.address}.")
 
     def apply_new_interval(self):
         selection = self.interval_combo.get()
         new_interval_s = self.interval_options[selection]
         self.intervalo_leitura_ms = new_interval_s * 1000
+        self.pool.set_interval(new_interval_s)
 
-        # Envia o novo intervalo para ambos os controladores
+        # Envia o novo intervalo para todos os controladores
         # Nota: O simulador atual usa um intervalo global, então escrever em um já basta.
-        # Escrevemos em ambos para um design mais robusto.
-        threading.Thread(target=self._write_interval_task, args=(self.tab1.register_offset + REG_INTERVALO_REL, new_interval_s)).start()
-        threading.Thread(target=self._write_interval_task, args=(self.tab2.register_offset + REG_INTERVALO_REL, new_interval_s)).start()
+        # Escrevemos em todos para um design mais robusto.
+        for tab in self.tabs:
+            self.pool.write(tab.device, REG_INTERVALO_REL, new_interval_s)
         self.status_var.set(f"Intervalo global definido para {new_interval_s}s")
 
-    def _write_interval_task(self, address, interval_s):
-        if not self.client.write_single_register(address, interval_s):
-            self.status_var.set(f"Falha ao atualizar intervalo no endereço {address}.")
+    def open_devices_window(self):
+        if self.devices_window is not None and self.devices_window.winfo_exists():
+            self.devices_window.lift()
+            return
+        self.devices_window = DevicesWindow(self.root, self.pool)
+
+    def open_metrics_window(self):
+        if self.metrics_window is not None and self.metrics_window.winfo_exists():
+            self.metrics_window.lift()
+            return
+        self.metrics_window = MetricsWindow(self.root)
+
+    def open_fleet_report_window(self):
+        if self.fleet_window is not None and self.fleet_window.winfo_exists():
+            self.fleet_window.lift()
+            return
+        self.fleet_window = FleetReportWindow(self.root)
 
     def on_closing(self):
         if messagebox.askokcancel("Sair", "Deseja fechar a aplicação?"):
-            self.client.close()
+            self.pool.stop(timeout=2)
+            for tab in self.tabs:
+                tab.close()
+            self.log_manager.close_all()
             self.root.destroy()
 
+class DevicesWindow(tk.Toplevel):
+    """Estado de cada conexão do pool: zonas, latência de leitura e falhas."""
+    COLUMNS = ("Equipamento", "Zonas", "Estado", "Leituras", "Falhas", "Latência média", "Latência máx.")
+
+    def __init__(self, parent, pool):
+        super().__init__(parent)
+        self.pool = pool
+        self.title("Equipamentos")
+        self.geometry("720x240")
+
+        self.tree = ttk.Treeview(self, columns=self.COLUMNS, show="headings")
+        for col in self.COLUMNS:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=90, anchor="center")
+        self.tree.column("Equipamento", width=150, anchor="w")
+        self.tree.column("Zonas", width=150, anchor="w")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.refresh()
+
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        for s in self.pool.stats():
+            self.tree.insert("", tk.END, values=(
+                s.endpoint, ", ".join(s.zones), "Conectado" if s.connected else "Desconectado",
+                s.polls, s.failures, f"{s.latency_mean_s * 1000:.1f} ms", f"{s.latency_max_s * 1000:.1f} ms",
+            ))
+        self.after(INTERVALO_EQUIPAMENTOS_MS, self.refresh)
+
+
+class MetricsWindow(tk.Toplevel):
+    """Painel com os tempos e contadores dos caminhos críticos (metricas.METRICS)."""
+    COLUMNS = ("Métrica", "Amostras", "Média", "p50", "p95", "Máx.")
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Métricas")
+        self.geometry("640x300")
+
+        self.tree = ttk.Treeview(self, columns=self.COLUMNS, show="headings")
+        for col in self.COLUMNS:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=80, anchor="center")
+        self.tree.column("Métrica", width=240, anchor="w")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.refresh()
+
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        for h in sorted(METRICS.histograms(), key=lambda m: m.name):
+            self.tree.insert("", tk.END, values=(
+                h.name, h.count, f"{h.mean * 1000:.2f} ms", f"{h.quantile(0.5) * 1000:.2f} ms",
+                f"{h.quantile(0.95) * 1000:.2f} ms", f"{h.max * 1000:.2f} ms",
+            ))
+        for c in sorted(METRICS.counters(), key=lambda m: m.name):
+            self.tree.insert("", tk.END, values=(c.name, c.value, "", "", "", ""))
+        self.after(INTERVALO_EQUIPAMENTOS_MS, self.refresh)
+
+
+class FleetReportWindow(tk.Toplevel):
+    """
+    Relatório de um período para todas as zonas de uma pasta de logs
+    (incluindo os rotacionados), calculado em paralelo (relatorio_frota.py)
+    numa thread separada para não travar a interface.
+    """
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Relatório da Frota")
+        self.geometry("820x420")
+        self.report = None
+        self._progress = (0, 0)
+        self._result = None
+
+        self.folder_var = tk.StringVar(value=os.getcwd())
+        self.start_time_var = tk.StringVar()
+        self.end_time_var = tk.StringVar()
+        self.status_var = tk.StringVar()
+        self.create_widgets()
+
+    def create_widgets(self):
+        form = ttk.Frame(self, padding="10")
+        form.pack(fill=tk.X)
+        ttk.Label(form, text="Pasta dos logs:").grid(row=0, column=0, sticky="w")
+        ttk.Entry(form, textvariable=self.folder_var, width=60).grid(row=0, column=1, sticky="ew")
+        ttk.Button(form, text="...", width=3, command=self.choose_folder).grid(row=0, column=2, padx=(5, 0))
+        ttk.Label(form, text="Início (DD/MM/AAAA HH:MM:SS):").grid(row=1, column=0, sticky="w", pady=(5, 0))
+        ttk.Entry(form, textvariable=self.start_time_var).grid(row=1, column=1, sticky="ew", pady=(5, 0))
+        ttk.Label(form, text="Fim (DD/MM/AAAA HH:MM:SS):").grid(row=2, column=0, sticky="w", pady=(5, 0))
+        ttk.Entry(form, textvariable=self.end_time_var).grid(row=2, column=1, sticky="ew", pady=(5, 0))
+        form.columnconfigure(1, weight=1)
+
+        actions = ttk.Frame(self, padding=(10, 0))
+        actions.pack(fill=tk.X)
+        self.run_button = ttk.Button(actions, text="Gerar Relatório", command=self.generate_report)
+        self.run_button.pack(side=tk.LEFT)
+        self.save_button = ttk.Button(actions, text="Salvar em CSV", command=self.save_report, state=tk.DISABLED)
+        self.save_button.pack(side=tk.LEFT, padx=(5, 0))
+        self.bar = ttk.Progressbar(actions, length=200)
+        self.bar.pack(side=tk.LEFT, padx=10)
+        ttk.Label(actions, textvariable=self.status_var).pack(side=tk.LEFT)
+
+        from relatorio_frota import FLEET_FIELDS
+        self.tree = ttk.Treeview(self, columns=FLEET_FIELDS, show="headings")
+        for col in FLEET_FIELDS:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=75, anchor="center")
+        self.tree.column("zona", width=130, anchor="w")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    def choose_folder(self):
+        folder = filedialog.askdirectory(initialdir=self.folder_var.get(), title="Pasta dos logs", parent=self)
+        if folder:
+            self.folder_var.set(folder)
+
+    def generate_report(self):
+        try:
+            start_time = datetime.strptime(self.start_time_var.get(), '%d/%m/%Y %H:%M:%S')
+            end_time = datetime.strptime(self.end_time_var.get(), '%d/%m/%Y %H:%M:%S')
+        except ValueError:
+            messagebox.showerror("Erro de Formato", "Formato de data/hora inválido. Use DD/MM/AAAA HH:MM:SS.", parent=self)
+            return
+        from relatorio_frota import discover
+        try:
+            zones = discover([self.folder_var.get()])
+        except OSError as e:
+            messagebox.showerror("Erro", f"Não foi possível abrir a pasta:\n{e}", parent=self)
+            return
+        if not zones:
+            messagebox.showinfo("Relatório da Frota", "Nenhum log encontrado na pasta.", parent=self)
+            return
+
+        self.run_button.config(state=tk.DISABLED)
+        self.save_button.config(state=tk.DISABLED)
+        self.status_var.set(f"{len(zones)} zonas...")
+        self._progress, self._result = (0, 0), None
+        threading.Thread(target=self._run, args=(zones, start_time, end_time), daemon=True).start()
+        self._poll()
+
+    def _run(self, zones, start_time, end_time):
+        from relatorio_frota import run_fleet_report
+
+        def progress(done, total):
+            self._progress = (done, total)
+        try:
+            with METRICS.timer("fleet_report_seconds", "Tempo de um relatório da frota"):
+                self._result = run_fleet_report(zones, start_time, end_time, progress=progress)
+        except (OSError, ValueError) as e:
+            self._result = e
+
+    def _poll(self):
+        if not self.winfo_exists():
+            return
+        done, total = self._progress
+        if self._result is None:
+            if total:
+                self.bar.config(maximum=total, value=done)
+                self.status_var.set(f"{done}/{total} pedaços")
+            self.after(100, self._poll)
+            return
+        self.run_button.config(state=tk.NORMAL)
+        if isinstance(self._result, Exception):
+            self.status_var.set("")
+            messagebox.showerror("Erro de Leitura", f"Não foi possível processar os logs:\n{self._result}", parent=self)
+            return
+        self.report = self._result
+        self.bar.config(maximum=1, value=1)
+        self.status_var.set(f"{self.report.files} arquivos, {self.report.bytes_scanned / 2**20:.0f} MiB "
+                            f"em {self.report.elapsed_s:.1f}s")
+        self.tree.delete(*self.tree.get_children())
+        for row in self.report.rows():
+            self.tree.insert("", tk.END, values=row)
+        self.save_button.config(state=tk.NORMAL)
+
+    def save_report(self):
+        filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")],
+                                                title="Salvar Relatório da Frota", parent=self)
+        if not filepath: return
+        self.report.write_csv(filepath)
+        messagebox.showinfo("Sucesso", "Relatório salvo com sucesso!", parent=self)
+
+
 class ReportWindow(tk.Toplevel):
     """Janela para configurar e exibir o relatório."""
     def __init__(self, parent, log_filepath, controller_name):
         super().__init__(parent)
         self.log_filepath = log_filepath
         self.controller_name = controller_name
-        self.filtered_data = []
+        self.stats = None
+        self.stats_source = None
+        self.start_time = self.end_time = None
 
         self.title(f"Relatório - {controller_name}")
         self.geometry("400x200")
 
         self.start_time_var = tk.StringVar()
         self.end_time_var = tk.StringVar()
+        self.export_mode_var = tk.StringVar(value=MODO_EXPORTACAO_PADRAO)
 
         self.create_widgets()
 
@@ -325,116 +677,171 @@ class ReportWindow(tk.Toplevel):
             messagebox.showerror("Erro de Formato", "Formato de data/hora inválido. Use DD/MM/AAAA HH:MM:SS.", parent=self)
             return
 
-        self.filtered_data = []
-        temperatures = []
-
+        # Intervalos longos são respondidos pelos agregados gravados ao lado do log;
+        # os demais, por uma única passada pelo log, com memória constante. As linhas
+        # só são materializadas se o usuário pedir para vê-las ou exportá-las.
+        from relatorio import compute_stats
         try:
-            with open(self.log_filepath, 'r', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile)
-                header = next(reader) # Pula o cabeçalho
-                self.filtered_data.append(header)
-
-                for row in reader:
-                    row_time = datetime.strptime(row[0], '%d/%m/%Y %H:%M:%S')
-                    if start_time <= row_time <= end_time:
-                        self.filtered_data.append(row)
-                        temperatures.append(float(row[1]))
+            with METRICS.timer("report_build_seconds", "Tempo de cálculo das estatísticas de um relatório"):
+                stats = self._stats_from_rollup(start_time, end_time)
+                if stats is None:
+                    stats = compute_stats(self.log_filepath, start_time, end_time)
         except (IOError, IndexError, ValueError) as e:
             messagebox.showerror("Erro de Leitura", f"Não foi possível ler ou processar o arquivo de log:\n{e}", parent=self)
             return
 
-        if not temperatures:
+        if not stats.count:
             messagebox.showinfo("Relatório", "Nenhum dado encontrado para o período especificado.", parent=self)
             return
 
-        # Calcular estatísticas
-        avg_temp = sum(temperatures) / len(temperatures)
-        max_temp = max(temperatures)
-        min_temp = min(temperatures)
+        self.start_time, self.end_time = start_time, end_time
+        self.stats = stats
 
         # Exibir resultados
-        self.show_results_window(avg_temp, max_temp, min_temp)
-
-    def show_results_window(self, avg, maxi, mini):
+        self.show_results_window(stats)
+
+    def _stats_from_rollup(self, start_time, end_time):
+        self.stats_source = None
+        if (end_time - start_time).total_seconds() < MIN_INTERVALO_RELATORIO_AGREGADO_S:
+            return None
+        if not RollupStore.exists(self.log_filepath):
+            return None
+        from relatorio import first_timestamp
+        store = RollupStore(self.log_filepath, read_only=True)
+        log_first = first_timestamp(self.log_filepath)
+        if log_first is None or store.first_t is None:
+            return None
+        # Os agregados só servem se cobrirem o início do log dentro da janela
+        window_start = max(start_time, log_first)
+        if store.first_t > window_start.timestamp():
+            return None
+        resolution, records = store.query(window_start, end_time, allow_raw=False)
+        self.stats_source = f"agregados de {resolution // 60} min (aproximado)"
+        return stats_from_rollup(records, resolution)
+
+    def iter_filtered_rows(self):
+        """Cabeçalho seguido das linhas do período, lidas do log sob demanda."""
+        from relatorio import iter_rows, read_header
+        yield read_header(self.log_filepath)
+        yield from iter_rows(self.log_filepath, self.start_time, self.end_time)
+
+    def format_stats_lines(self, stats):
+        lines = [
+            ("Amostras", f"{stats.count}"),
+            ("Temperatura Média", f"{stats.mean:.2f}°C"),
+            ("Temperatura Máxima", f"{stats.max:.2f}°C"),
+            ("Temperatura Mínima", f"{stats.min:.2f}°C"),
+            ("Desvio Padrão", f"{stats.std:.2f}°C"),
+            ("Tempo acima do Setpoint", format_duration(stats.time_above)),
+            ("Tempo abaixo do Setpoint", format_duration(stats.time_below)),
+            ("Ciclo de Trabalho do Aquecedor", f"{stats.duty_cycle * 100:.1f}%"),
+        ]
+        if self.stats_source:
+            lines.append(("Fonte", self.stats_source))
+        return lines
+
+    def show_results_window(self, stats):
+        from exportacao import MODOS_EXPORTACAO
+        from tabela_virtual import VirtualTable, open_row_source
         results_win = tk.Toplevel(self)
         results_win.title(f"Resultados do Relatório - {self.controller_name}")
-        results_win.geometry("600x400")
+        results_win.geometry("600x550")
 
         stats_frame = ttk.LabelFrame(results_win, text="Estatísticas do Período", padding="10")
         stats_frame.pack(fill=tk.X, padx=10, pady=10)
-        stats_text = (f"Temperatura Média: {avg:.2f}°C\n"
-                      f"Temperatura Máxima: {maxi:.2f}°C\n"
-                      f"Temperatura Mínima: {mini:.2f}°C")
+        stats_text = "\n".join(f"{label}: {value}" for label, value in self.format_stats_lines(stats))
         ttk.Label(stats_frame, text=stats_text, justify=tk.LEFT).pack(anchor="w")
 
         data_frame = ttk.LabelFrame(results_win, text="Dados Filtrados", padding="10")
         data_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
-
-        tree = ttk.Treeview(data_frame, columns=self.filtered_data[0], show='headings')
-        for col in self.filtered_data[0]:
-            tree.heading(col, text=col)
-            tree.column(col, width=120)
-        for row in self.filtered_data[1:]:
-            tree.insert('', tk.END, values=row)
-        tree.pack(fill=tk.BOTH, expand=True)
+        # Tabela virtual: só as linhas visíveis viram itens do Treeview
+        source = open_row_source(self.log_filepath, self.start_time, self.end_time)
+        VirtualTable(data_frame, source).pack(fill=tk.BOTH, expand=True)
 
         ttk.Button(results_win, text="Salvar este relatório em CSV", command=self.save_filtered_report).pack(pady=10)
-        ttk.Button(results_win, text="Imprimir Relatório", command=self.print_report).pack(pady=(0, 10))
-
+        print_frame = ttk.Frame(results_win)
+        print_frame.pack(pady=(0, 10))
+        ttk.Combobox(print_frame, textvariable=self.export_mode_var, values=list(MODOS_EXPORTACAO.keys()),
+                     state="readonly", width=20).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(print_frame, text="Imprimir Relatório", command=self.print_report).pack(side=tk.LEFT)
 
     def save_filtered_report(self):
         filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")], title="Salvar Relatório Filtrado")
         if not filepath: return
         with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            csv.writer(f).writerows(self.filtered_data)
+            csv.writer(f).writerows(self.iter_filtered_rows())
         messagebox.showinfo("Sucesso", "Relatório salvo com sucesso!", parent=self)
 
     def print_report(self):
-        """Gera um arquivo HTML do relatório e o abre no navegador para impressão."""
-        try:
-            # Gerar conteúdo HTML
-            html = "<html><head><title>Relatório de Temperatura</title>"
-            html += "<style>"
-            html += "body { font-family: sans-serif; }"
-            html += "table { border-collapse: collapse; width: 100%; }"
-            html += "th, td { border: 1px solid #dddddd; text-align: left; padding: 8px; }"
-            html += "tr:nth-child(even) { background-color: #f2f2f2; }"
-            html += "h1, h2 { color: #333; }"
-            html += "</style></head><body>"
-            
-            html += f"<h1>Relatório de Temperatura - {self.controller_name}</h1>"
-            
-            # Re-calcular estatísticas para garantir que estão disponíveis
-            temperatures = [float(row[1]) for row in self.filtered_data[1:]]
-            avg_temp = sum(temperatures) / len(temperatures)
-            max_temp = max(temperatures)
-            min_temp = min(temperatures)
-
-            html += "<h2>Estatísticas do Período</h2>"
-            html += f"<p><b>Temperatura Média:</b> {avg_temp:.2f}°C</p>"
-            html += f"<p><b>Temperatura Máxima:</b> {max_temp:.2f}°C</p>"
-            html += f"<p><b>Temperatura Mínima:</b> {min_temp:.2f}°C</p>"
-
-            html += "<h2>Dados Registrados</h2>"
-            html += "<table><tr>"
-            for header in self.filtered_data[0]:
-                html += f"<th>{header}</th>"
-            html += "</tr>"
-            for row in self.filtered_data[1:]:
-                html += "<tr>"
-                for cell in row:
-                    html += f"<td>{cell}</td>"
-                html += "</tr>"
-            html += "</table></body></html>"
-
-            # Salvar em arquivo temporário e abrir no navegador
-            with tempfile.NamedTemporaryFile('w', delete=False, suffix='.html', encoding='utf-8') as f:
-                f.write(html)
-                webbrowser.open_new_tab(f'file://{f.name}')
-        except Exception as e:
-            messagebox.showerror("Erro de Impressão", f"Não foi possível gerar o relatório para impressão:\n{e}", parent=self)
+        """Gera um arquivo HTML do relatório numa thread separada e o abre no navegador para impressão."""
+        from exportacao import MODOS_EXPORTACAO, HtmlExportJob
+        from relatorio import iter_rows, read_header
+        bucket_s = MODOS_EXPORTACAO[self.export_mode_var.get()]
+        job = HtmlExportJob(f"Relatório de Temperatura - {self.controller_name}",
+                            self.format_stats_lines(self.stats), read_header(self.log_filepath),
+                            iter_rows(self.log_filepath, self.start_time, self.end_time), bucket_s)
+
+        progress_win = tk.Toplevel(self)
+        progress_win.title("Gerando relatório...")
+        progress_win.geometry("320x110")
+        progress_win.transient(self)
+        progress_var = tk.StringVar(value="Preparando...")
+        ttk.Label(progress_win, textvariable=progress_var).pack(pady=(10, 5))
+        bar = ttk.Progressbar(progress_win, maximum=self.stats.count, length=280)
+        bar.pack(padx=10)
+        ttk.Button(progress_win, text="Cancelar", command=job.cancel).pack(pady=5)
+        if bucket_s:
+            bar.config(mode='indeterminate')
+            bar.start()
+
+        def poll():
+            if not job.finished:
+                if not bucket_s:
+                    bar['value'] = job.done_rows
+                progress_var.set(f"{job.done_rows} linhas escritas")
+                self.after(100, poll)
+                return
+            progress_win.destroy()
+            if job.error is not None:
+                messagebox.showerror("Erro de Impressão", f"Não foi possível gerar o relatório para impressão:\n{job.error}", parent=self)
+            elif job.filepath:
+                webbrowser.open_new_tab(f'file://{job.filepath}')
+
+        job.start()
+        poll()
+
+
+def format_duration(seconds):
+    """Formata uma duração em segundos como HH:MM:SS."""
+    seconds = int(round(seconds))
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Painel de controle das estufas.")
+    parser.add_argument("--config", help="Registro de equipamentos em JSON (padrão: dispositivos.json, se existir)")
+    parser.add_argument("--metricas-porta", type=int, metavar="PORTA",
+                        help="Expõe as métricas em http://127.0.0.1:PORTA/metrics (formato Prometheus)")
+    parser.add_argument("--perfil", type=float, metavar="SEGUNDOS",
+                        help="Perfila o laço de eventos (cProfile) pelos primeiros SEGUNDOS")
+    parser.add_argument("--perfil-arquivo", default="perfil_gui.prof", help="Arquivo do perfil (padrão: perfil_gui.prof)")
+    parser.add_argument("--pontos-grafico", type=int, default=CAPACIDADE_PADRAO, metavar="N",
+                        help=f"Pontos por zona no gráfico ao vivo (padrão: {CAPACIDADE_PADRAO})")
+    parser.add_argument("--reducao-grafico", choices=METODOS_REDUCAO, default=METODO_PADRAO,
+                        help="Redução dos pontos do gráfico às colunas de pixel: envelope mín./máx. ou LTTB "
+                             f"(padrão: {METODO_PADRAO})")
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = GreenhouseControlApp(root)
+    metrics_server = None
+    if args.metricas_porta is not None:
+        metrics_server = MetricsServer(args.metricas_porta)
+        metrics_server.start()
+    if args.perfil:
+        profile_event_loop(root, args.perfil, args.perfil_arquivo,
+                           on_done=lambda path: print(f"Perfil gravado em {path}"))
+    app = GreenhouseControlApp(root, args.config, filter_config_from_args(args), args.pontos_grafico,
+                               args.reducao_grafico)
     root.mainloop()
+    if metrics_server is not None:
+        metrics_server.stop()
@@ -1,83 +1,116 @@
 # cliente_modbus.py
 
-from pyModbusTCP.client import ModbusClient
+import argparse
 import time
 
-# --- Configurações do Cliente ---
-SERVER_HOST = "localhost"
-SERVER_PORT = 502
-CLIENT_ID = 1 # ID do escravo Modbus (geralmente 1)
+from dispositivos import group_by_endpoint, endpoint_of, load_registry, read_all, new_client
+from excecao import add_filter_arguments, filter_config_from_args
+from gravador import FORMATOS_LOG, INTERVALO_GRAVACAO_PADRAO_S, Recorder
 
-# --- Endereços dos Registros (conforme o simulador) ---
+# --- Endereços dos Registros (relativos ao offset de cada zona, conforme o simulador) ---
 REG_SETPOINT = 0
 REG_PV = 1
 REG_OUTPUT = 2
 
-# Instancia o cliente
-# auto_open=True garante que ele tentará se conectar assim que for criado
-client = ModbusClient(host=SERVER_HOST, port=SERVER_PORT, unit_id=CLIENT_ID, auto_open=True)
-
-def read_data():
-    """Lê os dados do servidor Modbus e os exibe."""
-    if not client.is_open:
-        print("Falha na conexão. Tentando reconectar...")
-        if not client.open():
-            print("Não foi possível reconectar.")
-            return False
-
-    # Lê múltiplos registros de uma vez para ser mais eficiente
-    # Vamos ler 3 registros a partir do endereço 0 (Setpoint, PV, Saída)
-    regs = client.read_holding_registers(REG_SETPOINT, 3)
-    
-    if regs:
-        setpoint = regs[0] / 10.0
-        pv = regs[1] / 10.0
-        output_state = "LIGADA" if regs[2] == 1 else "DESLIGADA"
-        
-        print(f"Status -> Setpoint: {setpoint:.1f}°C | Temp. Atual (PV): {pv:.1f}°C | Saída: {output_state}")
-        return True
-    else:
-        print("Falha ao ler registros do servidor.")
-        return False
+# Conexões reaproveitadas entre leituras, uma por equipamento (host, porta, unit id)
+clients = {}
 
-def write_setpoint(new_sp):
-    """Escreve um novo valor de Setpoint no servidor."""
-    if not client.is_open:
-        print("Não é possível escrever: cliente não conectado.")
-        return
 
+def read_data(devices):
+    """Lê todas as zonas (em paralelo, uma conexão por equipamento) e as exibe."""
+    results = read_all(devices, clients)
+    ok = True
+    for device in devices:
+        regs = results.get(device)
+        if regs:
+            setpoint = regs[REG_SETPOINT] / 10.0
+            pv = regs[REG_PV] / 10.0
+            output_state = "LIGADA" if regs[REG_OUTPUT] == 1 else "DESLIGADA"
+            print(f"{device.name} -> Setpoint: {setpoint:.1f}°C | Temp. Atual (PV): {pv:.1f}°C | Saída: {output_state}")
+        else:
+            print(f"{device.name} -> Falha ao ler registros de {device.host}:{device.port}.")
+            ok = False
+    return ok
+
+
+def write_setpoint(devices, text):
+    """
+    Escreve um novo Setpoint. Aceita "<valor>" (primeira zona) ou
+    "<zona> <valor>", com a zona pelo número (1, 2, ...).
+    """
+    parts = text.split()
     try:
-        sp_value = float(new_sp)
-        # Multiplicamos por 10 para enviar como inteiro, conforme a lógica do simulador
-        sp_register_value = int(sp_value * 10)
-        
-        print(f"Enviando novo Setpoint: {sp_value:.1f}°C (Valor no registro: {sp_register_value})")
-        
-        if client.write_single_register(REG_SETPOINT, sp_register_value):
-            print("Setpoint atualizado com sucesso!")
+        if len(parts) == 2:
+            zone = int(parts[0])
+            if not 1 <= zone <= len(devices):
+                raise ValueError
+            device = devices[zone - 1]
+            sp_value = float(parts[1].replace(',', '.'))
+        elif len(parts) == 1:
+            device = devices[0]
+            sp_value = float(parts[0].replace(',', '.'))
         else:
-            print("Falha ao atualizar o Setpoint.")
+            raise ValueError
+    except (ValueError, IndexError):
+        print("Entrada inválida. Use um número (ex: 28.5) ou zona e valor (ex: 2 28.5).")
+        return
+
+    client = clients.get(endpoint_of(device))
+    if client is None or not client.is_open:
+        print(f"Não é possível escrever: {device.name} não conectada.")
+        return
+
+    # Multiplicamos por 10 para enviar como inteiro, conforme a lógica do simulador
+    sp_register_value = int(sp_value * 10)
+    print(f"Enviando novo Setpoint para {device.name}: {sp_value:.1f}°C (Valor no registro: {sp_register_value})")
+    if client.write_single_register(device.offset + REG_SETPOINT, sp_register_value):
+        print("Setpoint atualizado com sucesso!")
+    else:
+        print("Falha ao atualizar o Setpoint.")
 
-    except ValueError:
-        print("Entrada inválida. Por favor, insira um número (ex: 28.5).")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cliente de linha de comando das estufas.")
+    parser.add_argument("--config", help="Registro de equipamentos em JSON (padrão: dispositivos.json, se existir)")
+    parser.add_argument("--gravar", metavar="PASTA",
+                        help="Modo gravador sem interface: grava todas as zonas em PASTA até SIGTERM/Ctrl+C")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_GRAVACAO_PADRAO_S,
+                        help="Período de leitura do gravador em segundos (aceita frações, ex: 0.5)")
+    parser.add_argument("--formato", choices=sorted(FORMATOS_LOG), default="csv", help="Formato dos logs do gravador")
+    parser.add_argument("--duracao", type=float, help="Encerra o gravador após N segundos")
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+
+    devices = load_registry(args.config)
+
+    if args.gravar:
+        recorder = Recorder(devices, args.gravar, args.intervalo, args.formato,
+                            filter_config=filter_config_from_args(args))
+        recorder.install_signal_handlers()
+        print(f"Gravando {len(devices)} zonas a cada {args.intervalo:g}s em {args.gravar} (SIGTERM ou Ctrl+C encerra)")
+        recorder.run(args.duracao)
+        print(f"Gravador encerrado: {recorder.samples} amostras lidas, {recorder.stored} gravadas, "
+              f"{recorder.failed_polls} leituras com falha.")
+        raise SystemExit(0)
+
+    for endpoint in group_by_endpoint(devices):
+        clients[endpoint] = new_client(endpoint)
+
     print("--- Cliente de Controle da Estufa ---")
-    print("Pressione Enter para atualizar os dados ou digite um novo Setpoint e pressione Enter.")
+    print("Pressione Enter para atualizar os dados ou digite um novo Setpoint ([zona] valor) e pressione Enter.")
     print("Pressione Ctrl+C para sair.")
-    
+
     try:
         while True:
             # Lê e exibe os dados atuais
-            read_data()
-            
-            # Aguarda por entrada do usuário por 5 segundos
+            read_data(devices)
+
             try:
                 new_input = input("Novo Setpoint (ou Enter): ")
                 if new_input:
-                    write_setpoint(new_input)
+                    write_setpoint(devices, new_input)
                 # Adiciona uma pequena pausa após a escrita para o servidor processar
-                time.sleep(1) 
+                time.sleep(1)
             except EOFError:
                 # Permite que o script continue se for executado de forma não interativa
                 time.sleep(5)
@@ -85,5 +118,6 @@ if __name__ == '__main__':
     except KeyboardInterrupt:
         print("\nEncerrando o cliente...")
     finally:
-        client.close()
-        print("Conexão fechada.")
+        for client in clients.values():
+            client.close()
+        print("Conexões fechadas.")
@@ -0,0 +1,161 @@
+# dispositivos.py
+
+import json
+import os
+import queue
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from pyModbusTCP.client import ModbusClient
+
+from aquisicao import AcquisitionWorker
+from plano_leitura import PollPlan, RegisterRange
+
+# Arquivo de configuração procurado quando nenhum outro é indicado
+ARQUIVO_CONFIG_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dispositivos.json")
+
+NUM_REGS_ZONA = 6
+TIMEOUT_CONEXAO_S = 2.0
+
+# Uma zona (estufa) num equipamento Modbus
+DeviceConfig = namedtuple("DeviceConfig", ["name", "host", "port", "unit_id", "offset"])
+
+# Configuração usada quando não há arquivo: as duas estufas do simulador local
+DEFAULT_DEVICES = [
+    DeviceConfig("Estufa 1", "localhost", 502, 1, 0),
+    DeviceConfig("Estufa 2", "localhost", 502, 1, 10),
+]
+
+# Estatísticas de uma conexão, para exibição
+DeviceStats = namedtuple("DeviceStats", ["endpoint", "zones", "connected", "polls", "failures",
+                                         "latency_mean_s", "latency_max_s"])
+
+
+def load_registry(path=None):
+    """
+    Carrega a lista de zonas de um arquivo JSON no formato:
+
+        {"zonas": [{"nome": "Estufa 1", "host": "192.168.0.10", "porta": 502,
+                    "unit_id": 1, "offset": 0}, ...]}
+
+    Sem `path`, usa dispositivos.json ao lado do programa, se existir, ou as
+    duas estufas padrão do simulador.
+    """
+    if path is None:
+        if not os.path.isfile(ARQUIVO_CONFIG_PADRAO):
+            return list(DEFAULT_DEVICES)
+        path = ARQUIVO_CONFIG_PADRAO
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    devices = []
+    for i, zone in enumerate(data.get("zonas", [])):
+        try:
+            devices.append(DeviceConfig(
+                name=zone.get("nome", f"Estufa {i + 1}"),
+                host=zone.get("host", "localhost"),
+                port=int(zone.get("porta", 502)),
+                unit_id=int(zone.get("unit_id", 1)),
+                offset=int(zone["offset"]),
+            ))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Zona {i + 1} inválida em {path}: {e}") from e
+    if not devices:
+        raise ValueError(f"Nenhuma zona configurada em {path}.")
+    return devices
+
+
+def endpoint_of(device):
+    return (device.host, device.port, device.unit_id)
+
+
+def group_by_endpoint(devices):
+    groups = OrderedDict()
+    for device in devices:
+        groups.setdefault(endpoint_of(device), []).append(device)
+    return groups
+
+
+def new_client(endpoint):
+    host, port, unit_id = endpoint
+    return ModbusClient(host=host, port=port, unit_id=unit_id, timeout=TIMEOUT_CONEXAO_S)
+
+
+class ConnectionPool:
+    """
+    Uma conexão persistente por equipamento (host, porta, unit id), cada uma
+    com sua thread de aquisição (aquisicao.AcquisitionWorker): um CLP lento
+    ou fora do ar não atrasa os demais. As leituras de todas as conexões
+    chegam numa única fila `events`.
+
+    `keys` associa a cada zona a chave usada nas amostras (ex.: a aba da
+    interface); por padrão é o próprio DeviceConfig.
+    """
+    def __init__(self, devices, interval_s, keys=None):
+        self.devices = list(devices)
+        keys = list(keys) if keys is not None else self.devices
+        self.key_of = dict(zip(self.devices, keys))
+        self.events = queue.Queue()
+        self.workers = OrderedDict()
+        for endpoint, zones in group_by_endpoint(self.devices).items():
+            plan = PollPlan([RegisterRange(self.key_of[d], d.offset, NUM_REGS_ZONA) for d in zones])
+            name = "{}:{}/{}".format(*endpoint)
+            self.workers[endpoint] = AcquisitionWorker(new_client(endpoint), interval_s, plan,
+                                                       events=self.events, name=name)
+
+    def start(self):
+        for worker in self.workers.values():
+            worker.start()
+
+    def stop(self, timeout=None):
+        for worker in self.workers.values():
+            worker.request_stop()
+        for worker in self.workers.values():
+            if worker.is_alive():
+                worker.join(timeout)
+
+    def set_interval(self, interval_s):
+        for worker in self.workers.values():
+            worker.set_interval(interval_s)
+
+    def write(self, device, reg_rel, value, on_done=None):
+        """Escrita num registro (relativo ao offset da zona), pela thread da conexão da zona."""
+        self.workers[endpoint_of(device)].submit_write(device.offset + reg_rel, value, on_done)
+
+    @property
+    def jitter_max_s(self):
+        return max((w.jitter.max for w in self.workers.values()), default=0.0)
+
+    def stats(self):
+        """Latência de leitura e contagem de falhas por conexão."""
+        groups = group_by_endpoint(self.devices)
+        return [
+            DeviceStats(w.name, [d.name for d in groups[endpoint]], w.connected, w.polls, w.failures,
+                        w.poll_latency.mean, w.poll_latency.max)
+            for endpoint, w in self.workers.items()
+        ]
+
+
+def read_all(devices, clients=None):
+    """
+    Leitura única e concorrente de todas as zonas, sem threads permanentes
+    (para scripts e ferramentas de linha de comando). `clients` é um
+    dicionário endpoint -> ModbusClient reaproveitado entre chamadas.
+    Devolve {DeviceConfig: regs ou None}.
+    """
+    clients = clients if clients is not None else {}
+    groups = group_by_endpoint(devices)
+
+    def poll(endpoint):
+        client = clients.get(endpoint)
+        if client is None:
+            client = clients[endpoint] = new_client(endpoint)
+        if not client.is_open and not client.open():
+            return {d: None for d in groups[endpoint]}
+        plan = PollPlan([RegisterRange(d, d.offset, NUM_REGS_ZONA) for d in groups[endpoint]])
+        return plan.execute(client.read_holding_registers)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(groups))) as executor:
+        for part in executor.map(poll, groups):
+            results.update(part)
+    return results
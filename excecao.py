@@ -0,0 +1,143 @@
+# excecao.py
+
+from collections import namedtuple
+
+# Padrões do relatório por exceção. O estágio é opcional e vem desligado:
+# com ele, o log fica com amostragem irregular, e as médias/desvios do
+# relatório (que pesam cada linha igualmente) passam a puxar para as
+# transições. Quando ligado sem valor, o PV chega com resolução de 0,1 °C e
+# uma banda de 0,2 °C ignora a oscilação de um dígito causada pelo ruído do
+# sensor. O heartbeat fica abaixo de relatorio.MAX_INTERVALO_S para que os
+# relatórios continuem tratando o intervalo entre amostras como contínuo.
+BANDA_MORTA_PADRAO_C = 0.2
+HEARTBEAT_PADRAO_S = 60.0
+
+# Tolerância de comparação: PV vem de registros /10, e 0.3 - 0.1 não é exatamente 0.2
+_EPS = 1e-9
+
+# Configuração do estágio: `deadband` (°C, ou None para desligar) e
+# `heartbeat_s` filtram as amostras antes de exibição, gráfico e log;
+# `compression` (°C, ou None) liga a compressão swinging door no histórico gravado.
+FilterConfig = namedtuple("FilterConfig", ["deadband", "heartbeat_s", "compression"],
+                          defaults=(None, HEARTBEAT_PADRAO_S, None))
+
+
+class DeadbandFilter:
+    """
+    Relatório por exceção: uma amostra passa se o PV se afastou mais que
+    `deadband` do último valor repassado, se SP ou saída mudaram, ou se já
+    se passaram `heartbeat_s` segundos desde a última amostra repassada.
+    """
+    def __init__(self, deadband=BANDA_MORTA_PADRAO_C, heartbeat_s=HEARTBEAT_PADRAO_S):
+        self.deadband = deadband
+        self.heartbeat_s = heartbeat_s
+        self.last = None
+        self.received = 0
+        self.passed = 0
+
+    def accept(self, timestamp, pv, sp, output_state):
+        self.received += 1
+        last = self.last
+        if (last is not None
+                and abs(pv - last[1]) <= self.deadband + _EPS
+                and sp == last[2]
+                and output_state == last[3]
+                and (timestamp - last[0]).total_seconds() < self.heartbeat_s):
+            return False
+        self.last = (timestamp, pv, sp, output_state)
+        self.passed += 1
+        return True
+
+
+class SwingingDoorCompressor:
+    """
+    Compressão swinging door para o histórico gravado: a partir do último
+    ponto arquivado, só grava um ponto quando a reta que liga o arquivado
+    ao ponto seguinte deixaria de passar a menos de `deviation` de algum
+    ponto descartado no caminho. Mudança de SP ou de saída e o intervalo máximo
+    `max_interval_s` sempre encerram o segmento, de modo que as transições
+    ficam no log com seu horário exato.
+
+    `add()` e `flush()` devolvem as linhas (timestamp, pv, sp, saída) a gravar.
+    """
+    def __init__(self, deviation, max_interval_s=HEARTBEAT_PADRAO_S):
+        self.deviation = deviation
+        self.max_interval_s = max_interval_s
+        self.archived = None   # último ponto gravado
+        self.held = None       # último ponto recebido e ainda não gravado
+        self.slope_max = self.slope_min = None
+        self.received = 0
+        self.stored = 0
+
+    def _archive(self, row, out):
+        self.archived = row
+        self.held = None
+        self.slope_max, self.slope_min = float("inf"), float("-inf")
+        out.append(row)
+
+    def add(self, timestamp, pv, sp, output_state):
+        self.received += 1
+        row = (timestamp, pv, sp, output_state)
+        out = []
+        archived = self.archived
+        if archived is None:
+            self._archive(row, out)
+        elif (sp != archived[2] or output_state != archived[3]
+              or (timestamp - archived[0]).total_seconds() >= self.max_interval_s):
+            if self.held is not None:
+                out.append(self.held)
+            self._archive(row, out)
+        else:
+            dt = (timestamp - archived[0]).total_seconds()
+            if dt > 0:
+                # A reta arquivado -> atual precisa passar a menos de `deviation` de todos os
+                # pontos intermediários; se não passa, o ponto anterior fecha o segmento.
+                slope = (pv - archived[1]) / dt
+                if self.held is not None and not (self.slope_min - _EPS <= slope <= self.slope_max + _EPS):
+                    self._archive(self.held, out)
+                    archived = self.archived
+                    dt = (timestamp - archived[0]).total_seconds()
+                if dt > 0:
+                    self.slope_max = min(self.slope_max, (pv + self.deviation - archived[1]) / dt)
+                    self.slope_min = max(self.slope_min, (pv - self.deviation - archived[1]) / dt)
+            self.held = row
+        self.stored += len(out)
+        return out
+
+    def flush(self):
+        """Linha pendente (o último ponto recebido), para gravar ao fechar o log."""
+        if self.held is None:
+            return []
+        row, self.held = self.held, None
+        self.archived = row
+        self.slope_max, self.slope_min = float("inf"), float("-inf")
+        self.stored += 1
+        return [row]
+
+
+def make_stages(config):
+    """(filtro, compressor) para uma FilterConfig; None desliga cada estágio."""
+    if config is None:
+        return None, None
+    deadband = (DeadbandFilter(config.deadband, config.heartbeat_s)
+                if config.deadband is not None else None)
+    compressor = (SwingingDoorCompressor(config.compression, config.heartbeat_s)
+                  if config.compression is not None else None)
+    return deadband, compressor
+
+
+def add_filter_arguments(parser):
+    """Opções de linha de comando do estágio de exceção (interface e gravador)."""
+    parser.add_argument("--banda-morta", type=float, nargs="?", const=BANDA_MORTA_PADRAO_C, metavar="C",
+                        help="Liga o relatório por exceção: só repassa amostras cujo PV variou mais que C °C "
+                             f"(sem valor: {BANDA_MORTA_PADRAO_C}); desligado por padrão")
+    parser.add_argument("--heartbeat", type=float, default=HEARTBEAT_PADRAO_S, metavar="S",
+                        help=f"Repassa uma amostra ao menos a cada S segundos (padrão: {HEARTBEAT_PADRAO_S:g})")
+    parser.add_argument("--compressao", type=float, metavar="C",
+                        help="Comprime o histórico gravado (swinging door) com desvio máximo de C °C")
+
+
+def filter_config_from_args(args):
+    if args.banda_morta is None and args.compressao is None:
+        return None
+    return FilterConfig(args.banda_morta, args.heartbeat, args.compressao)
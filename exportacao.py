@@ -0,0 +1,163 @@
+# exportacao.py
+
+import html
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+from registro_log import LOG_TIME_FORMAT
+from relatorio import TimestampParser
+
+# Quantas linhas da tabela são acumuladas antes de cada escrita no disco
+LINHAS_POR_ESCRITA = 2000
+
+# Modos de exportação: None = todas as linhas; demais = agregados por período (segundos)
+MODOS_EXPORTACAO = {
+    "Detalhado": None,
+    "Resumo por minuto": 60,
+    "Resumo por hora": 3600,
+}
+
+RESUMO_HEADER = ['Período', 'Amostras', 'Temp. Média (°C)', 'Temp. Mínima (°C)', 'Temp. Máxima (°C)',
+                 'Setpoint Médio (°C)', 'Saída Ligada (%)']
+
+_STYLE = (
+    "body { font-family: sans-serif; }"
+    "table { border-collapse: collapse; width: 100%; }"
+    "th, td { border: 1px solid #dddddd; text-align: left; padding: 8px; }"
+    "tr:nth-child(even) { background-color: #f2f2f2; }"
+    "h1, h2 { color: #333; }"
+)
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def summarize_rows(rows, bucket_s, cancel_event=None):
+    """
+    Agrega linhas do log (layout do CSV, em ordem cronológica) em períodos
+    de `bucket_s` segundos, em streaming. Gera linhas no layout RESUMO_HEADER.
+    `cancel_event` é verificado a cada LINHAS_POR_ESCRITA linhas lidas, pois
+    um período pode cobrir muitas linhas do log.
+    """
+    parser = TimestampParser()
+    bucket = label = acc = None
+    for i, row in enumerate(rows):
+        if cancel_event is not None and i % LINHAS_POR_ESCRITA == 0 and cancel_event.is_set():
+            raise ExportCancelled()
+        t = parser.seconds(row[0])
+        key = int(t // bucket_s)
+        if key != bucket:
+            if bucket is not None:
+                yield _summary_row(label, acc)
+            bucket = key
+            # Rótulo: horário de início do período, no mesmo formato do log
+            label = (_EPOCH + timedelta(seconds=key * bucket_s)).strftime(LOG_TIME_FORMAT)
+            acc = [0, 0.0, float('inf'), float('-inf'), 0.0, 0]
+        pv = float(row[1])
+        acc[0] += 1
+        acc[1] += pv
+        acc[2] = min(acc[2], pv)
+        acc[3] = max(acc[3], pv)
+        acc[4] += float(row[2])
+        acc[5] += int(row[3])
+    if bucket is not None:
+        yield _summary_row(label, acc)
+
+
+def _summary_row(label, acc):
+    n, total, lo, hi, sp_total, on = acc
+    return [label, n, f"{total / n:.2f}", f"{lo:.2f}", f"{hi:.2f}", f"{sp_total / n:.1f}", f"{on * 100 / n:.1f}"]
+
+
+def write_html_report(f, title, stats_lines, header, rows, progress=None, cancel_event=None):
+    """
+    Escreve o relatório HTML em `f` em blocos, à medida que percorre `rows`,
+    sem montar o documento inteiro na memória. `progress(n)` é chamado com o
+    número de linhas já escritas; `cancel_event` interrompe a exportação.
+    """
+    esc = html.escape
+    f.write(f"<html><head><meta charset=\"utf-8\"><title>{esc(title)}</title>"
+            f"<style>{_STYLE}</style></head><body>")
+    f.write(f"<h1>{esc(title)}</h1>")
+
+    f.write("<h2>Estatísticas do Período</h2>")
+    for label, value in stats_lines:
+        f.write(f"<p><b>{esc(label)}:</b> {esc(str(value))}</p>")
+
+    f.write("<h2>Dados Registrados</h2><table><tr>")
+    f.write("".join(f"<th>{esc(str(col))}</th>" for col in header))
+    f.write("</tr>")
+
+    chunk = []
+    written = 0
+    for row in rows:
+        chunk.append("<tr>" + "".join(f"<td>{esc(str(cell))}</td>" for cell in row) + "</tr>")
+        if len(chunk) >= LINHAS_POR_ESCRITA:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExportCancelled()
+            f.write("".join(chunk))
+            written += len(chunk)
+            chunk = []
+            if progress is not None:
+                progress(written)
+    f.write("".join(chunk))
+    written += len(chunk)
+    if progress is not None:
+        progress(written)
+    f.write("</table></body></html>")
+    return written
+
+
+class HtmlExportJob(threading.Thread):
+    """
+    Exporta o relatório para um arquivo HTML temporário numa thread
+    separada. A interface acompanha `done_rows`, `finished`, `filepath` e
+    `error`, e pode chamar `cancel()`.
+    """
+    def __init__(self, title, stats_lines, header, rows, bucket_s=None):
+        super().__init__(daemon=True)
+        self.title = title
+        self.stats_lines = stats_lines
+        self._cancel = threading.Event()
+        self.header = RESUMO_HEADER if bucket_s else header
+        self.rows = summarize_rows(rows, bucket_s, self._cancel) if bucket_s else rows
+        self.done_rows = 0
+        self.finished = False
+        self.filepath = None
+        self.error = None
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _progress(self, n):
+        self.done_rows = n
+
+    def run(self):
+        try:
+            with tempfile.NamedTemporaryFile('w', delete=False, suffix='.html', encoding='utf-8') as f:
+                self.filepath = f.name
+                write_html_report(f, self.title, self.stats_lines, self.header, self.rows,
+                                  self._progress, self._cancel)
+        except ExportCancelled:
+            self.error = None
+            self._discard()
+        except Exception as e:
+            self.error = e
+            self._discard()
+        finally:
+            self.finished = True
+
+    def _discard(self):
+        """Apaga o arquivo temporário de uma exportação cancelada ou com erro."""
+        if self.filepath is not None:
+            try:
+                os.unlink(self.filepath)
+            except OSError:
+                pass
+            self.filepath = None
@@ -0,0 +1,120 @@
+# grafico.py
+
+from datetime import datetime
+
+import matplotlib.dates as mdates
+import numpy as np
+
+from reducao import METODO_PADRAO, PlotDownsampler, reduce_series
+
+# Folga (fração do intervalo visível) deixada à direita do último ponto e
+# acima/abaixo das temperaturas, para que novas amostras caibam na vista
+# sem precisar reescalar a cada leitura.
+FOLGA_X = 0.25
+FOLGA_Y = 0.5  # °C
+INTERVALO_X_MIN = 60 / 86400  # 1 minuto, em dias (unidade do matplotlib)
+
+SEGUNDOS_POR_DIA = 86400.0
+# Segundos "ingênuos" desde 1970 (historico.ZoneHistory) -> unidade de datas do matplotlib
+_EPOCH_NUM = mdates.date2num(datetime(1970, 1, 1))
+
+
+class TrendPlotRenderer:
+    """
+    Desenha o gráfico de tendência (PV e SP) de forma incremental.
+
+    Os artistas (linhas, título, eixos, legenda) são criados uma única vez.
+    A cada nova amostra só os dados das linhas são trocados e apenas a
+    região dos eixos é redesenhada (blitting). O redesenho completo só
+    acontece quando os dados saem da vista atual ou quando pedido
+    explicitamente (ex.: a aba voltou a ficar visível).
+
+    Séries com mais pontos do que colunas de pixel são reduzidas antes de
+    ir para as linhas (reducao.py), preservando picos e degraus do SP.
+    """
+    def __init__(self, fig, ax, canvas, method=METODO_PADRAO):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.method = method
+        self.downsampler = PlotDownsampler(method)
+        self._background = None
+        self.needs_full_draw = True
+
+        self.pv_line, = ax.plot([], [], marker='o', linestyle='-', markersize=4,
+                                label='Temperatura (PV)', animated=True)
+        self.sp_line, = ax.plot([], [], linestyle='--', color='r', label='Setpoint (SP)', animated=True)
+        ax.set_title("Histórico de Temperatura")
+        ax.set_xlabel("Horário")
+        ax.set_ylabel("Temperatura (°C)")
+        ax.grid(True)
+        ax.xaxis_date()
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
+        ax.legend(loc='upper left')
+
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        """Guarda o fundo (tudo menos as linhas) e desenha as linhas por cima."""
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        self.ax.draw_artist(self.sp_line)
+        self.ax.draw_artist(self.pv_line)
+
+    def update(self, times, pv, sp):
+        """Atualiza as linhas com o histórico completo e redesenha o mínimo necessário."""
+        if not len(times):
+            return
+        x, pv, sp = reduce_series(mdates.date2num(list(times)), np.asarray(pv), self._width_px(), np.asarray(sp),
+                                  method=self.method)
+        self._update(x, pv, sp)
+
+    def update_seconds(self, t_seconds, pv, sp):
+        """Como `update`, com horários em segundos desde 1970 (arrays de historico.ZoneHistory)."""
+        if not len(t_seconds):
+            return
+        # Redução incremental: só a última coluna de pixel é recalculada a cada amostra
+        t_seconds, pv, sp = self.downsampler.reduce(t_seconds, pv, self._width_px(), sp)
+        self._update(t_seconds / SEGUNDOS_POR_DIA + _EPOCH_NUM, pv, sp)
+
+    def _width_px(self):
+        return self.ax.bbox.width
+
+    def _update(self, x, pv, sp):
+        self.pv_line.set_data(x, pv)
+        self.sp_line.set_data(x, sp)
+
+        if self.needs_full_draw or self._background is None or self._out_of_view(x, pv, sp):
+            self.redraw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_lines()
+            self.canvas.blit(self.ax.bbox)
+
+    def redraw(self):
+        """Redesenho completo: reescala a vista para os dados atuais e recaptura o fundo."""
+        x, pv = self.pv_line.get_data()
+        _, sp = self.sp_line.get_data()
+        if len(x):
+            self._rescale(x, pv, sp)
+            self.fig.autofmt_xdate()
+        self.canvas.draw()
+        self.needs_full_draw = False
+
+    def _out_of_view(self, x, pv, sp):
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        return (np.min(x) < x0 or np.max(x) > x1
+                or min(np.min(pv), np.min(sp)) < y0 or max(np.max(pv), np.max(sp)) > y1)
+
+    def _rescale(self, x, pv, sp):
+        x_min, x_max = np.min(x), np.max(x)
+        span = max(x_max - x_min, INTERVALO_X_MIN)
+        self.ax.set_xlim(x_min, x_min + span * (1 + FOLGA_X))
+
+        y_min = float(min(np.min(pv), np.min(sp)))
+        y_max = float(max(np.max(pv), np.max(sp)))
+        margin = max(FOLGA_Y, (y_max - y_min) * 0.1)
+        self.ax.set_ylim(y_min - margin, y_max + margin)
@@ -0,0 +1,141 @@
+# gravador.py
+
+import os
+import queue
+import signal
+import threading
+import time
+
+from agregados import RollupStore
+from aquisicao import PollStatus, Sample
+from dispositivos import ConnectionPool
+from excecao import make_stages
+from log_binario import BINARY_EXT
+from registro_log import LogManager
+
+REG_SETPOINT_REL = 0
+REG_PV_REL = 1
+REG_OUTPUT_REL = 2
+
+INTERVALO_GRAVACAO_PADRAO_S = 1.0
+FORMATOS_LOG = {"csv": ".csv", "binario": BINARY_EXT}
+
+# Espera máxima da fila de eventos; limita o tempo de resposta a um pedido de parada
+ESPERA_EVENTOS_S = 0.5
+
+
+def log_filename(zone_name, ext=".csv"):
+    """Mesmo nome que a interface sugere ao iniciar o log de uma aba."""
+    return f"log_{zone_name.replace(' ', '_').lower()}{ext}"
+
+
+class Recorder:
+    """
+    Gravador sem interface: lê todas as zonas do registro de equipamentos
+    (uma thread de aquisição por equipamento, em agendamento de taxa fixa,
+    ver aquisicao.AcquisitionWorker) e grava cada amostra nos mesmos
+    formatos da aba da interface (log CSV ou binário, em lotes pelo
+    LogManager, e agregados ao lado do log). Com `filter_config`
+    (excecao.FilterConfig), grava só as amostras que passam no relatório
+    por exceção e, opcionalmente, comprime o histórico.
+
+    `run()` bloqueia até `stop()` (ou SIGTERM/SIGINT, com
+    `install_signal_handlers()`), e então descarrega tudo antes de voltar.
+    """
+    def __init__(self, devices, log_dir, interval_s=INTERVALO_GRAVACAO_PADRAO_S, fmt="csv",
+                 rollups=True, log_options=None, filter_config=None):
+        self.devices = list(devices)
+        self.interval_s = interval_s
+        self.samples = 0
+        self.stored = 0
+        self.failed_polls = 0
+        self._stop = threading.Event()
+
+        os.makedirs(log_dir, exist_ok=True)
+        ext = FORMATOS_LOG[fmt]
+        self.log_manager = LogManager()
+        self.logs = {}
+        self.rollups = {}
+        self.stages = {}
+        for device in self.devices:
+            path = os.path.join(log_dir, log_filename(device.name, ext))
+            self.logs[device] = self.log_manager.open(path, **(log_options or {}))
+            self.rollups[device] = RollupStore(path) if rollups else None
+            self.stages[device] = make_stages(filter_config)
+        self.pool = ConnectionPool(self.devices, interval_s)
+
+    def install_signal_handlers(self):
+        """Encerra de forma limpa em SIGTERM e SIGINT (chamar na thread principal)."""
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda signum, frame: self.stop())
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, duration_s=None):
+        deadline = None if duration_s is None else time.monotonic() + duration_s
+        self.pool.start()
+        try:
+            while not self._stop.is_set():
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                try:
+                    event = self.pool.events.get(timeout=ESPERA_EVENTOS_S)
+                except queue.Empty:
+                    continue
+                self._handle(event)
+                # Esvazia o que já chegou antes de voltar a checar a parada
+                while True:
+                    try:
+                        event = self.pool.events.get_nowait()
+                    except queue.Empty:
+                        break
+                    self._handle(event)
+        finally:
+            self.close()
+
+    def _handle(self, event):
+        if isinstance(event, Sample):
+            regs = event.regs
+            pv = regs[REG_PV_REL] / 10.0
+            sp = regs[REG_SETPOINT_REL] / 10.0
+            output_state = regs[REG_OUTPUT_REL]
+            rollup = self.rollups[event.key]
+            if rollup is not None:
+                rollup.add(event.timestamp, pv, sp, output_state)
+            self.samples += 1
+            deadband, compressor = self.stages[event.key]
+            if deadband is not None and not deadband.accept(event.timestamp, pv, sp, output_state):
+                return
+            if compressor is None:
+                self._store(event.key, [(event.timestamp, pv, sp, output_state)])
+            else:
+                self._store(event.key, compressor.add(event.timestamp, pv, sp, output_state))
+        elif isinstance(event, PollStatus) and not event.ok:
+            self.failed_polls += 1
+
+    def _store(self, device, rows):
+        log = self.logs[device]
+        for row in rows:
+            log.append(*row)
+        self.stored += len(rows)
+
+    def close(self):
+        self.pool.stop(timeout=2)
+        # Amostras lidas antes da parada ainda vão para o disco
+        while True:
+            try:
+                self._handle(self.pool.events.get_nowait())
+            except queue.Empty:
+                break
+        for device, (_, compressor) in self.stages.items():
+            if compressor is not None:
+                self._store(device, compressor.flush())
+        for rollup in self.rollups.values():
+            if rollup is not None:
+                rollup.close()
+        self.log_manager.close_all()
+
+    @property
+    def jitter_max_s(self):
+        return self.pool.jitter_max_s
@@ -0,0 +1,109 @@
+# historico.py
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from relatorio import to_seconds
+
+# Pontos mantidos por zona para o gráfico "ao vivo"
+CAPACIDADE_PADRAO = 50
+
+# Espaço extra alocado além da capacidade (fração). Quando ele se esgota, os
+# últimos `capacity` pontos são copiados para o início de uma só vez, de modo
+# que o histórico é sempre uma fatia contígua dos arrays (visões sem cópia)
+# e cada amostra custa, em média, uma cópia extra de 1/FOLGA elementos.
+FOLGA = 0.5
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class ZoneHistory:
+    """
+    Histórico circular de uma zona em arrays NumPy: horário (float64, em
+    segundos "ingênuos" desde 1970, a mesma escala de
+    relatorio.TimestampParser.seconds), PV e SP (float32) e saída (uint8).
+
+    `times`, `pv`, `sp` e `output` são visões dos últimos pontos, sem cópia;
+    valem até a próxima chamada de `append`.
+    """
+    def __init__(self, capacity=CAPACIDADE_PADRAO, slack=FOLGA):
+        if capacity < 1:
+            raise ValueError("A capacidade do histórico deve ser positiva.")
+        self.capacity = capacity
+        size = capacity + max(1, int(capacity * slack))
+        self._t = np.empty(size, dtype=np.float64)
+        self._pv = np.empty(size, dtype=np.float32)
+        self._sp = np.empty(size, dtype=np.float32)
+        self._out = np.empty(size, dtype=np.uint8)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def _compact(self):
+        keep = self.capacity - 1
+        src = slice(self._end - keep, self._end)
+        for arr in (self._t, self._pv, self._sp, self._out):
+            arr[:keep] = arr[src]
+        self._start, self._end = 0, keep
+
+    def append(self, t_seconds, pv, sp, output_state=0):
+        if self._end == len(self._t):
+            self._compact()
+        i = self._end
+        self._t[i] = t_seconds
+        self._pv[i] = pv
+        self._sp[i] = sp
+        self._out[i] = output_state
+        self._end = i + 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def append_datetime(self, timestamp, pv, sp, output_state=0):
+        self.append(to_seconds(timestamp), pv, sp, output_state)
+
+    def extend(self, t_seconds, pv, sp, output_state=None):
+        """Acrescenta vários pontos de uma vez (arrays do mesmo tamanho)."""
+        t_seconds = np.asarray(t_seconds, dtype=np.float64)[-self.capacity:]
+        n = len(t_seconds)
+        if output_state is None:
+            output_state = np.zeros(n, dtype=np.uint8)
+        kept = min(len(self), self.capacity - n)
+        # Reaproveita só o que ainda cabe e grava o lote logo depois
+        if kept:
+            src = slice(self._end - kept, self._end)
+            for arr in (self._t, self._pv, self._sp, self._out):
+                arr[:kept] = arr[src]
+        for arr, values in ((self._t, t_seconds), (self._pv, pv), (self._sp, sp), (self._out, output_state)):
+            arr[kept:kept + n] = np.asarray(values)[-n:] if n else []
+        self._start, self._end = 0, kept + n
+
+    def clear(self):
+        self._start = self._end = 0
+
+    @property
+    def times(self):
+        return self._t[self._start:self._end]
+
+    @property
+    def pv(self):
+        return self._pv[self._start:self._end]
+
+    @property
+    def sp(self):
+        return self._sp[self._start:self._end]
+
+    @property
+    def output(self):
+        return self._out[self._start:self._end]
+
+    def last_datetime(self):
+        if not len(self):
+            return None
+        return _EPOCH + timedelta(seconds=float(self._t[self._end - 1]))
+
+    @property
+    def nbytes(self):
+        return self._t.nbytes + self._pv.nbytes + self._sp.nbytes + self._out.nbytes
@@ -0,0 +1,148 @@
+# log_binario.py
+
+import csv
+import os
+import struct
+from datetime import datetime
+
+import numpy as np
+
+from registro_log import BufferedCsvLog, LOG_HEADER, LOG_TIME_FORMAT
+
+# --- Formato binário do log ---
+# Cabeçalho de 16 bytes: assinatura (8), versão (uint32) e tamanho do registro (uint32),
+# seguido de registros de largura fixa, em ordem crescente de horário:
+#   t   -> horário em segundos desde a época (float64)
+#   pv  -> temperatura (float32)
+#   sp  -> setpoint (float32)
+#   out -> estado da saída (uint8)
+BINARY_EXT = ".ctlog"
+MAGIC = b"CTLOG\x00\x00\x01"
+VERSION = 1
+RECORD_DTYPE = np.dtype([('t', '<f8'), ('pv', '<f4'), ('sp', '<f4'), ('out', 'u1')])
+_HEADER = struct.Struct('<8sII')
+HEADER_SIZE = _HEADER.size
+
+
+def _header_bytes():
+    return _HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize)
+
+
+def _valid_header(header):
+    """True se `header` (HEADER_SIZE bytes) é o cabeçalho deste formato."""
+    magic, version, record_size = _HEADER.unpack(header)
+    return magic == MAGIC and record_size == RECORD_DTYPE.itemsize
+
+
+def to_records(rows):
+    """Converte [(datetime, pv, sp, saída), ...] num array de registros."""
+    n = len(rows)
+    records = np.empty(n, dtype=RECORD_DTYPE)
+    records['t'] = np.fromiter((row[0].timestamp() for row in rows), dtype=np.float64, count=n)
+    records['pv'] = np.fromiter((row[1] for row in rows), dtype=np.float32, count=n)
+    records['sp'] = np.fromiter((row[2] for row in rows), dtype=np.float32, count=n)
+    records['out'] = np.fromiter((row[3] for row in rows), dtype=np.uint8, count=n)
+    return records
+
+
+class BufferedBinaryLog(BufferedCsvLog):
+    """Log em lote (ver registro_log.BufferedCsvLog) gravado no formato binário."""
+    _open_mode = 'ab'
+
+    def _open(self):
+        # Continuar um log exige que ele termine num registro inteiro: uma gravação
+        # interrompida deixaria os registros novos desalinhados (ilegíveis) no modo 'ab'.
+        if os.path.isfile(self.filepath):
+            size = os.path.getsize(self.filepath)
+            if size < HEADER_SIZE:
+                keep = 0  # cabeçalho incompleto: recomeça o arquivo
+            else:
+                with open(self.filepath, 'rb') as f:
+                    if not _valid_header(f.read(HEADER_SIZE)):
+                        raise OSError(f"{self.filepath} não é um log binário válido.")
+                keep = size - (size - HEADER_SIZE) % RECORD_DTYPE.itemsize
+            if keep != size:
+                os.truncate(self.filepath, keep)
+        super()._open()
+
+    def _write_header(self):
+        self._file.write(_header_bytes())
+
+    def _write_rows(self, rows):
+        self._file.write(to_records(rows).tobytes())
+
+
+class BinaryLog:
+    """
+    Leitura de um log binário mapeado em memória. As colunas são visões
+    sobre o arquivo, sem cópia; consultas por janela de tempo fazem busca
+    binária na coluna de horários (que é crescente).
+    """
+    def __init__(self, filepath):
+        self.filepath = filepath
+        with open(filepath, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError("Arquivo de log binário vazio ou truncado.")
+        if not _valid_header(header):
+            raise ValueError("Arquivo não é um log binário válido.")
+
+        # Um registro parcial no final (gravação interrompida) é ignorado
+        count = (os.path.getsize(filepath) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count:
+            self.records = np.memmap(filepath, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def times(self):
+        return self.records['t']
+
+    def range(self, start_time, end_time):
+        """Registros com start_time <= horário <= end_time (datetimes), como visão do arquivo."""
+        times = self.times
+        lo = np.searchsorted(times, start_time.timestamp(), side='left')
+        hi = np.searchsorted(times, end_time.timestamp(), side='right')
+        return self.records[lo:hi]
+
+    @staticmethod
+    def to_rows(records):
+        """Converte registros para linhas no layout do CSV (para exibir/exportar)."""
+        for t, pv, sp, out in records.tolist():
+            yield [datetime.fromtimestamp(t).strftime(LOG_TIME_FORMAT), f"{pv:.2f}", f"{sp:.1f}", out]
+
+
+def convert_csv(csv_path, binary_path, chunk_rows=65536):
+    """Converte um log CSV do ControllerTab para o formato binário. Retorna o número de registros."""
+    total = 0
+    with open(csv_path, 'r', encoding='utf-8') as src, open(binary_path, 'wb') as dst:
+        reader = csv.reader(src)
+        header = next(reader, None)
+        if header is not None and header[0] != LOG_HEADER[0]:
+            raise ValueError("Arquivo CSV não está no layout de log esperado.")
+        dst.write(_header_bytes())
+        rows = []
+        for row in reader:
+            if not row:
+                continue
+            rows.append((datetime.strptime(row[0], LOG_TIME_FORMAT), float(row[1]), float(row[2]), int(row[3])))
+            if len(rows) >= chunk_rows:
+                dst.write(to_records(rows).tobytes())
+                total += len(rows)
+                rows = []
+        if rows:
+            dst.write(to_records(rows).tobytes())
+            total += len(rows)
+    return total
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) != 3:
+        print(f"Uso: python log_binario.py <log.csv> <log{BINARY_EXT}>")
+        sys.exit(1)
+    n = convert_csv(sys.argv[1], sys.argv[2])
+    print(f"{n} registros convertidos para {sys.argv[2]}")
@@ -0,0 +1,204 @@
+# metricas.py
+
+import bisect
+import cProfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites dos baldes dos histogramas de tempo (s); fixos, para que observar
+# uma medição custe só uma busca binária e um incremento.
+BALDES_TEMPO_S = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                  0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIXO = "estufa_"
+PORTA_METRICAS_PADRAO = 9108
+
+
+class Histogram:
+    """Histograma de baldes fixos: contagens, soma e máximo das observações."""
+    def __init__(self, name, help_text, buckets=BALDES_TEMPO_S):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """Quantil aproximado pelo limite superior do balde que o contém."""
+        with self._lock:
+            counts, total, maximum = list(self.counts), self.count, self.max
+        if not total:
+            return 0.0
+        target = q * total
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= target:
+                return min(self.buckets[i], maximum) if i < len(self.buckets) else maximum
+        return maximum
+
+    def render(self):
+        with self._lock:
+            counts, total, total_sum = list(self.counts), self.count, self.sum
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {total}')
+        lines.append(f"{self.name}_sum {total_sum:.9g}")
+        lines.append(f"{self.name}_count {total}")
+        return lines
+
+
+class Counter:
+    """Contador monotônico."""
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter",
+                f"{self.name} {self.value}"]
+
+
+class _Timer:
+    """Gerenciador de contexto enxuto (sem gerador) usado por MetricsRegistry.timer."""
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """Conjunto de métricas nomeadas; criadas na primeira utilização."""
+    def __init__(self, prefix=PREFIXO):
+        self.prefix = prefix
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text):
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    metric = self.metrics[name] = cls(self.prefix + name, help_text or name)
+        return metric
+
+    def histogram(self, name, help_text=None):
+        return self._get(Histogram, name, help_text)
+
+    def counter(self, name, help_text=None):
+        return self._get(Counter, name, help_text)
+
+    def timer(self, name, help_text=None):
+        """Mede a duração de um bloco `with` no histograma `name` (em segundos)."""
+        return _Timer(self.histogram(name, help_text))
+
+    def histograms(self):
+        return [m for m in self.metrics.values() if isinstance(m, Histogram)]
+
+    def counters(self):
+        return [m for m in self.metrics.values() if isinstance(m, Counter)]
+
+    def render_prometheus(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registro único usado pela aplicação
+METRICS = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = METRICS
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(threading.Thread):
+    """
+    Expõe as métricas em formato texto do Prometheus (GET /metrics). Escuta
+    só em localhost por padrão.
+    """
+    def __init__(self, port=PORTA_METRICAS_PADRAO, host="127.0.0.1", registry=METRICS):
+        super().__init__(daemon=True, name="metricas-http")
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def run(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def profile_event_loop(root, seconds, filepath, on_done=None):
+    """
+    Perfila (cProfile) a thread da interface por `seconds` segundos e grava o
+    resultado em `filepath` (abra com `python -m pstats arquivo`). Deve ser
+    chamada na thread do Tk, a mesma do laço de eventos.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def finish():
+        profiler.disable()
+        profiler.dump_stats(filepath)
+        if on_done is not None:
+            on_done(filepath)
+
+    root.after(int(seconds * 1000), finish)
+    return profiler
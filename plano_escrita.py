@@ -0,0 +1,80 @@
+# plano_escrita.py
+
+from collections import namedtuple, OrderedDict
+
+# Limite do protocolo Modbus para a função 16 (Write Multiple Registers)
+MAX_REGS_POR_ESCRITA = 123
+
+# Uma requisição do plano: escreve `values` a partir de `start`. `requests`
+# guarda, por endereço, os pedidos atendidos (o último é o valor escrito;
+# os anteriores foram substituídos antes de chegar ao equipamento).
+WriteBlock = namedtuple("WriteBlock", ["start", "values", "requests"])
+
+# Resultado de um pedido de escrita depois de executado o plano
+WriteOutcome = namedtuple("WriteOutcome", ["request", "ok", "superseded"])
+
+
+def valid_register_value(value):
+    return isinstance(value, int) and 0 <= value <= 0xFFFF
+
+
+class WritePlan:
+    """
+    Plano de escrita: recebe os pedidos pendentes de uma conexão (qualquer
+    objeto com `address` e `value`, em ordem de chegada), mantém só o valor
+    mais recente de cada registro e junta registros contíguos numa única
+    escrita múltipla. Registros não pedidos nunca são escritos, ao contrário
+    do plano de leitura (plano_leitura.PollPlan), que aceita lacunas.
+    """
+    def __init__(self, requests, max_count=MAX_REGS_POR_ESCRITA):
+        self.max_count = max_count
+        self.invalid = []
+        self.blocks = self._build(requests)
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def _build(self, requests):
+        by_address = OrderedDict()
+        for req in requests:
+            if not valid_register_value(req.value):
+                self.invalid.append(req)
+                continue
+            by_address.setdefault(req.address, []).append(req)
+
+        blocks = []
+        start = None
+        values, members = [], OrderedDict()
+        for address in sorted(by_address):
+            reqs = by_address[address]
+            if start is not None and address == start + len(values) and len(values) < self.max_count:
+                values.append(reqs[-1].value)
+                members[address] = reqs
+                continue
+            if start is not None:
+                blocks.append(WriteBlock(start, values, members))
+            start, values, members = address, [reqs[-1].value], OrderedDict([(address, reqs)])
+        if start is not None:
+            blocks.append(WriteBlock(start, values, members))
+        return blocks
+
+    def execute(self, write_single, write_multiple, read_func=None):
+        """
+        Executa o plano com as funções de um ModbusClient
+        (`write_single_register`, `write_multiple_registers` e, para
+        confirmar, `read_holding_registers`). Com `read_func`, um bloco só é
+        considerado bem-sucedido se a releitura devolver os valores escritos.
+        Devolve um WriteOutcome por pedido, inclusive os substituídos.
+        """
+        outcomes = [WriteOutcome(req, False, False) for req in self.invalid]
+        for block in self.blocks:
+            if len(block.values) == 1:
+                ok = bool(write_single(block.start, block.values[0]))
+            else:
+                ok = bool(write_multiple(block.start, block.values))
+            if ok and read_func is not None:
+                ok = list(read_func(block.start, len(block.values)) or []) == block.values
+            for reqs in block.requests.values():
+                last = len(reqs) - 1
+                outcomes.extend(WriteOutcome(req, ok, i < last) for i, req in enumerate(reqs))
+        return outcomes
@@ -0,0 +1,74 @@
+# plano_leitura.py
+
+from collections import namedtuple
+
+# Limite do protocolo Modbus para a função 03 (Read Holding Registers)
+MAX_REGS_POR_LEITURA = 125
+
+# Quantos registros "sobrando" aceitamos ler entre duas faixas para juntá-las
+# numa única requisição (ler alguns registros a mais é bem mais barato que
+# uma nova ida e volta TCP).
+MAX_GAP_PADRAO = 16
+
+# Uma faixa de registros pedida por um consumidor (ex.: uma aba)
+RegisterRange = namedtuple("RegisterRange", ["key", "start", "count"])
+
+# Uma requisição do plano: lê `count` registros a partir de `start` e
+# atende as faixas em `members`.
+PollBlock = namedtuple("PollBlock", ["start", "count", "members"])
+
+
+class PollPlan:
+    """
+    Plano de leitura que agrupa as faixas de registros de vários
+    consumidores no menor número de requisições Modbus possível.
+    """
+    def __init__(self, ranges, max_gap=MAX_GAP_PADRAO, max_count=MAX_REGS_POR_LEITURA):
+        self.max_gap = max_gap
+        self.max_count = max_count
+        self.blocks = self._build(ranges)
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def _build(self, ranges):
+        blocks = []
+        start = end = None
+        members = []
+        for rng in sorted(ranges, key=lambda r: (r.start, r.count)):
+            if rng.count > self.max_count:
+                raise ValueError(f"Faixa '{rng.key}' excede {self.max_count} registros.")
+            rng_end = rng.start + rng.count
+            if (start is not None
+                    and rng.start - end <= self.max_gap
+                    and max(end, rng_end) - start <= self.max_count):
+                end = max(end, rng_end)
+                members.append(rng)
+                continue
+            if start is not None:
+                blocks.append(PollBlock(start, end - start, members))
+            start, end, members = rng.start, rng_end, [rng]
+        if start is not None:
+            blocks.append(PollBlock(start, end - start, members))
+        return blocks
+
+    def execute(self, read_func):
+        """
+        Executa o plano com `read_func(start, count)` (ex.: o
+        `read_holding_registers` de um ModbusClient) e devolve um dicionário
+        {key: regs}. Faixas de blocos cuja leitura falhou recebem None.
+        """
+        results = {}
+        for block in self.blocks:
+            results.update(self.split(block, read_func(block.start, block.count)))
+        return results
+
+    @staticmethod
+    def split(block, regs):
+        """Separa o resultado da leitura de um bloco entre as faixas que ele atende."""
+        if not regs or len(regs) < block.count:
+            return {rng.key: None for rng in block.members}
+        return {
+            rng.key: regs[rng.start - block.start: rng.start - block.start + rng.count]
+            for rng in block.members
+        }
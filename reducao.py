@@ -0,0 +1,153 @@
+# reducao.py
+#
+# Redução de séries para desenho: o gráfico não precisa de mais pontos do
+# que colunas de pixel. Dois métodos preservam a forma da curva:
+#   - envelope mín./máx. por coluna: mantém, em cada coluna, o primeiro, o
+#     último, o menor e o maior ponto. Picos nunca somem e o desenho
+#     reduzido é idêntico ao completo na resolução da tela;
+#   - LTTB (Largest-Triangle-Three-Buckets): um ponto por balde, o que
+#     forma o maior triângulo com os vizinhos; menos pontos, boa forma
+#     visual, mas picos isolados podem ser suavizados.
+# Em ambos, os pontos em que as séries auxiliares mudam (ex.: setpoint)
+# são mantidos dos dois lados da mudança, para o degrau continuar vertical.
+
+import math
+
+import numpy as np
+
+METODOS_REDUCAO = ("minmax", "lttb")
+METODO_PADRAO = "minmax"
+
+# Abaixo de PONTOS_POR_PIXEL pontos por coluna não compensa reduzir
+PONTOS_POR_PIXEL = 4
+LARGURA_MIN_PX = 100
+
+
+def _change_indices(series, n):
+    """Índices dos dois lados de cada mudança de valor nas séries auxiliares."""
+    found = []
+    for s in series:
+        changes = np.flatnonzero(s[1:] != s[:-1])
+        found.append(changes)
+        found.append(changes + 1)
+    return np.concatenate(found) if found else np.empty(0, dtype=np.intp)
+
+
+def minmax_indices(x, y, bucket_width, *others):
+    """
+    Índices (crescentes) do envelope mín./máx. de `y` em colunas de largura
+    `bucket_width` (na unidade de `x`, alinhadas em múltiplos dela), mais as
+    mudanças das séries em `others`. `x` deve ser crescente.
+    """
+    n = len(x)
+    if n <= 2:
+        return np.arange(n)
+    buckets = np.floor(x / bucket_width)
+    starts = np.concatenate(([0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1))
+    ends = np.append(starts[1:] - 1, n - 1)
+    bucket_of = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    idx = np.arange(n)
+    mins = np.minimum.reduceat(y, starts)
+    maxs = np.maximum.reduceat(y, starts)
+    argmin = np.minimum.reduceat(np.where(y == mins[bucket_of], idx, n), starts)
+    argmax = np.minimum.reduceat(np.where(y == maxs[bucket_of], idx, n), starts)
+    keep = np.concatenate((starts, ends, argmin, argmax, _change_indices(others, n)))
+    return np.unique(keep[keep < n])
+
+
+def lttb_indices(x, y, n_out, *others):
+    """Índices (crescentes) escolhidos pelo LTTB para `n_out` pontos, mais as mudanças de `others`."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Primeiro e último pontos fixos; o resto dividido em n_out - 2 baldes
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    chosen = np.empty(n_out, dtype=np.intp)
+    chosen[0], chosen[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Vértice seguinte: média do próximo balde (ou o último ponto)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        chosen[i + 1] = a
+    return np.unique(np.concatenate((chosen, _change_indices(others, n))))
+
+
+def reduce_series(x, y, width_px, *others, method=METODO_PADRAO):
+    """Reduz (x, y, *others) para cerca de `width_px` colunas; séries curtas passam inalteradas."""
+    n = len(x)
+    width_px = max(int(width_px), LARGURA_MIN_PX)
+    if n <= PONTOS_POR_PIXEL * width_px:
+        return (x, y) + tuple(others)
+    if method == "lttb":
+        idx = lttb_indices(x, y, width_px, *others)
+    else:
+        span = float(x[-1] - x[0]) or 1.0
+        idx = minmax_indices(x, y, span / width_px, *others)
+    return (x[idx], y[idx]) + tuple(s[idx] for s in others)
+
+
+class PlotDownsampler:
+    """
+    Redução incremental por envelope mín./máx. para uma série que só
+    cresce no fim (e pode perder pontos no início, como
+    historico.ZoneHistory).
+
+    A largura das colunas é arredondada para uma potência de 2 (na unidade
+    de x) e as colunas são alinhadas em múltiplos dela, de modo que uma
+    coluna completa não muda mais: seus pontos ficam guardados e, a cada
+    nova amostra, só a última coluna (a que ainda recebe pontos) é
+    recalculada. Pontos guardados que saíram do início do histórico são
+    descartados; a coluna mais antiga pode ficar com um envelope parcial.
+
+    Com method="lttb" a série inteira é reduzida a cada chamada.
+    """
+    def __init__(self, method=METODO_PADRAO):
+        if method not in METODOS_REDUCAO:
+            raise ValueError(f"Método de redução desconhecido: {method!r}")
+        self.method = method
+        self.reset()
+
+    def reset(self):
+        self._width = None
+        self._open_from = -math.inf
+        self._done = None  # tupla de arrays das colunas completas
+        self.points_in = 0
+        self.points_out = 0
+
+    def reduce(self, x, y, width_px, *others):
+        n = len(x)
+        width_px = max(int(width_px), LARGURA_MIN_PX)
+        self.points_in = n
+        if self.method == "lttb" or n <= PONTOS_POR_PIXEL * width_px:
+            # Séries curtas não são guardadas: quando crescerem, a redução recomeça do zero
+            self._width = None
+            result = reduce_series(x, y, width_px, *others, method=self.method)
+            self.points_out = len(result[0])
+            return result
+
+        span = float(x[-1] - x[0]) or 1.0
+        width = 2.0 ** math.ceil(math.log2(span / width_px))
+        series = (x, y) + tuple(others)
+        if width != self._width:
+            self._width = width
+            self._open_from = -math.inf
+            self._done = tuple(s[:0] for s in series)
+
+        start = int(np.searchsorted(x, self._open_from, side="left"))
+        idx = minmax_indices(x[start:], y[start:], width, *(s[start:] for s in others)) + start
+        last_start = math.floor(x[-1] / width) * width
+        closed = idx[x[idx] < last_start]
+        opened = idx[x[idx] >= last_start]
+
+        first = int(np.searchsorted(self._done[0], x[0], side="left"))
+        self._done = tuple(np.concatenate((d[first:], s[closed])) for d, s in zip(self._done, series))
+        self._open_from = last_start
+        result = tuple(np.concatenate((d, s[opened])) for d, s in zip(self._done, series))
+        self.points_out = len(result[0])
+        return result
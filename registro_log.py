@@ -0,0 +1,234 @@
+# registro_log.py
+
+import csv
+import io
+import os
+import threading
+import time
+from datetime import datetime
+
+from metricas import METRICS
+
+# --- Layout do CSV (mantido para que os relatórios existentes continuem funcionando) ---
+LOG_HEADER = ['Horário', 'Temperatura (°C)', 'Setpoint (°C)', 'Saida (0=OFF, 1=ON)']
+LOG_TIME_FORMAT = '%d/%m/%Y %H:%M:%S'
+
+# --- Políticas de descarga ---
+LINHAS_POR_LOTE = 200        # descarrega quando o lote atinge este tamanho...
+INTERVALO_DESCARGA_S = 2.0   # ...ou quando a linha mais antiga do lote tem esta idade
+
+# fsync: "never" (só o SO decide), "flush" (a cada descarga) ou "interval"
+FSYNC_NEVER = "never"
+FSYNC_FLUSH = "flush"
+FSYNC_INTERVAL = "interval"
+INTERVALO_FSYNC_S = 30.0
+
+# Rotação: por tamanho (bytes) e/ou por idade do arquivo (segundos). None desativa.
+ROTACAO_MAX_BYTES = 50 * 1024 * 1024
+ROTACAO_MAX_IDADE_S = None
+
+# Tempo de cada descarga em disco (gravação + flush + fsync), visto em metricas.METRICS
+_FLUSH_HIST = METRICS.histogram("log_flush_seconds", "Tempo de descarga de um lote de log no disco")
+
+
+def format_row(timestamp, pv, sp, output_state):
+    """Linha do log no formato usado desde as primeiras versões do painel."""
+    return [timestamp.strftime(LOG_TIME_FORMAT), f"{pv:.2f}", f"{sp:.1f}", output_state]
+
+
+def rotated_name(filepath, when):
+    """Nome do arquivo rotacionado: log_estufa_1.csv -> log_estufa_1.20240101-120000.csv"""
+    root, ext = os.path.splitext(filepath)
+    name = f"{root}.{when.strftime('%Y%m%d-%H%M%S')}{ext}"
+    counter = 1
+    while os.path.exists(name):
+        name = f"{root}.{when.strftime('%Y%m%d-%H%M%S')}-{counter}{ext}"
+        counter += 1
+    return name
+
+
+class BufferedCsvLog:
+    """
+    Um arquivo de log CSV com um único handle aberto. As linhas ficam num
+    lote em memória e são gravadas pela thread do LogManager.
+
+    Subclasses trocam o formato no disco sobrescrevendo `_open_mode`,
+    `_write_header` e `_write_rows`.
+    """
+    _open_mode = 'a'
+
+    def __init__(self, manager, filepath, batch_rows=LINHAS_POR_LOTE, flush_interval_s=INTERVALO_DESCARGA_S,
+                 fsync_policy=FSYNC_NEVER, fsync_interval_s=INTERVALO_FSYNC_S,
+                 rotate_max_bytes=ROTACAO_MAX_BYTES, rotate_max_age_s=ROTACAO_MAX_IDADE_S):
+        self.manager = manager
+        self.filepath = filepath
+        self.batch_rows = batch_rows
+        self.flush_interval_s = flush_interval_s
+        self.fsync_policy = fsync_policy
+        self.fsync_interval_s = fsync_interval_s
+        self.rotate_max_bytes = rotate_max_bytes
+        self.rotate_max_age_s = rotate_max_age_s
+
+        self._lock = threading.Lock()      # protege o lote
+        self._io_lock = threading.Lock()   # serializa retirada do lote/escrita/rotação/fechamento
+        self._pending = []
+        self._oldest = None
+        self._last_fsync = time.monotonic()
+        self._file = None
+        self.closed = False
+        self._open()
+
+    def _open(self):
+        # Só escreve o cabeçalho se o arquivo for novo
+        file_exists = os.path.isfile(self.filepath) and os.path.getsize(self.filepath) > 0
+        if 'b' in self._open_mode:
+            self._file = open(self.filepath, self._open_mode)
+        else:
+            self._file = open(self.filepath, self._open_mode, newline='', encoding='utf-8')
+        self._opened_at = time.monotonic()
+        if not file_exists:
+            self._write_header()
+            self._file.flush()
+
+    def _write_header(self):
+        csv.writer(self._file).writerow(LOG_HEADER)
+
+    def _write_rows(self, rows):
+        buf = io.StringIO()
+        csv.writer(buf).writerows(format_row(*row) for row in rows)
+        self._file.write(buf.getvalue())
+
+    def append(self, timestamp, pv, sp, output_state):
+        """Enfileira uma linha; não faz I/O na thread de quem chama."""
+        with self._lock:
+            if self.closed:
+                return
+            self._pending.append((timestamp, pv, sp, output_state))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._pending) >= self.batch_rows
+        if full:
+            self.manager.wake()
+
+    def due(self, now):
+        with self._lock:
+            return bool(self._pending) and (
+                len(self._pending) >= self.batch_rows or now - self._oldest >= self.flush_interval_s)
+
+    def flush(self):
+        """Grava o lote pendente no disco (chamado pela thread do LogManager)."""
+        # O lote é retirado e gravado sob a mesma trava de I/O: duas descargas
+        # simultâneas (thread do LogManager e close()) não gravam lotes fora de ordem.
+        with self._io_lock:
+            with self._lock:
+                rows, self._pending, self._oldest = self._pending, [], None
+            if self._file is None:
+                if not rows:
+                    return
+                self._open()  # uma rotação anterior não conseguiu reabrir o arquivo
+            if rows:
+                start = time.perf_counter()
+                self._write_rows(rows)
+                self._file.flush()
+                now = time.monotonic()
+                if self.fsync_policy == FSYNC_FLUSH or (
+                        self.fsync_policy == FSYNC_INTERVAL and now - self._last_fsync >= self.fsync_interval_s):
+                    os.fsync(self._file.fileno())
+                    self._last_fsync = now
+                _FLUSH_HIST.observe(time.perf_counter() - start)
+            self._maybe_rotate()
+
+    def _maybe_rotate(self):
+        by_size = self.rotate_max_bytes is not None and self._file.tell() >= self.rotate_max_bytes
+        by_age = (self.rotate_max_age_s is not None
+                  and time.monotonic() - self._opened_at >= self.rotate_max_age_s)
+        if not (by_size or by_age):
+            return
+        if self.fsync_policy != FSYNC_NEVER:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        try:
+            os.replace(self.filepath, rotated_name(self.filepath, datetime.now()))
+        finally:
+            # Se a renomeação falhar, continua gravando no mesmo arquivo
+            self._open()
+
+    def close(self):
+        """Descarrega o que falta e fecha o arquivo."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                if self.fsync_policy != FSYNC_NEVER:
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+        self.manager.discard(self)
+
+
+class LogManager:
+    """
+    Gerencia todos os logs abertos do painel com uma única thread de
+    gravação em segundo plano, que descarrega cada log quando o lote
+    atinge o tamanho ou a idade configurados.
+    """
+    def __init__(self, poll_interval_s=0.5):
+        self.poll_interval_s = poll_interval_s
+        self._logs = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def open(self, filepath, **options):
+        """
+        Abre (ou continua) um log. Arquivos com extensão BINARY_EXT usam o
+        formato binário de log_binario; os demais, CSV. Lança OSError se o
+        arquivo não puder ser criado.
+        """
+        from log_binario import BINARY_EXT, BufferedBinaryLog
+        log_class = BufferedBinaryLog if filepath.lower().endswith(BINARY_EXT) else BufferedCsvLog
+        log = log_class(self, filepath, **options)
+        with self._lock:
+            self._logs.add(log)
+        return log
+
+    def discard(self, log):
+        with self._lock:
+            self._logs.discard(log)
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop:
+            self._wake.wait(self.poll_interval_s)
+            self._wake.clear()
+            now = time.monotonic()
+            with self._lock:
+                logs = list(self._logs)
+            for log in logs:
+                if log.due(now):
+                    try:
+                        log.flush()
+                    except Exception as e:
+                        # Qualquer erro é informado; a thread segue atendendo os outros logs
+                        print(f"Erro de log em {log.filepath}: {e}")
+
+    def close_all(self):
+        """Descarrega e fecha todos os logs e encerra a thread de gravação."""
+        with self._lock:
+            logs = list(self._logs)
+        for log in logs:
+            try:
+                log.close()
+            except Exception as e:
+                print(f"Erro ao fechar log {log.filepath}: {e}")
+        self._stop = True
+        self._wake.set()
+        self._thread.join(timeout=2)
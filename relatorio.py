@@ -0,0 +1,270 @@
+# relatorio.py
+
+import csv
+import math
+from datetime import datetime, timedelta
+
+from registro_log import LOG_HEADER
+
+# Tamanho aproximado de cada bloco lido do arquivo (bytes)
+TAMANHO_BLOCO = 1 << 20
+
+# Intervalos entre amostras maiores que este valor são tratados como falha
+# no log (ex.: log parado) e não entram nos tempos acima/abaixo/ligado.
+MAX_INTERVALO_S = 300.0
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class TimestampParser:
+    """
+    Parser especializado para o layout fixo 'DD/MM/AAAA HH:MM:SS' do log.
+
+    Devolve segundos desde 01/01/1970 (horário local, sem fuso), o que
+    basta para comparar janelas e medir intervalos. A parte da data muda
+    raramente entre linhas consecutivas, então ela é memorizada.
+    """
+    def __init__(self):
+        self._day_cache = {}
+
+    def seconds(self, text):
+        if (len(text) != 19 or text[2] != '/' or text[5] != '/' or text[10] != ' '
+                or text[13] != ':' or text[16] != ':'):
+            raise ValueError(f"Horário fora do formato DD/MM/AAAA HH:MM:SS: {text!r}")
+        day = text[:10]
+        base = self._day_cache.get(day)
+        if base is None:
+            base = (datetime(int(text[6:10]), int(text[3:5]), int(text[0:2])) - _EPOCH).total_seconds()
+            if len(self._day_cache) > 4096:
+                self._day_cache.clear()
+            self._day_cache[day] = base
+        hour, minute, second = int(text[11:13]), int(text[14:16]), int(text[17:19])
+        if hour > 23 or minute > 59 or second > 59:
+            raise ValueError(f"Horário inválido: {text!r}")
+        return base + hour * 3600 + minute * 60 + second
+
+    def datetime(self, text):
+        """Equivalente rápido de datetime.strptime(text, '%d/%m/%Y %H:%M:%S')."""
+        return _EPOCH + timedelta(seconds=self.seconds(text))
+
+
+def to_seconds(dt):
+    """Converte um datetime para a mesma escala de TimestampParser.seconds."""
+    return (dt.replace(tzinfo=None) - _EPOCH).total_seconds()
+
+
+class ReportStats:
+    """
+    Agregados de um período, calculados em uma única passada e com memória
+    constante. Parciais calculados em pedaços consecutivos do log podem ser
+    combinados com `merge`.
+    """
+    def __init__(self, max_gap_s=MAX_INTERVALO_S):
+        self.max_gap_s = max_gap_s
+        self.count = 0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.time_total = 0.0
+        self.time_above = 0.0
+        self.time_below = 0.0
+        self.time_on = 0.0
+        self.first_t = None
+        self.last = None  # (t, pv, sp, saída) da última amostra
+
+    def _add_interval(self, dt, pv, sp, output_state):
+        # O intervalo até a próxima amostra é atribuído ao estado da amostra anterior
+        if 0 < dt <= self.max_gap_s:
+            self.time_total += dt
+            if pv > sp:
+                self.time_above += dt
+            elif pv < sp:
+                self.time_below += dt
+            if output_state:
+                self.time_on += dt
+
+    def add(self, t, pv, sp, output_state):
+        """Acumula uma amostra (t em segundos, em ordem crescente)."""
+        if self.last is not None:
+            self._add_interval(t - self.last[0], *self.last[1:])
+        else:
+            self.first_t = t
+        self.last = (t, pv, sp, output_state)
+        self.count += 1
+        self.sum += pv
+        self.sum_sq += pv * pv
+        if pv < self.min:
+            self.min = pv
+        if pv > self.max:
+            self.max = pv
+
+    def add_arrays(self, t, pv, sp, output_state):
+        """Acumula amostras vindas de arrays NumPy (ex.: log binário), de forma vetorizada."""
+        n = len(t)
+        if not n:
+            return
+        import numpy as np
+        t = np.asarray(t, dtype=np.float64)
+        pv = np.asarray(pv, dtype=np.float64)
+        sp = np.asarray(sp, dtype=np.float64)
+        output_state = np.asarray(output_state)
+
+        if self.last is not None:
+            self._add_interval(t[0] - self.last[0], *self.last[1:])
+        else:
+            self.first_t = float(t[0])
+        self.count += n
+        self.sum += float(pv.sum())
+        self.sum_sq += float((pv * pv).sum())
+        self.min = min(self.min, float(pv.min()))
+        self.max = max(self.max, float(pv.max()))
+
+        dt = np.diff(t)
+        valid = (dt > 0) & (dt <= self.max_gap_s)
+        dt = np.where(valid, dt, 0.0)
+        self.time_total += float(dt.sum())
+        self.time_above += float(dt[pv[:-1] > sp[:-1]].sum())
+        self.time_below += float(dt[pv[:-1] < sp[:-1]].sum())
+        self.time_on += float(dt[output_state[:-1] != 0].sum())
+        self.last = (float(t[-1]), float(pv[-1]), float(sp[-1]), int(output_state[-1]))
+
+    def merge(self, other):
+        """Combina com os agregados de um pedaço posterior do log."""
+        if not other.count:
+            return self
+        if self.last is not None and other.first_t is not None:
+            self._add_interval(other.first_t - self.last[0], *self.last[1:])
+        if self.first_t is None:
+            self.first_t = other.first_t
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.time_total += other.time_total
+        self.time_above += other.time_above
+        self.time_below += other.time_below
+        self.time_on += other.time_on
+        self.last = other.last
+        return self
+
+    def combine(self, other):
+        """
+        Soma os agregados de uma série independente (ex.: outra zona): ao
+        contrário de `merge`, não liga a última amostra de uma à primeira da outra.
+        """
+        if not other.count:
+            return self
+        self.first_t = other.first_t if self.first_t is None else min(self.first_t, other.first_t)
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.time_total += other.time_total
+        self.time_above += other.time_above
+        self.time_below += other.time_below
+        self.time_on += other.time_on
+        if self.last is None or other.last[0] > self.last[0]:
+            self.last = other.last
+        return self
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        if not self.count:
+            return 0.0
+        return math.sqrt(max(0.0, self.sum_sq / self.count - self.mean ** 2))
+
+    @property
+    def duty_cycle(self):
+        """Fração do tempo com o aquecedor ligado (0 a 1)."""
+        return self.time_on / self.time_total if self.time_total else 0.0
+
+
+def _is_binary(filepath):
+    from log_binario import BINARY_EXT
+    return filepath.lower().endswith(BINARY_EXT)
+
+
+def _iter_csv_chunks(filepath, chunk_bytes=TAMANHO_BLOCO):
+    """Lê o CSV em blocos de linhas, pulando o cabeçalho."""
+    with open(filepath, 'r', encoding='utf-8') as csvfile:
+        next(csvfile, None)
+        while True:
+            lines = csvfile.readlines(chunk_bytes)
+            if not lines:
+                return
+            yield csv.reader(lines)
+
+
+def compute_stats(filepath, start_time, end_time, max_gap_s=MAX_INTERVALO_S):
+    """
+    Estatísticas do período [start_time, end_time] de um log (CSV ou binário).
+    Logs CSV passam pelo cache de cache_log: relatórios seguidos sobre o
+    mesmo arquivo não o interpretam de novo, e um log que cresceu só tem as
+    linhas novas lidas.
+    """
+    if _is_binary(filepath):
+        stats = ReportStats(max_gap_s)
+        from log_binario import BinaryLog
+        records = BinaryLog(filepath).range(start_time, end_time)
+        stats.add_arrays(records['t'], records['pv'], records['sp'], records['out'])
+        return stats
+    from cache_log import LOG_CACHE
+    return LOG_CACHE.stats(filepath, start_time, end_time, max_gap_s)
+
+
+def scan_stats(filepath, start_time, end_time, max_gap_s=MAX_INTERVALO_S):
+    """Estatísticas de um log CSV numa passada linha a linha, sem cache (referência)."""
+    stats = ReportStats(max_gap_s)
+    parser = TimestampParser()
+    start, end = to_seconds(start_time), to_seconds(end_time)
+    add = stats.add
+    for rows in _iter_csv_chunks(filepath):
+        for row in rows:
+            if not row:
+                continue
+            t = parser.seconds(row[0])
+            if start <= t <= end:
+                add(t, float(row[1]), float(row[2]), int(row[3]))
+    return stats
+
+
+def iter_rows(filepath, start_time, end_time):
+    """Linhas do período no layout do CSV; só materializadas quando o usuário pede."""
+    if _is_binary(filepath):
+        from log_binario import BinaryLog
+        yield from BinaryLog.to_rows(BinaryLog(filepath).range(start_time, end_time))
+        return
+
+    parser = TimestampParser()
+    start, end = to_seconds(start_time), to_seconds(end_time)
+    for rows in _iter_csv_chunks(filepath):
+        for row in rows:
+            if row and start <= parser.seconds(row[0]) <= end:
+                yield row
+
+
+def first_timestamp(filepath):
+    """Horário (datetime) da primeira amostra do log, ou None se o log estiver vazio."""
+    if _is_binary(filepath):
+        from log_binario import BinaryLog
+        times = BinaryLog(filepath).times
+        return datetime.fromtimestamp(float(times[0])) if len(times) else None
+    with open(filepath, 'r', encoding='utf-8') as csvfile:
+        next(csvfile, None)
+        line = next(csvfile, '')
+    return TimestampParser().datetime(line[:19]) if line.strip() else None
+
+
+def read_header(filepath):
+    """Cabeçalho do log (o binário usa o mesmo layout de colunas do CSV)."""
+    if _is_binary(filepath):
+        return list(LOG_HEADER)
+    with open(filepath, 'r', encoding='utf-8') as csvfile:
+        return next(csv.reader(csvfile), list(LOG_HEADER))
@@ -0,0 +1,242 @@
+# relatorio_frota.py
+#
+# Relatório da frota: estatísticas de um período para muitas zonas, cada
+# uma com vários logs (o log atual e os rotacionados). Os arquivos são
+# divididos em pedaços, processados num pool de processos e os parciais
+# (relatorio.ReportStats) são combinados por zona e para a frota inteira.
+#
+# Uso: python relatorio_frota.py logs/ --inicio "01/05/2024 00:00:00" \
+#          --fim "31/05/2024 23:59:59" --workers 8 --saida frota.csv
+
+import argparse
+import csv
+import os
+import re
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from log_binario import BINARY_EXT
+from relatorio import _EPOCH, MAX_INTERVALO_S, ReportStats, TimestampParser, to_seconds
+
+# Tamanho de cada pedaço de CSV enviado ao pool (bytes)
+TAMANHO_TAREFA = 32 << 20
+# Leitura dentro de um pedaço (bytes)
+TAMANHO_LEITURA = 8 << 20
+
+FORMATO_DATA = '%d/%m/%Y %H:%M:%S'
+
+# log_estufa_1.csv, log_estufa_1.20240101-120000.csv, log_estufa_1.20240101-120000-1.csv
+_LOG_RE = re.compile(r"^(?P<zone>.+?)(?P<rotation>\.\d{8}-\d{6}(?:-\d+)?)?(?P<ext>\.csv|" + re.escape(BINARY_EXT) + r")$",
+                     re.IGNORECASE)
+
+# Um pedaço de trabalho: bytes [lo, hi) de um arquivo (hi None = até o fim)
+ScanTask = namedtuple("ScanTask", ["zone", "path", "lo", "hi"])
+
+FLEET_FIELDS = ["zona", "amostras", "media", "desvio", "minimo", "maximo", "ciclo_trabalho",
+                "tempo_acima_s", "tempo_abaixo_s", "tempo_total_s"]
+FROTA = "FROTA"
+
+
+class FleetReport:
+    """Resultado de um relatório da frota: ReportStats por zona e da frota inteira."""
+    def __init__(self, zones, fleet, files, bytes_scanned, elapsed_s):
+        self.zones = zones
+        self.fleet = fleet
+        self.files = files
+        self.bytes_scanned = bytes_scanned
+        self.elapsed_s = elapsed_s
+
+    def rows(self):
+        """Linhas do resultado (uma por zona e a da frota), na ordem de FLEET_FIELDS."""
+        items = list(self.zones.items()) + [(FROTA, self.fleet)]
+        return [[name, s.count, round(s.mean, 3), round(s.std, 3),
+                 round(s.min, 2) if s.count else "", round(s.max, 2) if s.count else "",
+                 round(s.duty_cycle, 4), round(s.time_above), round(s.time_below), round(s.time_total)]
+                for name, s in items]
+
+    def write_csv(self, filepath):
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(FLEET_FIELDS)
+            writer.writerows(self.rows())
+
+
+def zone_of(filename):
+    """Zona de um arquivo de log pelo nome, ignorando o sufixo de rotação; None se não for um log."""
+    match = _LOG_RE.match(os.path.basename(filename))
+    if match is None:
+        return None
+    zone = match.group("zone")
+    return zone[4:] if zone.startswith("log_") else zone
+
+
+def natural_key(name):
+    """Chave de ordenação com os números em valor: estufa_2 antes de estufa_10."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def discover(paths):
+    """
+    Agrupa por zona os logs encontrados em `paths` (arquivos ou pastas,
+    sem recursão). Devolve {zona: [arquivos em ordem cronológica]}, com as
+    zonas em ordem natural (estufa_2 antes de estufa_10).
+    """
+    zones = {}
+    for path in paths:
+        names = [os.path.join(path, n) for n in sorted(os.listdir(path))] if os.path.isdir(path) else [path]
+        for name in names:
+            zone = zone_of(name)
+            if zone is not None and os.path.isfile(name):
+                zones.setdefault(zone, []).append(name)
+    # Rotacionados em ordem de nome (o sufixo é a data); o log atual por último
+    for files in zones.values():
+        files.sort(key=lambda f: (_LOG_RE.match(os.path.basename(f)).group("rotation") is None,
+                                  os.path.basename(f)))
+    return OrderedDict(sorted(zones.items(), key=lambda item: natural_key(item[0])))
+
+
+def _time_span(path):
+    """(primeiro, último) horário de um log CSV em segundos, lendo só o início e o fim; None se não der."""
+    parser = TimestampParser()
+    try:
+        with open(path, 'rb') as f:
+            f.readline()
+            first = f.readline()
+            size = f.seek(0, 2)
+            f.seek(max(0, size - 512))
+            lines = [line for line in f.read().splitlines() if line.strip()]
+        return parser.seconds(first[:19].decode('ascii')), parser.seconds(lines[-1][:19].decode('ascii'))
+    except (OSError, ValueError, IndexError, UnicodeDecodeError):
+        return None
+
+
+def plan_tasks(zones, start_s, end_s, task_bytes=TAMANHO_TAREFA):
+    """Divide os arquivos em pedaços, descartando logs CSV inteiramente fora da janela."""
+    tasks = []
+    for zone, files in zones.items():
+        for path in files:
+            if path.lower().endswith(BINARY_EXT):
+                tasks.append(ScanTask(zone, path, 0, None))
+                continue
+            span = _time_span(path)
+            if span is not None and (span[1] < start_s or span[0] > end_s):
+                continue
+            size = os.path.getsize(path)
+            for lo in range(0, size, task_bytes):
+                tasks.append(ScanTask(zone, path, lo, min(lo + task_bytes, size)))
+    return tasks
+
+
+def _line_start(f, offset):
+    """Início da primeira linha que começa em `offset` ou depois (a linha 0 é o cabeçalho)."""
+    if offset == 0:
+        f.seek(0)
+    else:
+        f.seek(offset - 1)
+        if f.read(1) == b"\n":
+            return offset
+    f.readline()
+    return f.tell()
+
+
+def scan_task(task, start_s, end_s, max_gap_s=MAX_INTERVALO_S):
+    """
+    Estatísticas das amostras de um pedaço dentro da janela [start_s, end_s].
+    Cada linha pertence ao pedaço em que começa. Roda nos processos do pool.
+    """
+    stats = ReportStats(max_gap_s)
+    if task.path.lower().endswith(BINARY_EXT):
+        from log_binario import BinaryLog
+        records = BinaryLog(task.path).range(_EPOCH + timedelta(seconds=start_s), _EPOCH + timedelta(seconds=end_s))
+        stats.add_arrays(records['t'], records['pv'], records['sp'], records['out'])
+        return task, stats
+
+    from cache_log import parse_block
+    with open(task.path, 'rb') as f:
+        pos = _line_start(f, task.lo)
+        stop = _line_start(f, task.hi)
+        f.seek(pos)
+        pending = b""
+        while pos < stop:
+            data = pending + f.read(min(TAMANHO_LEITURA, stop - pos - len(pending)))
+            if pos + len(data) == stop and not data.endswith(b"\n"):
+                data += b"\n"  # última linha do arquivo sem quebra
+            _, t, pv, sp, out, used = parse_block(data, pos)
+            if not used:
+                raise ValueError(f"Linha maior que {TAMANHO_LEITURA} bytes em {task.path}")
+            window = (t >= start_s) & (t <= end_s)
+            if window.any():
+                stats.add_arrays(t[window], pv[window], sp[window], out[window])
+            pending = data[used:]
+            pos += used
+    return task, stats
+
+
+def run_fleet_report(zones, start_time, end_time, workers=None, max_gap_s=MAX_INTERVALO_S,
+                     task_bytes=TAMANHO_TAREFA, progress=None):
+    """
+    Relatório do período para {zona: [arquivos]} (ver `discover`).
+    `progress(feitos, total)` é chamado a cada pedaço concluído (na thread
+    que chamou esta função). workers=1 processa tudo no próprio processo.
+    """
+    started = time.perf_counter()
+    start_s, end_s = to_seconds(start_time), to_seconds(end_time)
+    tasks = plan_tasks(zones, start_s, end_s, task_bytes)
+    total_bytes = sum(os.path.getsize(t.path) if t.hi is None else t.hi - t.lo for t in tasks)
+    partials = []
+    if workers == 1:
+        for i, task in enumerate(tasks):
+            partials.append(scan_task(task, start_s, end_s, max_gap_s))
+            if progress:
+                progress(i + 1, len(tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(scan_task, task, start_s, end_s, max_gap_s) for task in tasks]
+            for i, future in enumerate(as_completed(futures)):
+                partials.append(future.result())
+                if progress:
+                    progress(i + 1, len(tasks))
+
+    # Pedaços de uma zona são consecutivos no tempo: ligados em ordem com merge
+    order = {(zone, path): (i, j) for i, (zone, files) in enumerate(zones.items()) for j, path in enumerate(files)}
+    partials.sort(key=lambda p: (order[(p[0].zone, p[0].path)], p[0].lo))
+    per_zone = OrderedDict((zone, ReportStats(max_gap_s)) for zone in zones)
+    for task, stats in partials:
+        per_zone[task.zone].merge(stats)
+    fleet = ReportStats(max_gap_s)
+    for stats in per_zone.values():
+        fleet.combine(stats)
+    return FleetReport(per_zone, fleet, len({t.path for t in tasks}), total_bytes, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatório de um período para todas as zonas (logs e rotacionados).")
+    parser.add_argument("caminhos", nargs="+", help="pastas ou arquivos de log")
+    parser.add_argument("--inicio", required=True, help="DD/MM/AAAA HH:MM:SS")
+    parser.add_argument("--fim", required=True, help="DD/MM/AAAA HH:MM:SS")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: todos os núcleos)")
+    parser.add_argument("--saida", help="grava o resultado em CSV")
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.inicio, FORMATO_DATA)
+    end = datetime.strptime(args.fim, FORMATO_DATA)
+    zones = discover(args.caminhos)
+    if not zones:
+        raise SystemExit("Nenhum log encontrado.")
+    report = run_fleet_report(zones, start, end, args.workers)
+
+    print(f"{len(zones)} zonas, {report.files} arquivos, {report.bytes_scanned / 2**20:.1f} MiB "
+          f"em {report.elapsed_s:.2f}s ({report.bytes_scanned / 2**20 / report.elapsed_s:.0f} MiB/s)")
+    print(f"{'zona':24s} {'amostras':>10s} {'média':>8s} {'mín':>7s} {'máx':>7s} {'ciclo':>7s}")
+    for row in report.rows():
+        name, count, mean, _, low, high, duty = row[:7]
+        print(f"{name:24s} {count:10d} {mean:8.2f} {low!s:>7} {high!s:>7} {duty * 100:6.1f}%")
+    if args.saida:
+        report.write_csv(args.saida)
+        print(f"Resultado gravado em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
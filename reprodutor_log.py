@@ -0,0 +1,283 @@
+# reprodutor_log.py
+#
+# Reprodutor de logs: publica o histórico gravado pelo painel (CSV de
+# ControllerTab/gravador) no DataBank de um servidor Modbus, nos mesmos
+# registros de cada zona (SP, PV e saída relativos ao offset), como se
+# fosse o equipamento. Serve para reproduzir ocorrências de campo e para
+# testar a carga do painel sem o simulador.
+#
+# Os arquivos são lidos em blocos pequenos (memória limitada por zona, seja
+# qual for o tamanho do log). Todas as zonas seguem a mesma linha do tempo:
+# o relógio do log avança `speed` vezes mais rápido que o real, a partir do
+# primeiro horário entre todas as zonas. O agendamento é absoluto (cada
+# amostra tem o seu instante de publicação calculado a partir do início),
+# de modo que atrasos não se acumulam; se várias amostras de uma zona
+# vencem no mesmo despertar, só a última é publicada.
+#
+# Escritas de clientes nos registros de SP/PV/saída são sobrescritas pela
+# amostra seguinte do log.
+#
+# Os offsets vêm do registro de equipamentos (--config), casando o nome de
+# cada log com o da zona; sem ele, são sequenciais na ordem natural das zonas.
+#
+# Uso: python reprodutor_log.py logs/ --velocidade 100 --loop --port 5020 [--config dispositivos.json]
+
+import argparse
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from cache_log import parse_block
+from relatorio_frota import discover, zone_of
+from simulador_contemp import (REG_HISTERESE_REL, REG_INTERVALO_REL, REG_MODO_REL, REG_OUTPUT_REL, REG_PV_REL,
+                               REG_SETPOINT_REL, SERVER_HOST, SERVER_PORT)
+
+VELOCIDADE_MIN = 1.0
+VELOCIDADE_MAX = 1000.0
+# Bytes lidos de cada log por vez (~8 mil linhas, meio dia de log a cada 5 s)
+TAMANHO_LEITURA = 256 << 10
+# Espera máxima entre verificações de parada (s)
+ESPERA_MAX_S = 0.05
+
+# Uma zona a reproduzir: nome, arquivos em ordem cronológica e offset dos registros
+ReplayZone = namedtuple("ReplayZone", ["name", "files", "offset"])
+
+
+class LogStream:
+    """
+    Leitura sequencial das amostras de uma zona (um ou mais arquivos CSV,
+    em ordem), em blocos de `block_bytes`. `advance_to(t)` consome as
+    amostras até o horário t. O arquivo só fica aberto durante a leitura
+    de um bloco, então o número de zonas não esbarra no limite de arquivos
+    abertos do sistema.
+    """
+    def __init__(self, files, block_bytes=TAMANHO_LEITURA):
+        self.files = list(files)
+        self.block_bytes = block_bytes
+        self.rewind()
+
+    def rewind(self):
+        self._file_index = 0
+        self._pos = None  # posição de `_pending` no arquivo atual; None = arquivo ainda não aberto
+        self._pending = b""
+        self._t = np.empty(0)
+        self._i = 0
+        self.consumed = 0
+        self.last_time = None  # horário da última amostra consumida
+        self.finished = False
+        self._load()
+
+    def _read_block(self):
+        """Próximo bloco de amostras, passando ao arquivo seguinte quando o atual acaba; False no fim."""
+        while self._file_index < len(self.files):
+            with open(self.files[self._file_index], "rb") as f:
+                if self._pos is None:
+                    f.readline()  # cabeçalho
+                    self._pos = f.tell()
+                f.seek(self._pos + len(self._pending))
+                chunk = f.read(self.block_bytes)
+            data = self._pending + chunk
+            if chunk:
+                _, t, pv, sp, out, used = parse_block(data)
+                self._pending = data[used:]
+                self._pos += used
+            else:
+                self._file_index += 1
+                self._pos, self._pending = None, b""
+                if not data.strip():
+                    continue
+                _, t, pv, sp, out, _ = parse_block(data + b"\n")  # última linha sem quebra
+            if len(t):
+                self._t, self._pv, self._sp, self._out = t, pv, sp, out
+                self._i = 0
+                return True
+        return False
+
+    def _load(self):
+        if not self._read_block():
+            self.finished = True
+
+    @property
+    def next_time(self):
+        """Horário da próxima amostra (a que ainda não foi publicada); inf no fim do log."""
+        return math.inf if self.finished else float(self._t[self._i])
+
+    def advance_to(self, t):
+        """Consome as amostras até o horário `t`; devolve (pv, sp, saída) da última, ou None se nenhuma."""
+        last = None
+        while not self.finished and self._t[self._i] <= t:
+            j = int(np.searchsorted(self._t, t, side="right")) - 1
+            last = (float(self._pv[j]), float(self._sp[j]), int(self._out[j]))
+            self.consumed += j + 1 - self._i
+            self.last_time = float(self._t[j])
+            self._i = j + 1
+            if self._i >= len(self._t):
+                self._load()
+        return last
+
+
+def _to_register(value):
+    """Temperatura -> registro (décimos de °C), limitado à faixa de um registro."""
+    return min(max(int(round(value * 10)), 0), 0xFFFF)
+
+
+def _registers(pv, sp, out):
+    """Valores dos registros SP, PV e saída de uma zona (relativos 0 a 2, contíguos)."""
+    block = [0] * (max(REG_SETPOINT_REL, REG_PV_REL, REG_OUTPUT_REL) + 1)
+    block[REG_SETPOINT_REL] = _to_register(sp)
+    block[REG_PV_REL] = _to_register(pv)
+    block[REG_OUTPUT_REL] = 1 if out else 0
+    return block
+
+
+class LogReplayer:
+    """
+    Publica as amostras de várias zonas no `data_bank` no ritmo do log
+    multiplicado por `speed`. Com `loop`, recomeça do início quando todas
+    as zonas chegam ao fim. Rode `run()` numa thread e pare com `stop()`.
+    """
+    def __init__(self, data_bank, zones, speed=1.0, loop=False, block_bytes=TAMANHO_LEITURA):
+        if not VELOCIDADE_MIN <= speed <= VELOCIDADE_MAX:
+            raise ValueError(f"Velocidade deve estar entre {VELOCIDADE_MIN:g}x e {VELOCIDADE_MAX:g}x.")
+        self.data_bank = data_bank
+        self.zones = list(zones)
+        self.speed = float(speed)
+        self.loop = loop
+        self.streams = [LogStream(z.files, block_bytes) for z in self.zones]
+        self._stop = threading.Event()
+
+        # Estatísticas: amostras publicadas, puladas (vencidas no mesmo despertar) e atraso de publicação
+        self.published = 0
+        self.skipped = 0
+        self.cycles = 0
+        self.lag_max_s = 0.0
+        self._lag_sum = 0.0
+        self._lag_count = 0
+
+        for z in self.zones:
+            for rel, value in ((REG_HISTERESE_REL, 10), (REG_MODO_REL, 1), (REG_INTERVALO_REL, 5)):
+                data_bank.set_holding_registers(z.offset + rel, [value])
+
+    @property
+    def lag_mean_s(self):
+        return self._lag_sum / self._lag_count if self._lag_count else 0.0
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, duration_s=None):
+        """Reproduz até o fim dos logs (ou indefinidamente com `loop`), `duration_s` ou `stop()`."""
+        started = time.monotonic()
+        deadline = started + duration_s if duration_s else math.inf
+        while not self._stop.is_set():
+            t0_log = min(s.next_time for s in self.streams)
+            if math.isinf(t0_log):
+                return  # logs vazios
+            self._play(t0_log, deadline)
+            self.cycles += 1
+            if not self.loop or self._stop.is_set() or time.monotonic() >= deadline:
+                return
+            for stream in self.streams:
+                stream.rewind()
+
+    def _play(self, t0_log, deadline):
+        start = time.monotonic()
+        while not self._stop.is_set():
+            next_t = min(s.next_time for s in self.streams)
+            if math.isinf(next_t):
+                return
+            due = start + (next_t - t0_log) / self.speed
+            now = time.monotonic()
+            if now >= deadline:
+                return
+            if due > now:
+                self._stop.wait(min(due - now, ESPERA_MAX_S, deadline - now))
+                continue
+            # Relógio do log agora: publica tudo que venceu até aqui
+            t_log = t0_log + (now - start) * self.speed
+            for zone, stream in zip(self.zones, self.streams):
+                if stream.next_time > t_log:
+                    continue
+                first_due = start + (stream.next_time - t0_log) / self.speed
+                before = stream.consumed
+                sample = stream.advance_to(t_log)
+                if sample is None:
+                    continue
+                self.data_bank.set_holding_registers(zone.offset, _registers(*sample))
+                self.published += 1
+                self.skipped += stream.consumed - before - 1
+                lag = time.monotonic() - first_due
+                self.lag_max_s = max(self.lag_max_s, lag)
+                self._lag_sum += lag
+                self._lag_count += 1
+
+
+def replay_zones(paths, offset_step=10, first_offset=0, devices=None):
+    """
+    Zonas a partir de pastas/arquivos de log (relatorio_frota.discover).
+    Com `devices` (dispositivos.load_registry), cada log recebe o offset da
+    zona do registro com o mesmo nome de arquivo (gravador.log_filename) e
+    logs sem zona no registro ficam de fora; sem ele, os offsets são
+    sequenciais na ordem natural das zonas (estufa_2 antes de estufa_10),
+    como em `simulador_contemp --zonas N`.
+    """
+    found = discover(paths)
+    if devices is None:
+        return [ReplayZone(name, files, first_offset + i * offset_step)
+                for i, (name, files) in enumerate(found.items())]
+    from gravador import log_filename
+    offsets = {zone_of(log_filename(device.name)): device.offset for device in devices}
+    return [ReplayZone(name, files, offsets[name]) for name, files in found.items() if name in offsets]
+
+
+def main():
+    from pyModbusTCP.server import ModbusServer
+
+    parser = argparse.ArgumentParser(description="Reproduz logs CSV do painel como um servidor Modbus TCP.")
+    parser.add_argument("caminhos", nargs="+", help="pastas ou arquivos de log (rotacionados entram em ordem)")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--velocidade", type=float, default=1.0,
+                        help=f"multiplicador do tempo do log ({VELOCIDADE_MIN:g} a {VELOCIDADE_MAX:g})")
+    parser.add_argument("--loop", action="store_true", help="recomeça quando todos os logs terminam")
+    parser.add_argument("--config", help="registro de equipamentos em JSON: usa o offset de cada zona pelo nome do log")
+    parser.add_argument("--offset-inicial", type=int, default=0, help="sem --config: offset da primeira zona")
+    parser.add_argument("--passo-offset", type=int, default=10, help="sem --config: distância entre os offsets das zonas")
+    args = parser.parse_args()
+
+    devices = None
+    if args.config:
+        from dispositivos import load_registry
+        devices = load_registry(args.config)
+    zones = replay_zones(args.caminhos, args.passo_offset, args.offset_inicial, devices)
+    if not zones:
+        raise SystemExit("Nenhum log encontrado.")
+    if devices is not None:
+        missing = sorted(set(discover(args.caminhos)) - {z.name for z in zones})
+        if missing:
+            print(f"Logs sem zona no registro (ignorados): {', '.join(missing)}")
+    for z in zones:
+        print(f"  {z.name}: offset {z.offset}, {len(z.files)} arquivo(s), "
+              f"{sum(os.path.getsize(f) for f in z.files) / 2**20:.1f} MiB")
+
+    print(f"Iniciando servidor Modbus TCP em {args.host}:{args.port}...")
+    server = ModbusServer(host=args.host, port=args.port, no_block=True)
+    server.start()
+    replayer = LogReplayer(server.data_bank, zones, args.velocidade, args.loop)
+    print(f"Reproduzindo {len(zones)} zona(s) a {args.velocidade:g}x{' em loop' if args.loop else ''}.")
+    try:
+        replayer.run()
+    except KeyboardInterrupt:
+        replayer.stop()
+    finally:
+        server.stop()
+    print(f"{replayer.published} amostras publicadas ({replayer.skipped} puladas), {replayer.cycles} ciclo(s); "
+          f"atraso médio {replayer.lag_mean_s * 1000:.2f} ms, máx. {replayer.lag_max_s * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
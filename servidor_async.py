@@ -0,0 +1,233 @@
+# servidor_async.py
+#
+# Servidor Modbus TCP em asyncio para o simulador (simulador_contemp.py
+# --servidor async). Todas as conexões são atendidas por um único laço de
+# eventos, sem uma thread por cliente, e a simulação roda no mesmo laço.
+#
+# As leituras são respondidas a partir de um instantâneo dos registros (bytes
+# já no formato do protocolo), trocado de uma só vez a cada passo da
+# simulação: uma leitura nunca vê um passo pela metade e custa só uma fatia
+# de bytes. O passo do motor e as requisições rodam na mesma thread, então
+# não há travas.
+#
+# O mapa de registros é o mesmo do servidor com threads: por zona, SP, PV,
+# saída, histerese, modo e intervalo em offset + 0..5. Funções atendidas:
+# 3 (ler registros), 6 (escrever um registro) e 16 (escrever vários).
+
+import asyncio
+import struct
+import time
+
+import numpy as np
+from pyModbusTCP.constants import (EXP_DATA_ADDRESS, EXP_DATA_VALUE, EXP_ILLEGAL_FUNCTION, READ_HOLDING_REGISTERS,
+                                   WRITE_MULTIPLE_REGISTERS, WRITE_SINGLE_REGISTER)
+
+NUM_REGISTROS = 0x10000
+# Limites de quantidade por requisição da especificação Modbus
+MAX_REGS_LEITURA = 125
+MAX_REGS_ESCRITA = 123
+# Fila de conexões pendentes do socket de escuta (muitos clientes conectando juntos)
+BACKLOG_CONEXOES = 1024
+
+# Cabeçalho MBAP: transação, protocolo (0), tamanho (unidade + PDU), unidade
+_MBAP = struct.Struct(">HHHB")
+_ADDR_COUNT = struct.Struct(">HH")
+_TAMANHO_MAX_PDU = 253
+
+
+def _exception(fc, code):
+    return bytes((fc | 0x80, code))
+
+
+class SnapshotBank:
+    """
+    Registros do simulador com leitura por instantâneo.
+
+    O motor usa a mesma interface do DataBank (get/set_holding_registers)
+    sobre o estado de trabalho; `publish()` troca de uma vez o instantâneo
+    (bytes big-endian) servido às leituras. Escritas de clientes vão para o
+    estado de trabalho e para um novo instantâneo na hora, para que a
+    leitura de confirmação do painel logo após a escrita já as veja.
+    Tudo roda na thread do laço de eventos, sem travas.
+    """
+    def __init__(self, size=NUM_REGISTROS):
+        self._regs = np.zeros(size, dtype=np.uint16)
+        self.snapshot = bytes(2 * size)
+        self.ticks = 0
+
+    def __len__(self):
+        return len(self._regs)
+
+    def get_holding_registers(self, address, number=1, srv_info=None):
+        if address < 0 or address + number > len(self._regs):
+            return None
+        return self._regs[address:address + number].tolist()
+
+    def set_holding_registers(self, address, word_list, srv_info=None):
+        words = np.asarray(word_list, dtype=np.int64) & 0xFFFF
+        if address < 0 or address + len(words) > len(self._regs):
+            return None
+        self._regs[address:address + len(words)] = words
+        return True
+
+    def set_holding_registers_at(self, addresses, word_list):
+        """Escrita de registros esparsos (um endereço por valor), usada pelo motor a cada passo."""
+        self._regs[np.asarray(addresses, dtype=np.int64)] = np.asarray(word_list, dtype=np.int64) & 0xFFFF
+        return True
+
+    def publish(self):
+        """Troca o instantâneo servido às leituras pelo estado de trabalho atual."""
+        self.snapshot = self._regs.astype(">u2").tobytes()
+        self.ticks += 1
+
+    def read(self, address, count):
+        """Registros [address, address + count) do instantâneo, já em bytes big-endian."""
+        return self.snapshot[2 * address:2 * (address + count)]
+
+    def write(self, address, data):
+        """Escrita de um cliente; `data` são os registros em bytes big-endian."""
+        n = len(data) // 2
+        self._regs[address:address + n] = np.frombuffer(data, dtype=">u2")
+        snapshot = self.snapshot
+        self.snapshot = snapshot[:2 * address] + data + snapshot[2 * (address + n):]
+
+
+class _ModbusProtocol(asyncio.Protocol):
+    """Uma conexão: junta os bytes recebidos em quadros MBAP e responde a todos de uma vez."""
+    def __init__(self, server):
+        self.server = server
+        self.buffer = bytearray()
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server._connected(1)
+
+    def connection_lost(self, exc):
+        self.server._connected(-1)
+
+    def data_received(self, data):
+        buf = self.buffer
+        buf += data
+        replies = []
+        while len(buf) >= _MBAP.size:
+            tid, protocol, length, unit = _MBAP.unpack_from(buf)
+            if protocol != 0 or not 2 <= length <= _TAMANHO_MAX_PDU + 1:
+                self.transport.close()  # quadro inválido: não há como ressincronizar
+                return
+            end = 6 + length
+            if len(buf) < end:
+                break
+            reply = self.server.handle(bytes(buf[_MBAP.size:end]))
+            replies.append(_MBAP.pack(tid, 0, len(reply) + 1, unit) + reply)
+            del buf[:end]
+        if replies:
+            self.transport.write(b"".join(replies))
+
+
+class AsyncModbusServer:
+    """Servidor Modbus TCP sobre um SnapshotBank; `await start()` e depois `close()`."""
+    def __init__(self, bank, host, port):
+        self.bank = bank
+        self.host = host
+        self.port = port
+        self._server = None
+        self.connections = 0
+        self.max_connections = 0
+        self.requests = 0
+        self.errors = 0
+
+    def _connected(self, delta):
+        self.connections += delta
+        self.max_connections = max(self.max_connections, self.connections)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: _ModbusProtocol(self), self.host, self.port,
+                                                backlog=BACKLOG_CONEXOES, reuse_address=True)
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+
+    def handle(self, pdu):
+        """Atende uma PDU e devolve a PDU de resposta (ou de exceção)."""
+        self.requests += 1
+        fc = pdu[0]
+        bank = self.bank
+        if fc == READ_HOLDING_REGISTERS:
+            if len(pdu) != 5:
+                return self._error(fc, EXP_DATA_VALUE)
+            address, count = _ADDR_COUNT.unpack_from(pdu, 1)
+            if not 1 <= count <= MAX_REGS_LEITURA:
+                return self._error(fc, EXP_DATA_VALUE)
+            if address + count > len(bank):
+                return self._error(fc, EXP_DATA_ADDRESS)
+            return bytes((fc, 2 * count)) + bank.read(address, count)
+        if fc == WRITE_SINGLE_REGISTER:
+            if len(pdu) != 5:
+                return self._error(fc, EXP_DATA_VALUE)
+            address = _ADDR_COUNT.unpack_from(pdu, 1)[0]
+            if address >= len(bank):
+                return self._error(fc, EXP_DATA_ADDRESS)
+            bank.write(address, pdu[3:5])
+            return pdu
+        if fc == WRITE_MULTIPLE_REGISTERS:
+            if len(pdu) < 6:
+                return self._error(fc, EXP_DATA_VALUE)
+            address, count = _ADDR_COUNT.unpack_from(pdu, 1)
+            if not 1 <= count <= MAX_REGS_ESCRITA or pdu[5] != 2 * count or len(pdu) != 6 + 2 * count:
+                return self._error(fc, EXP_DATA_VALUE)
+            if address + count > len(bank):
+                return self._error(fc, EXP_DATA_ADDRESS)
+            bank.write(address, pdu[6:])
+            return pdu[:5]
+        return self._error(fc, EXP_ILLEGAL_FUNCTION)
+
+    def _error(self, fc, code):
+        self.errors += 1
+        return _exception(fc, code)
+
+
+def _raise_fd_limit():
+    """Sobe o limite de arquivos abertos ao máximo permitido (milhares de conexões)."""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft != hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+async def serve_simulation(host, port, zonas, verbose=True):
+    """Sobe o servidor e roda o motor do simulador no mesmo laço, publicando um instantâneo por passo."""
+    from simulador_contemp import REG_INTERVALO_REL, build_zones
+
+    bank = SnapshotBank()
+    engine = build_zones(bank, zonas, verbose=verbose)
+    bank.publish()
+    server = AsyncModbusServer(bank, host, port)
+    await server.start()
+    print("Servidor Modbus (asyncio) em execução.")
+    try:
+        next_tick = time.monotonic()
+        while True:
+            # O intervalo é lido do registro do primeiro simulador, como no servidor com threads
+            intervalo_s = bank.get_holding_registers(REG_INTERVALO_REL, 1)[0]
+            if intervalo_s <= 0: intervalo_s = 1  # Evita loop infinito
+
+            engine.step()
+            bank.publish()
+            if verbose:
+                print("-" * 60)
+            # Agendamento absoluto: a duração do passo não atrasa os seguintes
+            next_tick = max(next_tick + intervalo_s, time.monotonic())
+            await asyncio.sleep(next_tick - time.monotonic())
+    finally:
+        server.close()
+
+
+def run_simulation(host, port, zonas, verbose=True):
+    _raise_fd_limit()
+    asyncio.run(serve_simulation(host, port, zonas, verbose))
@@ -0,0 +1,239 @@
+# simulador_analitico.py
+#
+# Avanço analítico ("fast-forward") do modelo de primeira ordem da estufa.
+#
+# A cada passo o GreenhouseSimulator faz
+#     T <- T - (T - TEMP_AMBIENTE) * taxa_perda + saida * taxa_aquecimento
+# ou seja, T_{k+1} = r*T_k + (1-r)*T_eq(saida), com r = 1 - taxa_perda e
+# T_eq(saida) = TEMP_AMBIENTE + saida * taxa_aquecimento / taxa_perda.
+# Com a saída constante, T_k = T_eq + (T_0 - T_eq) * r**k, então o passo em
+# que a temperatura cruza o limite da histerese tem forma fechada. O motor
+# abaixo salta de um evento de comutação ao seguinte: o custo é O(eventos),
+# não O(passos). Com detect_cycles, um ciclo-limite repetido é extrapolado
+# de uma vez.
+#
+# Uso: python simulador_analitico.py   (validação cruzada e comparação de tempo)
+
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from simulador_contemp import GreenhouseBatchEngine, RUIDO_TEMP, TEMP_AMBIENTE
+
+# Tolerância da validação cruzada contra o update() passo a passo (sem ruído)
+TOLERANCIA_VALIDACAO = 1e-6  # °C
+
+SwitchEvent = namedtuple("SwitchEvent", ["step", "temperature", "output"])
+
+FastForwardResult = namedtuple("FastForwardResult", [
+    "steps", "final_temperature", "final_output", "on_steps", "switches", "min_temperature",
+    "max_temperature", "events",
+])
+
+
+class AnalyticGreenhouse:
+    """
+    Uma estufa com parâmetros constantes (setpoint, histerese, ambiente),
+    simulada evento a evento. Mesma semântica do GreenhouseSimulator.update:
+    a decisão de controle usa a temperatura antes do passo.
+    """
+    def __init__(self, initial_temp, taxa_perda, taxa_aquecimento, setpoint=25.0, histerese=1.0,
+                 temp_ambiente=TEMP_AMBIENTE, output=0):
+        if not 0 < taxa_perda < 1:
+            raise ValueError("taxa_perda deve estar entre 0 e 1 para a forma fechada.")
+        self.temperature = float(initial_temp)
+        self.output = int(output)
+        self.r = 1.0 - taxa_perda
+        self.taxa_perda = taxa_perda
+        self.taxa_aquecimento = taxa_aquecimento
+        self.setpoint = setpoint
+        self.histerese = histerese
+        self.temp_ambiente = temp_ambiente
+
+    def equilibrium(self, output):
+        return self.temp_ambiente + output * self.taxa_aquecimento / self.taxa_perda
+
+    def temperature_after(self, temp0, output, k):
+        """Temperatura após k passos com a saída constante."""
+        eq = self.equilibrium(output)
+        return eq + (temp0 - eq) * self.r ** k
+
+    def _decide(self, temp, output):
+        if temp < self.setpoint - self.histerese:
+            return 1
+        if temp > self.setpoint + self.histerese:
+            return 0
+        return output
+
+    def _steps_until_switch(self, temp0, output, limit):
+        """
+        Menor j >= 1 em que a decisão sobre T_j (com a saída atual) muda a
+        saída, ou None se não ocorrer em até `limit` passos.
+        """
+        eq = self.equilibrium(output)
+        if output == 1:
+            threshold = self.setpoint + self.histerese
+            if eq <= threshold:
+                return None
+            crossed = lambda t: t > threshold
+        else:
+            threshold = self.setpoint - self.histerese
+            if eq >= threshold:
+                return None
+            crossed = lambda t: t < threshold
+        # (T0 - eq) * r**j cruza (threshold - eq): j > ln(q) / ln(r)
+        q = (threshold - eq) / (temp0 - eq)
+        if not 0 < q < 1:
+            j = 1
+        else:
+            j = max(1, int(math.floor(math.log(q) / math.log(self.r))) + 1)
+        # Corrige possíveis erros de arredondamento do logaritmo
+        while j > 1 and crossed(self.temperature_after(temp0, output, j - 1)):
+            j -= 1
+        while not crossed(self.temperature_after(temp0, output, j)):
+            j += 1
+            if j > limit:
+                return None
+        return j if j <= limit else None
+
+    def run(self, steps, noise=False, noise_amplitude=RUIDO_TEMP, seed=None, record_events=False,
+            detect_cycles=True):
+        """
+        Avança `steps` passos. Com noise=False o resultado é determinístico.
+        Com noise=True o ruído é tratado estatisticamente: a cada evento a
+        temperatura recebe uma perturbação da distribuição estacionária do
+        ruído acumulado (N(0, σ), σ² = (a²/3) / (1 - r²)), em vez de sortear
+        o ruído passo a passo.
+        """
+        rng = np.random.default_rng(seed)
+        sigma = math.sqrt(noise_amplitude ** 2 / 3 / (1 - self.r ** 2)) if noise else 0.0
+
+        temp, output = self.temperature, self.output
+        k = 0
+        on_steps = 0
+        switches = 0
+        t_min = t_max = temp
+        events = [] if record_events else None
+        last_cycle = None  # (temperatura no início do ciclo, comprimento, passos ligado)
+        cycle_start = None
+
+        # Decisão no passo 0
+        new_output = self._decide(temp, output)
+        if new_output != output:
+            switches += 1
+            output = new_output
+            if record_events:
+                events.append(SwitchEvent(0, temp, output))
+
+        while k < steps:
+            j = self._steps_until_switch(temp, output, steps - k)
+            if j is None:
+                # Sem comutação até o fim: avança direto
+                remaining = steps - k
+                end_temp = self.temperature_after(temp, output, remaining)
+                on_steps += remaining * output
+                t_min, t_max = min(t_min, end_temp), max(t_max, end_temp)
+                temp, k = end_temp, steps
+                break
+
+            on_steps += j * output
+            temp = self.temperature_after(temp, output, j)
+            if sigma:
+                temp += rng.normal(0.0, sigma)
+            k += j
+            t_min, t_max = min(t_min, temp), max(t_max, temp)
+            new_output = self._decide(temp, output)
+            if new_output == output:
+                continue  # o ruído desfez o cruzamento
+            output = new_output
+            switches += 1
+            if record_events:
+                events.append(SwitchEvent(k, temp, output))
+
+            # Ciclo-limite: início de ciclo = comutação para ligado
+            if detect_cycles and not sigma and output == 1:
+                if cycle_start is not None:
+                    cycle = (temp, k - cycle_start[1], on_steps - cycle_start[2])
+                    if last_cycle is not None and abs(cycle[0] - last_cycle[0]) < 1e-12 \
+                            and cycle[1] == last_cycle[1]:
+                        n_cycles = (steps - k) // cycle[1]
+                        if n_cycles and not record_events:
+                            k += n_cycles * cycle[1]
+                            on_steps += n_cycles * cycle[2]
+                            switches += n_cycles * 2
+                    last_cycle = cycle
+                cycle_start = (temp, k, on_steps)
+
+        self.temperature, self.output = temp, output
+        return FastForwardResult(k, temp, output, on_steps, switches, t_min, t_max, events)
+
+
+def stepwise_reference(initial_temp, taxa_perda, taxa_aquecimento, setpoint, histerese, temp_ambiente, steps):
+    """Mesmo cenário rodado passo a passo no GreenhouseBatchEngine, sem ruído."""
+    engine = GreenhouseBatchEngine(None, [0], [initial_temp], [taxa_perda], [taxa_aquecimento],
+                                   temp_ambiente=temp_ambiente, ruido=0)
+    engine.setpoint[:] = setpoint
+    engine.histerese[:] = histerese
+    on_steps = switches = 0
+    previous = int(engine.saida[0])
+    for _ in range(steps):
+        engine.step()
+        output = int(engine.saida[0])
+        on_steps += output
+        switches += output != previous
+        previous = output
+    return float(engine.temperatura[0]), on_steps, switches
+
+
+def cross_validate(cases=200, steps=20000, seed=0):
+    """
+    Compara o avanço analítico com o update() passo a passo em cenários
+    sorteados. Devolve o maior desvio de temperatura final e quantos casos
+    divergiram em comutações/passos ligados.
+    """
+    rng = np.random.default_rng(seed)
+    max_dev = 0.0
+    mismatches = 0
+    for _ in range(cases):
+        params = dict(initial_temp=rng.uniform(10, 35), taxa_perda=rng.uniform(0.01, 0.2),
+                      taxa_aquecimento=rng.uniform(0.05, 0.5), setpoint=round(rng.uniform(20, 30), 1),
+                      histerese=round(rng.uniform(0.2, 2.0), 1), temp_ambiente=rng.uniform(5, 28))
+        ref_temp, ref_on, ref_sw = stepwise_reference(steps=steps, **params)
+        sim = AnalyticGreenhouse(params.pop("initial_temp"), params.pop("taxa_perda"),
+                                 params.pop("taxa_aquecimento"), **params)
+        res = sim.run(steps)
+        max_dev = max(max_dev, abs(res.final_temperature - ref_temp))
+        if res.on_steps != ref_on or res.switches != ref_sw:
+            mismatches += 1
+    return max_dev, mismatches
+
+
+def main():
+    max_dev, mismatches = cross_validate()
+    status = "OK" if max_dev <= TOLERANCIA_VALIDACAO and not mismatches else "FALHOU"
+    print(f"Validação cruzada (200 cenários, 20000 passos): desvio máx {max_dev:.2e} °C, "
+          f"{mismatches} divergências de comutação -> {status} (tolerância {TOLERANCIA_VALIDACAO:g} °C)")
+
+    # Seis meses de passos de 5 s
+    steps = 6 * 30 * 86400 // 5
+    sim = AnalyticGreenhouse(20.0, 0.05, 0.3, setpoint=25.0, histerese=0.5, temp_ambiente=22.0)
+    inicio = time.perf_counter()
+    res = sim.run(steps, detect_cycles=False)
+    t_eventos = time.perf_counter() - inicio
+    sim = AnalyticGreenhouse(20.0, 0.05, 0.3, setpoint=25.0, histerese=0.5, temp_ambiente=22.0)
+    inicio = time.perf_counter()
+    sim.run(steps)
+    t_ciclos = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    stepwise_reference(20.0, 0.05, 0.3, 25.0, 0.5, 22.0, 100_000)
+    t_passo = (time.perf_counter() - inicio) / 100_000 * steps
+    print(f"6 meses ({steps} passos, {res.switches} comutações):")
+    print(f"  passo a passo (estimado): {t_passo:8.2f} s")
+    print(f"  por eventos:              {t_eventos:8.4f} s")
+    print(f"  por eventos + ciclos:     {t_ciclos:8.4f} s")
+
+
+if __name__ == '__main__':
+    main()
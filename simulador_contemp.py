@@ -1,8 +1,8 @@
 # simulador_contemp.py
 
 import time
-import random
 from threading import Thread
+import numpy as np
 from pyModbusTCP.server import ModbusServer, DataBank
 
 # --- Configurações do Simulador ---
@@ -11,89 +11,283 @@ SERVER_PORT = 502
 
 # --- Configurações da Simulação Física da Estufa ---
 TEMP_AMBIENTE = 28.0  # Temperatura externa em °C
+RUIDO_TEMP = 0.05  # Amplitude do ruído uniforme aplicado a cada passo (°C)
 
-class GreenhouseSimulator:
+# --- Mapa de Registros (relativos ao offset de cada estufa) ---
+# Regs: 0:SP, 1:PV, 2:Saída, 3:Histerese, 4:Modo, 5:Intervalo(s)
+REG_SETPOINT_REL = 0
+REG_PV_REL = 1
+REG_OUTPUT_REL = 2
+REG_HISTERESE_REL = 3
+REG_MODO_REL = 4
+REG_INTERVALO_REL = 5
+NUM_REGS_ZONA = 6
+
+
+class SimulatorDataBank(DataBank):
     """
-    Esta classe simula a dinâmica da temperatura de uma estufa
-    e a lógica de um controlador de temperatura individual.
+    DataBank do simulador: acrescenta a escrita de registros esparsos (um
+    endereço por valor) sob uma única aquisição da trava dos registros, para
+    que o motor atualize PV e Saída de todas as zonas sem tocar nos registros
+    que os clientes escrevem (SP, Histerese, Modo, Intervalo).
+
+    Usa os atributos internos `_h_regs`/`_h_regs_lock` do DataBank do
+    pyModbusTCP (0.2/0.3); se uma versão futura os mudar, cai na API
+    pública, com uma chamada por registro.
     """
-    def __init__(self, name, server_data_bank, register_offset, initial_temp, taxa_perda, taxa_aquecimento):
-        self.name = name
+    def set_holding_registers_at(self, addresses, word_list):
+        regs = getattr(self, "_h_regs", None)
+        lock = getattr(self, "_h_regs_lock", None)
+        if not isinstance(regs, list) or lock is None:
+            for address, word in zip(addresses, word_list):
+                if self.set_holding_registers(address, [word]) is None:
+                    return None
+            return True
+        if addresses and (min(addresses) < 0 or max(addresses) >= len(regs)):
+            return None
+        with lock:
+            for address, word in zip(addresses, word_list):
+                regs[address] = int(word) & 0xffff
+        return True
+
+
+class GreenhouseBatchEngine:
+    """
+    Simula várias estufas de uma só vez, mantendo o estado de todas as
+    zonas em arrays NumPy e avançando todas num único passo vetorizado.
+
+    A cada passo é feita uma única leitura em bloco do DataBank (cobrindo
+    todos os registros das zonas) e são escritos só os registros de PV e
+    Saída. Com um banco que ofereça `set_holding_registers_at`
+    (SimulatorDataBank, servidor_async.SnapshotBank) a escrita é uma só
+    chamada; com um DataBank comum, duas por zona (PV e Saída).
+    """
+    def __init__(self, server_data_bank, register_offsets, initial_temps, taxas_perda, taxas_aquecimento,
+                 names=None, temp_ambiente=TEMP_AMBIENTE, ruido=RUIDO_TEMP, seed=None, verbose=False):
         self.datobank = server_data_bank
-        self.offset = register_offset
-        
-        # Estado interno da simulação
-        self.temperatura_atual = initial_temp
-        self.taxa_perda_calor = taxa_perda
-        self.taxa_aquecimento = taxa_aquecimento
+        self.offsets = np.asarray(register_offsets, dtype=np.int64)
+        n = len(self.offsets)
+        self.names = list(names) if names is not None else [f"Estufa {i + 1}" for i in range(n)]
+        self.temp_ambiente = temp_ambiente
+        self.ruido = ruido
+        self.verbose = verbose
+        self.rng = np.random.default_rng(seed)
+
+        # Estado interno da simulação (um elemento por zona)
+        self.temperatura = np.broadcast_to(np.asarray(initial_temps, dtype=np.float64), (n,)).copy()
+        self.taxa_perda = np.broadcast_to(np.asarray(taxas_perda, dtype=np.float64), (n,)).copy()
+        self.taxa_aquecimento = np.broadcast_to(np.asarray(taxas_aquecimento, dtype=np.float64), (n,)).copy()
+        self.setpoint = np.full(n, 25.0)
+        self.histerese = np.full(n, 1.0)
+        self.saida = np.zeros(n, dtype=np.uint8)
+
+        # Bloco contíguo de registros que cobre todas as zonas
+        self.base = int(self.offsets.min()) if n else 0
+        self.span = int(self.offsets.max()) - self.base + NUM_REGS_ZONA if n else 0
+        rel = self.offsets - self.base
+        self._idx_sp = rel + REG_SETPOINT_REL
+        self._idx_pv = rel + REG_PV_REL
+        self._idx_out = rel + REG_OUTPUT_REL
+        self._idx_hist = rel + REG_HISTERESE_REL
+        # Endereços absolutos escritos a cada passo: PV de todas as zonas, depois Saída
+        self._addr_escrita = np.concatenate((self.offsets + REG_PV_REL, self.offsets + REG_OUTPUT_REL)).tolist()
 
         # Inicializa os valores no DataBank do Modbus
         # Multiplicamos por 10 para trabalhar com uma casa decimal
-        # Regs: 0:SP, 1:PV, 2:Saída, 3:Histerese, 4:Modo, 5:Intervalo(s)
-        self.datobank.set_holding_registers(self.offset, [250, int(self.temperatura_atual * 10), 0, 10, 1, 5])
+        if self.datobank is not None and n:
+            block = np.asarray(self.datobank.get_holding_registers(self.base, self.span), dtype=np.int64)
+            for col, value in ((REG_SETPOINT_REL, 250), (REG_OUTPUT_REL, 0), (REG_HISTERESE_REL, 10),
+                               (REG_MODO_REL, 1), (REG_INTERVALO_REL, 5)):
+                block[rel + col] = value
+            block[self._idx_pv] = (self.temperatura * 10).astype(np.int64)
+            self.datobank.set_holding_registers(self.base, block.tolist())
 
-    def update(self):
-        """Executa um único passo da simulação."""
-        # 1. Ler parâmetros do controlador (do Modbus DataBank)
+    def __len__(self):
+        return len(self.offsets)
+
+    def step(self, noise=None):
+        """
+        Executa um único passo da simulação para todas as zonas.
+
+        `noise` permite fornecer o ruído do passo (um valor por zona) em vez
+        de sorteá-lo com o gerador do motor. O atributo `temp_ambiente` do
+        motor pode ser um escalar ou um array por zona.
+        """
+        n = len(self.offsets)
+        if not n:
+            return
+
+        # 1. Ler parâmetros dos controladores (uma leitura em bloco)
         # Dividimos por 10 para obter o valor real
-        setpoint = self.datobank.get_holding_registers(self.offset + 0, 1)[0] / 10.0
-        histerese = self.datobank.get_holding_registers(self.offset + 3, 1)[0] / 10.0
-        
+        if self.datobank is not None:
+            block = np.asarray(self.datobank.get_holding_registers(self.base, self.span), dtype=np.int64)
+            self.setpoint = block[self._idx_sp] / 10.0
+            self.histerese = block[self._idx_hist] / 10.0
+            self.saida = block[self._idx_out].astype(np.uint8)
+
         # 2. Lógica de Controle (On/Off com Histerese)
-        output_state = self.datobank.get_holding_registers(self.offset + 2, 1)[0]
-        if self.temperatura_atual < (setpoint - histerese):
-            new_output_state = 1
-        elif self.temperatura_atual > (setpoint + histerese):
-            new_output_state = 0
-        else:
-            new_output_state = output_state
+        ligar = self.temperatura < (self.setpoint - self.histerese)
+        desligar = self.temperatura > (self.setpoint + self.histerese)
+        self.saida = np.where(ligar, 1, np.where(desligar, 0, self.saida)).astype(np.uint8)
 
         # 3. Simular a Física da Estufa
-        diferenca_temp = self.temperatura_atual - TEMP_AMBIENTE
-        self.temperatura_atual -= diferenca_temp * self.taxa_perda_calor
-        if new_output_state == 1:
-            self.temperatura_atual += self.taxa_aquecimento
-        self.temperatura_atual += random.uniform(-0.05, 0.05)
+        self.temperatura -= (self.temperatura - self.temp_ambiente) * self.taxa_perda
+        self.temperatura += self.saida * self.taxa_aquecimento
+        if noise is not None:
+            self.temperatura += noise
+        elif self.ruido:
+            self.temperatura += self.rng.uniform(-self.ruido, self.ruido, n)
 
         # 4. Atualizar os registros Modbus para o cliente ler
-        self.datobank.set_holding_registers(self.offset + 1, [int(self.temperatura_atual * 10)]) # PV
-        self.datobank.set_holding_registers(self.offset + 2, [new_output_state]) # Saída
+        # Só PV e Saída são escritos: regravar o bloco lido no passo 1 desfaria as
+        # escritas de clientes (SP, Histerese...) que chegassem durante o passo.
+        if self.datobank is not None:
+            pv = (self.temperatura * 10).astype(np.int64) & 0xFFFF
+            set_at = getattr(self.datobank, "set_holding_registers_at", None)
+            if set_at is not None:
+                set_at(self._addr_escrita, np.concatenate((pv, self.saida)).tolist())
+            else:
+                for offset, value, out in zip(self.offsets.tolist(), pv.tolist(), self.saida.tolist()):
+                    self.datobank.set_holding_registers(offset + REG_PV_REL, [value])
+                    self.datobank.set_holding_registers(offset + REG_OUTPUT_REL, [out])
 
-        # Imprime o status no console para depuração
+        if self.verbose:
+            for i in range(n):
+                self.print_status(i)
+
+    def print_status(self, index):
+        """Imprime o status de uma zona no console para depuração."""
         print(
-            f"[{self.name}] SP: {setpoint:.1f}°C | "
-            f"PV: {self.temperatura_atual:.1f}°C | "
-            f"Saída: {'LIGADA' if new_output_state == 1 else 'DESLIGADA'}"
+            f"[{self.names[index]}] SP: {self.setpoint[index]:.1f}°C | "
+            f"PV: {self.temperatura[index]:.1f}°C | "
+            f"Saída: {'LIGADA' if self.saida[index] == 1 else 'DESLIGADA'}"
+        )
+
+    def zone(self, index):
+        """Retorna um GreenhouseSimulator que é uma visão da zona `index`."""
+        return GreenhouseSimulator.from_engine(self, index)
+
+
+class GreenhouseSimulator:
+    """
+    Esta classe simula a dinâmica da temperatura de uma estufa
+    e a lógica de um controlador de temperatura individual.
+
+    É uma visão fina sobre uma zona de um GreenhouseBatchEngine. Quando
+    criada diretamente, usa um motor próprio de uma única zona.
+    """
+    def __init__(self, name, server_data_bank, register_offset, initial_temp, taxa_perda, taxa_aquecimento):
+        engine = GreenhouseBatchEngine(
+            server_data_bank, [register_offset], [initial_temp], [taxa_perda], [taxa_aquecimento],
+            names=[name], verbose=True
         )
+        self._bind(engine, 0)
+
+    @classmethod
+    def from_engine(cls, engine, index):
+        view = cls.__new__(cls)
+        view._bind(engine, index)
+        return view
+
+    def _bind(self, engine, index):
+        self.engine = engine
+        self.index = index
+        self.name = engine.names[index]
+        self.datobank = engine.datobank
+        self.offset = int(engine.offsets[index])
+
+    @property
+    def temperatura_atual(self):
+        return float(self.engine.temperatura[self.index])
+
+    @temperatura_atual.setter
+    def temperatura_atual(self, value):
+        self.engine.temperatura[self.index] = value
+
+    @property
+    def taxa_perda_calor(self):
+        return float(self.engine.taxa_perda[self.index])
+
+    @taxa_perda_calor.setter
+    def taxa_perda_calor(self, value):
+        self.engine.taxa_perda[self.index] = value
+
+    @property
+    def taxa_aquecimento(self):
+        return float(self.engine.taxa_aquecimento[self.index])
+
+    @taxa_aquecimento.setter
+    def taxa_aquecimento(self, value):
+        self.engine.taxa_aquecimento[self.index] = value
+
+    @property
+    def output_state(self):
+        return int(self.engine.saida[self.index])
+
+    def update(self):
+        """Executa um único passo da simulação.
+
+        Se o motor for compartilhado com outras zonas, todas avançam juntas.
+        """
+        self.engine.step()
+
+def build_zones(data_bank, zonas, verbose=True):
+    """Cria o motor com as duas estufas padrão ou, para mais zonas, com o layout de offset 10."""
+    if zonas == 2:
+        # Duas estufas com parâmetros diferentes, simuladas em um único motor
+        return GreenhouseBatchEngine(
+            data_bank, register_offsets=[0, 10], initial_temps=[20.0, 25.0],
+            taxas_perda=[0.1, 0.05], taxas_aquecimento=[0.2, 0.15],
+            names=["Estufa 1", "Estufa 2"], verbose=verbose
+        )
+    return GreenhouseBatchEngine(
+        data_bank, register_offsets=[10 * i for i in range(zonas)],
+        initial_temps=[20.0 + (i % 5) for i in range(zonas)],
+        taxas_perda=[0.1 if i % 2 == 0 else 0.05 for i in range(zonas)],
+        taxas_aquecimento=[0.2 if i % 2 == 0 else 0.15 for i in range(zonas)],
+        verbose=verbose
+    )
 
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Simulador de estufas com servidor Modbus TCP.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--zonas", type=int, default=2, help="número de estufas (offset 10 entre elas)")
+    parser.add_argument("--quiet", action="store_true", help="não imprime o status a cada passo")
+    parser.add_argument("--servidor", choices=("thread", "async"), default="thread",
+                        help="servidor Modbus: pyModbusTCP (uma thread por cliente) ou asyncio "
+                             "(um laço para todas as conexões, leituras de um instantâneo por passo)")
+    args = parser.parse_args()
+
+    if args.servidor == "async":
+        from servidor_async import run_simulation
+        print(f"Iniciando servidor Modbus TCP (asyncio) em {args.host}:{args.port}...")
+        try:
+            run_simulation(args.host, args.port, args.zonas, verbose=not args.quiet)
+        except KeyboardInterrupt:
+            print("Servidor e simulador encerrados.")
+        raise SystemExit(0)
+
     # Inicia o servidor Modbus
-    print(f"Iniciando servidor Modbus TCP em {SERVER_HOST}:{SERVER_PORT}...")
-    server = ModbusServer(host=SERVER_HOST, port=SERVER_PORT, no_block=True)
+    print(f"Iniciando servidor Modbus TCP em {args.host}:{args.port}...")
+    server = ModbusServer(host=args.host, port=args.port, no_block=True, data_bank=SimulatorDataBank())
 
     try:
         server.start()
         print("Servidor Modbus em execução.")
-        
-        # Cria duas instâncias de simuladores com parâmetros diferentes
-        simulador1 = GreenhouseSimulator(
-            name="Estufa 1", server_data_bank=server.data_bank, register_offset=0,
-            initial_temp=20.0, taxa_perda=0.1, taxa_aquecimento=0.2
-        )
-        simulador2 = GreenhouseSimulator(
-            name="Estufa 2", server_data_bank=server.data_bank, register_offset=10,
-            initial_temp=25.0, taxa_perda=0.05, taxa_aquecimento=0.15
-        )
 
-        # Loop principal que atualiza ambos os simuladores
+        engine = build_zones(server.data_bank, args.zonas, verbose=not args.quiet)
+
+        # Loop principal que atualiza todos os simuladores
         while True:
             # O intervalo é lido do registro do primeiro simulador, mas poderia ser individual
-            intervalo_s = server.data_bank.get_holding_registers(5, 1)[0]
+            intervalo_s = server.data_bank.get_holding_registers(REG_INTERVALO_REL, 1)[0]
             if intervalo_s <= 0: intervalo_s = 1 # Evita loop infinito
 
-            simulador1.update()
-            simulador2.update()
-            print("-" * 60)
+            engine.step()
+            if not args.quiet:
+                print("-" * 60)
             time.sleep(intervalo_s)
 
     except KeyboardInterrupt:
@@ -0,0 +1,161 @@
+# simulador_lote.py
+#
+# Modo headless do simulador: roda milhares de cenários de estufa com um
+# relógio simulado (sem time.sleep), o mais rápido que a CPU permitir, num
+# pool de processos. Cada cenário gera métricas resumidas do controle.
+#
+# Uso: python simulador_lote.py --cenarios 2000 --horas 24 --seed 42 --saida resultados.csv
+
+import argparse
+import csv
+import math
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulador_contemp import GreenhouseBatchEngine, RUIDO_TEMP, TEMP_AMBIENTE
+
+# Passo da simulação (s) — o mesmo intervalo padrão do controlador
+PASSO_PADRAO_S = 5
+# Tolerância extra (°C) além da histerese para considerar a temperatura "assentada"
+TOLERANCIA_ASSENTAMENTO = 0.5
+# Cenários por tarefa enviada ao pool (cada tarefa é um motor vetorizado)
+CENARIOS_POR_TAREFA = 256
+# Passos de ruído sorteados de uma vez por cenário
+BLOCO_RUIDO = 1024
+
+Scenario = namedtuple("Scenario", [
+    "id", "seed", "taxa_perda", "taxa_aquecimento", "histerese", "setpoint", "initial_temp",
+    "ambiente_media", "ambiente_amplitude", "ambiente_periodo_s", "ruido",
+], defaults=(25.0, 20.0, TEMP_AMBIENTE, 0.0, 86400.0, RUIDO_TEMP))
+
+RESULT_FIELDS = [
+    "id", "seed", "taxa_perda", "taxa_aquecimento", "histerese", "setpoint", "ambiente_media",
+    "ambiente_amplitude", "overshoot", "tempo_assentamento_s", "ciclo_trabalho", "comutacoes",
+    "erro_medio_abs", "temp_final",
+]
+
+
+def random_scenarios(count, seed, taxa_perda=(0.02, 0.15), taxa_aquecimento=(0.1, 0.4), histerese=(0.2, 2.0),
+                     setpoint=(22.0, 30.0), ambiente_media=(10.0, 28.0), ambiente_amplitude=(0.0, 8.0)):
+    """Sorteia cenários (reprodutíveis pela seed) dentro das faixas dadas."""
+    rng = np.random.default_rng(seed)
+    seeds = rng.integers(0, 2**32, size=count)
+    u = lambda rng_range: rng.uniform(rng_range[0], rng_range[1], size=count)
+    cols = [u(taxa_perda), u(taxa_aquecimento), u(histerese), u(setpoint), u(ambiente_media), u(ambiente_amplitude)]
+    scenarios = []
+    for i in range(count):
+        perda, aquec, hist, sp, amb, amp = (float(c[i]) for c in cols)
+        scenarios.append(Scenario(i, int(seeds[i]), perda, aquec, round(hist, 1), round(sp, 1),
+                                  initial_temp=amb, ambiente_media=amb, ambiente_amplitude=amp))
+    return scenarios
+
+
+def run_scenarios(scenarios, duracao_s, passo_s=PASSO_PADRAO_S):
+    """
+    Roda um grupo de cenários num único motor vetorizado com relógio
+    simulado e devolve uma lista de dicionários com as métricas.
+    """
+    n = len(scenarios)
+    col = lambda name: np.array([getattr(s, name) for s in scenarios], dtype=np.float64)
+    engine = GreenhouseBatchEngine(None, range(n), col("initial_temp"), col("taxa_perda"), col("taxa_aquecimento"))
+    engine.setpoint = col("setpoint")
+    engine.histerese = col("histerese")
+    amb_media, amb_amp, amb_periodo = col("ambiente_media"), col("ambiente_amplitude"), col("ambiente_periodo_s")
+    ruido = col("ruido")
+    # Um gerador por cenário: o resultado não depende de como os cenários foram agrupados
+    rngs = [np.random.default_rng(s.seed) for s in scenarios]
+
+    sp = engine.setpoint
+    banda = engine.histerese + TOLERANCIA_ASSENTAMENTO
+    atingiu_sp = engine.temperatura >= sp
+    overshoot = np.zeros(n)
+    ultimo_fora = np.zeros(n)
+    fora_no_fim = np.zeros(n, dtype=bool)
+    ligado_passos = np.zeros(n)
+    comutacoes = np.zeros(n, dtype=np.int64)
+    erro_abs = np.zeros(n)
+    saida_anterior = engine.saida.copy()
+
+    passos = int(duracao_s // passo_s)
+    ruido_bloco = None
+    for k in range(passos):
+        t = k * passo_s
+        if k % BLOCO_RUIDO == 0:
+            ruido_bloco = np.stack([r.uniform(-1.0, 1.0, BLOCO_RUIDO) for r in rngs]) * ruido[:, None]
+        engine.temp_ambiente = amb_media + amb_amp * np.sin(2 * math.pi * t / amb_periodo)
+        engine.step(noise=ruido_bloco[:, k % BLOCO_RUIDO])
+
+        temp = engine.temperatura
+        atingiu_sp |= temp >= sp
+        overshoot = np.where(atingiu_sp, np.maximum(overshoot, temp - sp), overshoot)
+        fora = np.abs(temp - sp) > banda
+        ultimo_fora = np.where(fora, t + passo_s, ultimo_fora)
+        fora_no_fim = fora
+        ligado_passos += engine.saida
+        comutacoes += engine.saida != saida_anterior
+        saida_anterior = engine.saida.copy()
+        erro_abs += np.abs(temp - sp)
+
+    results = []
+    for i, s in enumerate(scenarios):
+        results.append({
+            "id": s.id, "seed": s.seed, "taxa_perda": s.taxa_perda, "taxa_aquecimento": s.taxa_aquecimento,
+            "histerese": s.histerese, "setpoint": s.setpoint, "ambiente_media": s.ambiente_media,
+            "ambiente_amplitude": s.ambiente_amplitude,
+            "overshoot": float(overshoot[i]),
+            # Nunca assentou se terminou fora da banda
+            "tempo_assentamento_s": float("nan") if fora_no_fim[i] else float(ultimo_fora[i]),
+            "ciclo_trabalho": float(ligado_passos[i] / passos) if passos else 0.0,
+            "comutacoes": int(comutacoes[i]),
+            "erro_medio_abs": float(erro_abs[i] / passos) if passos else 0.0,
+            "temp_final": float(engine.temperatura[i]),
+        })
+    return results
+
+
+def run_batch(scenarios, duracao_s, passo_s=PASSO_PADRAO_S, workers=None, chunk=CENARIOS_POR_TAREFA):
+    """Distribui os cenários em grupos por um pool de processos (todos os núcleos por padrão)."""
+    groups = [scenarios[i:i + chunk] for i in range(0, len(scenarios), chunk)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(run_scenarios, groups, [duracao_s] * len(groups), [passo_s] * len(groups)):
+            results.extend(part)
+    return results
+
+
+def write_results(results, filepath):
+    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulação headless de cenários de estufa em lote.")
+    parser.add_argument("--cenarios", type=int, default=1000, help="número de cenários sorteados")
+    parser.add_argument("--horas", type=float, default=24.0, help="duração simulada de cada cenário")
+    parser.add_argument("--passo", type=float, default=PASSO_PADRAO_S, help="passo da simulação (s)")
+    parser.add_argument("--seed", type=int, default=0, help="seed para sorteio e ruído")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: todos os núcleos)")
+    parser.add_argument("--saida", default="resultados_lote.csv", help="arquivo CSV com as métricas")
+    args = parser.parse_args()
+
+    scenarios = random_scenarios(args.cenarios, args.seed)
+    duracao_s = args.horas * 3600
+    print(f"Simulando {len(scenarios)} cenários de {args.horas:g} h em {args.workers or os.cpu_count()} processos...")
+    inicio = time.perf_counter()
+    results = run_batch(scenarios, duracao_s, args.passo, args.workers)
+    elapsed = time.perf_counter() - inicio
+    write_results(results, args.saida)
+
+    simulado = len(scenarios) * duracao_s
+    print(f"Concluído em {elapsed:.1f} s ({simulado / elapsed / 86400:.0f} dias simulados por segundo).")
+    print(f"Métricas salvas em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,314 @@
+# tabela_virtual.py
+
+import csv
+import mmap
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import datetime
+
+import numpy as np
+
+from registro_log import LOG_HEADER, LOG_TIME_FORMAT
+from relatorio import TimestampParser, to_seconds
+
+# Linhas extras buscadas acima e abaixo da área visível
+MARGEM_LINHAS = 20
+ALTURA_LINHA_PADRAO = 20
+
+
+class RowSource:
+    """
+    Fonte de linhas com acesso aleatório para a tabela virtual. As linhas
+    são sempre devolvidas no layout do CSV (lista de strings). Subclasses
+    implementam `_fetch(indices)`, `_column_values(col)` e `_time_index(dt)`
+    sobre a ordem cronológica; aqui fica a ordenação por coluna.
+    """
+    header = list(LOG_HEADER)
+
+    def __init__(self, count):
+        self.count = count
+        self.order = None  # permutação da ordem cronológica (None = cronológica)
+        self.sort_column = 0
+        self.sort_descending = False
+
+    def __len__(self):
+        return self.count
+
+    def rows(self, start, stop):
+        start, stop = max(0, start), min(self.count, stop)
+        if start >= stop:
+            return []
+        if self.order is None:
+            indices = np.arange(start, stop)
+        else:
+            indices = self.order[start:stop]
+        return self._fetch(indices)
+
+    def sort(self, column, descending=False):
+        """Ordena por coluna guardando apenas uma permutação de índices."""
+        self.sort_column, self.sort_descending = column, descending
+        if column == 0:
+            # A fonte já está em ordem cronológica
+            self.order = None if not descending else np.arange(self.count - 1, -1, -1)
+            return
+        order = np.argsort(self._column_values(column), kind='stable')
+        self.order = order[::-1] if descending else order
+
+    def position_of_time(self, dt):
+        """Posição (na ordem atual) da primeira linha com horário >= dt."""
+        index = min(self._time_index(dt), self.count - 1)
+        if self.order is None:
+            return index
+        return int(np.flatnonzero(self.order == index)[0])
+
+    def close(self):
+        """Libera os recursos da fonte (chamado quando a tabela é destruída)."""
+
+
+class BinaryRowSource(RowSource):
+    """Linhas de um log binário (log_binario.BinaryLog) dentro de uma janela de tempo."""
+    _COLUMNS = ('t', 'pv', 'sp', 'out')
+
+    def __init__(self, filepath, start_time, end_time):
+        from log_binario import BinaryLog
+        self.records = BinaryLog(filepath).range(start_time, end_time)
+        super().__init__(len(self.records))
+
+    def _fetch(self, indices):
+        from log_binario import BinaryLog
+        return list(BinaryLog.to_rows(self.records[indices]))
+
+    def _column_values(self, column):
+        return np.asarray(self.records[self._COLUMNS[column]])
+
+    def _time_index(self, dt):
+        return int(np.searchsorted(self.records['t'], dt.timestamp(), side='left'))
+
+
+class CsvRowSource(RowSource):
+    """
+    Linhas de um log CSV dentro de uma janela de tempo, sem ler o arquivo
+    linha a linha: o arquivo é mapeado em memória, a janela é encontrada por
+    busca binária nos deslocamentos em bytes (os logs do painel são gravados
+    em ordem cronológica) e só as linhas da janela são indexadas com NumPy.
+    """
+    def __init__(self, filepath, start_time, end_time):
+        self._parser = TimestampParser()
+        self._column_cache = {}
+        with open(filepath, 'rb') as f:
+            size = f.seek(0, 2)
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+        header_end = self._data.find(b'\n')
+        if header_end < 0:
+            self._starts = self._ends = np.empty(0, dtype=np.int64)
+            super().__init__(0)
+            return
+        self.header = next(csv.reader([bytes(self._data[:header_end]).decode('utf-8')]))
+        lo = self._byte_bisect(to_seconds(start_time), header_end + 1, len(self._data))
+        hi = self._byte_bisect(to_seconds(end_time), lo, len(self._data), right=True)
+        self._starts, self._ends = self._index_lines(lo, hi)
+        super().__init__(len(self._starts))
+
+    def _seconds_at(self, offset):
+        return self._parser.seconds(bytes(self._data[offset:offset + 19]).decode('ascii'))
+
+    def _byte_bisect(self, t, lo, hi, right=False):
+        """Deslocamento da primeira linha em [lo, hi) com horário >= t (> t com `right`); lo é início de linha."""
+        data = self._data
+        while lo < hi:
+            mid = (lo + hi) // 2
+            line = max(data.rfind(b'\n', lo, mid) + 1, lo)  # início da linha que contém `mid`
+            line_end = data.find(b'\n', line, hi)
+            if line_end < 0:
+                line_end = hi
+            if line_end - line < 19:
+                lo = line_end + 1  # linha vazia ou truncada
+                continue
+            value = self._seconds_at(line)
+            if value < t or (right and value == t):
+                lo = line_end + 1
+            else:
+                hi = line
+        return min(lo, len(data))
+
+    def _index_lines(self, lo, hi):
+        """Inícios e fins das linhas não vazias de [lo, hi), que começa num início de linha."""
+        if hi <= lo:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        buf = np.frombuffer(self._data, dtype=np.uint8, count=hi - lo, offset=lo)
+        newlines = np.flatnonzero(buf == ord('\n'))
+        starts = np.concatenate(([0], newlines + 1))
+        ends = np.append(newlines, hi - lo)
+        # Sem o '\r' do fim, como em cache_log.parse_block (que interpreta as colunas da janela)
+        lengths = ends - starts
+        lengths -= (lengths > 0) & (buf[np.maximum(ends - 1, 0)] == ord('\r'))
+        del buf  # o mmap só pode ser fechado sem visões abertas sobre ele
+        keep = lengths > 0
+        return starts[keep] + lo, ends[keep] + lo
+
+    def _line(self, i):
+        return bytes(self._data[int(self._starts[i]):int(self._ends[i])]).decode('utf-8').rstrip('\r\n')
+
+    def _fetch(self, indices):
+        return list(csv.reader([self._line(i) for i in indices]))
+
+    def _column_values(self, column):
+        if column not in self._column_cache:
+            # Interpreta as colunas de todas as linhas da janela de uma vez
+            from cache_log import parse_block
+            if self.count:
+                data = bytes(self._data[int(self._starts[0]):int(self._ends[-1])]) + b'\n'
+                _, t, pv, sp, out, _ = parse_block(data)
+            else:
+                t = pv = sp = out = np.empty(0)
+            for col, values in enumerate((t, pv, sp, out)):
+                self._column_cache[col] = np.asarray(values, dtype=np.float64)
+        return self._column_cache[column]
+
+    def _time_index(self, dt):
+        t = to_seconds(dt)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._seconds_at(int(self._starts[mid])) < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+
+def open_row_source(filepath, start_time, end_time):
+    from log_binario import BINARY_EXT
+    if filepath.lower().endswith(BINARY_EXT):
+        return BinaryRowSource(filepath, start_time, end_time)
+    return CsvRowSource(filepath, start_time, end_time)
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Tabela que materializa em widgets apenas as linhas visíveis (mais uma
+    pequena margem em cache), buscando mais linhas da fonte ao rolar.
+    Permite ordenar por coluna e saltar para um horário.
+    """
+    def __init__(self, parent, source):
+        super().__init__(parent)
+        self.source = source
+        self.first = 0
+        self.visible = 1
+        self._cache_start = 0
+        self._cache = []
+
+        jump_frame = ttk.Frame(self)
+        jump_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(jump_frame, text="Ir para (DD/MM/AAAA HH:MM:SS):").pack(side=tk.LEFT)
+        self.jump_var = tk.StringVar()
+        jump_entry = ttk.Entry(jump_frame, textvariable=self.jump_var, width=20)
+        jump_entry.pack(side=tk.LEFT, padx=5)
+        jump_entry.bind("<Return>", lambda e: self.jump_to_time())
+        ttk.Button(jump_frame, text="Ir", command=self.jump_to_time, width=4).pack(side=tk.LEFT)
+        ttk.Label(jump_frame, text=f"{len(source)} linhas", font=("Helvetica", 8)).pack(side=tk.RIGHT)
+
+        table_frame = ttk.Frame(self)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(table_frame, columns=source.header, show='headings', selectmode='browse')
+        for i, col in enumerate(source.header):
+            self.tree.heading(col, text=col, command=lambda c=i: self.sort_by(c))
+            self.tree.column(col, width=120)
+        self.scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        style_height = ttk.Style().lookup('Treeview', 'rowheight')
+        self.row_height = int(style_height) if style_height else ALTURA_LINHA_PADRAO
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.bind("<Destroy>", self._on_destroy)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(seq, self._on_wheel)
+        for seq, delta in (("<Down>", 1), ("<Up>", -1), ("<Next>", None), ("<Prior>", None)):
+            self.tree.bind(seq, lambda e, d=delta, s=seq: self._on_key(d, s))
+
+        self.refresh()
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.source.close()
+
+    # --- Janela de linhas visíveis ---
+    def _rows(self, start, stop):
+        """Linhas [start, stop) a partir do cache; busca na fonte com margem quando necessário."""
+        cache_end = self._cache_start + len(self._cache)
+        if start < self._cache_start or stop > cache_end:
+            self._cache_start = max(0, start - MARGEM_LINHAS)
+            self._cache = self.source.rows(self._cache_start, stop + MARGEM_LINHAS)
+        return self._cache[start - self._cache_start:stop - self._cache_start]
+
+    def refresh(self):
+        total = len(self.source)
+        self.first = max(0, min(self.first, total - self.visible))
+        rows = self._rows(self.first, self.first + self.visible)
+
+        items = self.tree.get_children()
+        for i, row in enumerate(rows):
+            if i < len(items):
+                self.tree.item(items[i], values=row)
+            else:
+                self.tree.insert('', tk.END, values=row)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, first):
+        self.first = first
+        self.refresh()
+
+    def _on_resize(self, event):
+        visible = max(1, event.height // self.row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(value) * len(self.source)))
+        elif action == 'scroll':
+            step = self.visible if unit == 'pages' else 1
+            self.scroll_to(self.first + int(value) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_to(self.first - 3)
+        else:
+            self.scroll_to(self.first + 3)
+        return "break"
+
+    def _on_key(self, delta, seq):
+        if delta is None:
+            delta = self.visible if seq == "<Next>" else -self.visible
+        self.scroll_to(self.first + delta)
+        return "break"
+
+    # --- Ordenação e busca ---
+    def sort_by(self, column):
+        descending = not self.source.sort_descending if column == self.source.sort_column else False
+        self.source.sort(column, descending)
+        self._cache = []
+        self.scroll_to(0)
+
+    def jump_to_time(self):
+        try:
+            target = datetime.strptime(self.jump_var.get().strip(), LOG_TIME_FORMAT)
+        except ValueError:
+            messagebox.showerror("Erro de Formato", "Formato de data/hora inválido. Use DD/MM/AAAA HH:MM:SS.", parent=self)
+            return
+        if len(self.source):
+            self.scroll_to(self.source.position_of_time(target))